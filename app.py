@@ -2,11 +2,13 @@ import json
 from datetime import datetime
 
 from server import SimpleFramework
-from response import HtmlResponse, Response, JsonResponse, TextResponse
+from response import (HtmlResponse, Response, JsonResponse, TextResponse,
+                      fast_json)
 
 app = SimpleFramework()
 
 
+@app.cache(ttl=60)
 @app.route("/")
 def index(app):
     return HtmlResponse(app.render_template("index.html", {
@@ -24,6 +26,7 @@ def time(app):
     }))
 
 
+@app.cache(ttl=60)
 @app.route("/submit", methods=["GET", "POST"])
 def submit(app):
     data = {"name": "Иван Иванов", "email": "ivan@example.com",
@@ -39,9 +42,9 @@ def show_user(username):
     return TextResponse(f"Hello {username} !")
 
 
-@app.route('/user/<username>/json', methods=["GET"])
+@app.route('/user/<username>/json', methods=["GET"], memoize=1024)
 def show_user(app, username):
-    return JsonResponse({"username": username})
+    return JsonResponse({"username": username}, encoder=fast_json)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+import asyncio
+import inspect
+import os
+from urllib.parse import quote
+
+from request_ import Headers, Request
+from response import FileResponse, Response, StreamingResponse
+from wsgi import FILE_BLOCK_SIZE, split_http_response
+
+
+async def handle_asgi(app, scope, receive, send):
+    """ ASGI 3: http и lifespan поверх dispatch_async фреймворка """
+    if scope["type"] == "http":
+        await handle_http(app, scope, receive, send)
+    elif scope["type"] == "lifespan":
+        await handle_lifespan(app, receive, send)
+    else:
+        raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+
+async def handle_lifespan(app, receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await app.startup()
+            except Exception as e:
+                app.logger.exception("Startup failed")
+                await send({"type": "lifespan.startup.failed",
+                            "message": str(e)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            try:
+                await app.shutdown()
+            except Exception as e:
+                app.logger.exception("Shutdown failed")
+                await send({"type": "lifespan.shutdown.failed",
+                            "message": str(e)})
+                return
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def handle_http(app, scope, receive, send):
+    request = request_from_scope(scope)
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+        body += message.get("body", b"")
+        if app.max_body_bytes is not None and len(body) > app.max_body_bytes:
+            await send_raw(send, app.build_response(
+                "413 Payload Too Large", "text/html",
+                "<h1>413 Payload Too Large</h1>"))
+            return
+        if not message.get("more_body", False):
+            break
+    request.body = bytes(body)
+
+    response = await app.dispatch_async(request)
+    await send_response(app, scope, send, response)
+
+
+def request_from_scope(scope):
+    """ Request из ASGI scope; цель запроса как в сыром HTTP (path?query) """
+    request = Request()
+    request.method = scope["method"]
+    raw_path = scope.get("raw_path")
+    if raw_path:
+        path = raw_path.decode("latin-1")
+    else:
+        path = quote(scope.get("path", "/"), safe="/:@!$&'()*+,;=~")
+    query = scope.get("query_string", b"")
+    request.endpoint = f"{path}?{query.decode('latin-1')}" if query else path
+    request.protocol = f"HTTP/{scope.get('http_version', '1.1')}"
+    # Имена и значения уже в байтах - собираем блок заголовков для Headers
+    request.headers = Headers(b"\r\n".join(
+        name + b": " + value for name, value in scope.get("headers", ())))
+    return request
+
+
+def encode_headers(pairs):
+    # В ASGI имена заголовков передаются в нижнем регистре
+    return [(name.lower().encode("latin-1"), str(value).encode("latin-1"))
+            for name, value in pairs]
+
+
+async def send_response(app, scope, send, response):
+    if isinstance(response, StreamingResponse):
+        headers = [("Content-Type", response.content_type)]
+        if response.content_length is not None:
+            headers.append(("Content-Length", response.content_length))
+        headers.extend(response.headers)
+        await send({"type": "http.response.start",
+                    "status": int(response.status[:3]),
+                    "headers": encode_headers(headers)})
+        async for chunk in response.aiter_chunks(app.executor):
+            await send({"type": "http.response.body", "body": chunk,
+                        "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    if isinstance(response, FileResponse):
+        await send_file(app, scope, send, response)
+        return
+    if isinstance(response, Response):
+        body = response.body
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        headers = [("Content-Length", len(body))]
+        if response.content_type is not None:
+            headers.insert(0, ("Content-Type", response.content_type))
+        headers.extend(response.headers)
+        await send({"type": "http.response.start",
+                    "status": int(response.status[:3]),
+                    "headers": encode_headers(headers)})
+        await send({"type": "http.response.body", "body": body})
+        return
+    await send_raw(send, response)
+
+
+async def send_raw(send, data):
+    """ Готовый HTTP-ответ (кэш, ошибки, 404) """
+    status, headers, body = split_http_response(data)
+    await send({"type": "http.response.start", "status": int(status[:3]),
+                "headers": encode_headers(headers)})
+    await send({"type": "http.response.body", "body": body[0]})
+
+
+async def send_file(app, scope, send, response):
+    headers = [("Content-Type", response.content_type),
+               ("Content-Length", response.length)]
+    headers.extend(response.headers)
+    await send({"type": "http.response.start",
+                "status": int(response.status[:3]),
+                "headers": encode_headers(headers)})
+    extensions = scope.get("extensions") or {}
+    if ("http.response.pathsend" in extensions and response.offset == 0
+            and response.length == os.path.getsize(response.path)):
+        # Сервер сам отправит файл (например, через sendfile)
+        await send({"type": "http.response.pathsend",
+                    "path": response.path})
+        return
+
+    loop = asyncio.get_running_loop()
+    with open(response.path, "rb") as f:
+        f.seek(response.offset)
+        remaining = response.length
+        while remaining > 0:
+            block = await loop.run_in_executor(
+                app.executor, f.read, min(FILE_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            await send({"type": "http.response.body", "body": block,
+                        "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def call_hook(app, hook):
+    result = hook(app)
+    if inspect.isawaitable(result):
+        await result
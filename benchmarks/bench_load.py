@@ -0,0 +1,181 @@
+""" Нагрузочный бенчмарк: SimpleFramework на localhost, RPS и задержки """
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response import TextResponse
+from server import SimpleFramework
+
+REQUEST = b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n"
+
+
+def build_app(max_threads):
+    app = SimpleFramework(max_threads=max_threads)
+    app.logger.setLevel(logging.WARNING)
+
+    @app.route("/")
+    def index(app):
+        return TextResponse("Hello, World!")
+
+    return app
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(engine, port, max_threads):
+    build_app(max_threads).start_server("127.0.0.1", port, engine=engine)
+
+
+def wait_for_port(port, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    if not head.startswith((b"HTTP/1.1 200", b"HTTP/1.0 200")):
+        raise RuntimeError(f"Unexpected response: {head[:40]!r}")
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    if head.startswith(b"HTTP/1.0"):
+        return b"connection: keep-alive" in head.lower()
+    return b"connection: close" not in head.lower()
+
+
+async def hold_slow_clients(port, count):
+    """ Соединения, застрявшие посреди заголовков (медленная сеть) """
+    writers = []
+    for _ in range(count):
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET / HTTP/1.1\r\nHost: ")
+        writers.append(writer)
+    await asyncio.sleep(0.1)
+    return writers
+
+
+async def load(port, concurrency, total, keep_alive=True, slow_clients=0):
+    slow = await hold_slow_clients(port, slow_clients)
+    latencies = []
+    errors = 0
+    remaining = total
+    request = REQUEST if keep_alive else REQUEST.replace(
+        b"\r\n\r\n", b"\r\nConnection: close\r\n\r\n")
+
+    async def client():
+        nonlocal remaining, errors
+        writer = None
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(
+                        "127.0.0.1", port)
+                writer.write(request)
+                reusable = await read_response(reader)
+            except (OSError, RuntimeError, asyncio.IncompleteReadError):
+                errors += 1
+                writer = None
+                continue
+            latencies.append(time.perf_counter() - started)
+            if not (keep_alive and reusable):
+                writer.close()
+                writer = None
+        if writer is not None:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    for writer in slow:
+        writer.close()
+    return latencies, errors, elapsed
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+def run_engine(engine, concurrency, total, max_threads=5, keep_alive=True,
+               slow_clients=0):
+    """ Запускает сервер в отдельном процессе и нагружает его """
+    port = free_port()
+    process = multiprocessing.Process(target=serve,
+                                      args=(engine, port, max_threads),
+                                      daemon=True)
+    process.start()
+    try:
+        wait_for_port(port)
+        latencies, errors, elapsed = asyncio.run(
+            load(port, concurrency, total, keep_alive, slow_clients))
+    finally:
+        process.terminate()
+        process.join()
+    latencies.sort()
+    return {
+        "engine": engine,
+        "concurrency": concurrency,
+        "keep_alive": keep_alive,
+        "slow_clients": slow_clients,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "p999_ms": percentile(latencies, 0.999) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--engine", nargs="+", default=["threads", "asyncio"])
+    parser.add_argument("--slow-clients", type=int, default=0,
+                        help="столько соединений висит с недосланными "
+                             "заголовками")
+    parser.add_argument("--concurrency", type=int, nargs="+",
+                        default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--max-threads", type=int, default=5)
+    parser.add_argument("--close", action="store_true",
+                        help="новое соединение на каждый запрос")
+    args = parser.parse_args(argv)
+
+    for concurrency in args.concurrency:
+        for engine in args.engine:
+            result = run_engine(engine, concurrency, args.requests,
+                                args.max_threads, not args.close,
+                                args.slow_clients)
+            print(f"{engine:<8} c={concurrency:<4} "
+                  f"{result['rps']:9.1f} req/s  "
+                  f"p50={result['p50_ms']:.2f}ms "
+                  f"p99={result['p99_ms']:.2f}ms "
+                  f"p999={result['p999_ms']:.2f}ms "
+                  f"errors={result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
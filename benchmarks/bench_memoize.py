@@ -0,0 +1,74 @@
+""" route(memoize=N) и route(static=True) против обычного обработчика:
+полный handle_request на 100 разных значениях параметра """
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response import HtmlResponse, JsonResponse
+from server import SimpleFramework
+
+USERS = [f"user{index}" for index in range(100)]
+PAGE = "<p>About this service</p>" * 20
+
+
+def profile(username):
+    """ Ответ типичного API: несколько десятков полей """
+    return {"username": username,
+            "orders": [{"id": index, "total": index * 1.5, "status": "paid"}
+                       for index in range(30)]}
+
+
+def build_app():
+    app = SimpleFramework()
+
+    @app.route("/plain/<username>/json")
+    def plain_user(app, username):
+        return JsonResponse(profile(username))
+
+    @app.route("/memo/<username>/json", memoize=1024)
+    def memo_user(app, username):
+        return JsonResponse(profile(username))
+
+    @app.route("/plain/about")
+    def plain_about(app):
+        return HtmlResponse(PAGE)
+
+    @app.route("/fixed/about", static=True)
+    def static_about(app):
+        return HtmlResponse(PAGE)
+
+    return app
+
+
+def requests_for(prefix):
+    return [f"GET /{prefix}/{user}/json HTTP/1.1\r\n\r\n".encode()
+            for user in USERS]
+
+
+def run(number=20000):
+    app = build_app()
+    cases = {
+        "memoize.plain": requests_for("plain"),
+        "memoize.memo": requests_for("memo"),
+        "memoize.static.plain": [b"GET /plain/about HTTP/1.1\r\n\r\n"],
+        "memoize.static": [b"GET /fixed/about HTTP/1.1\r\n\r\n"],
+    }
+    results = {}
+    for name, raw_requests in cases.items():
+        count = len(raw_requests)
+        state = {"index": 0}
+
+        def case():
+            index = state["index"]
+            state["index"] = index + 1
+            app.handle_request(raw_requests[index % count])
+
+        results[name] = timeit.timeit(case, number=number) / number * 1e6
+    return results
+
+
+if __name__ == "__main__":
+    for name, usec in run().items():
+        print(f"{name:<28} {usec:8.3f} us/request")
@@ -0,0 +1,51 @@
+""" Микробенчмарк цепочки middleware: стоимость одного слоя """
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from request_ import Request
+from response import TextResponse
+from server import SimpleFramework
+
+RAW_REQUEST = b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n"
+LAYERS = 10
+
+
+def build_app(layers, kind):
+    app = SimpleFramework()
+
+    @app.route("/")
+    def index(app):
+        return TextResponse("Hello, World!")
+
+    for _ in range(layers):
+        if kind == "onion":
+            app.use(lambda request, call_next: call_next(request))
+        elif kind == "hook":
+            app.before_request(lambda request: None)
+        else:
+            app.use(lambda environ: environ)
+    app.compose_middleware()
+    return app
+
+
+def run(number=20000):
+    request = Request(RAW_REQUEST)
+    results = {}
+    base = build_app(0, "onion")
+    results["middleware.none"] = timeit.timeit(
+        lambda: base.dispatch(request), number=number) / number * 1e6
+    for kind in ("onion", "hook", "environ"):
+        app = build_app(LAYERS, kind)
+        total = timeit.timeit(lambda: app.dispatch(request),
+                              number=number) / number * 1e6
+        results[f"middleware.{kind}.per_layer"] = (
+            (total - results["middleware.none"]) / LAYERS)
+    return results
+
+
+if __name__ == "__main__":
+    for name, usec in run().items():
+        print(f"{name:<32} {usec:8.3f} us")
@@ -0,0 +1,92 @@
+""" Пропускная способность разбора запросов: прежний str-парсер и RequestParser """
+import os
+import socket
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from request_ import BufferPool, RequestParser
+
+GET = (b"GET /user/alice/json HTTP/1.1\r\nHost: localhost:8080\r\n"
+       b"User-Agent: bench/1.0\r\nAccept: */*\r\n"
+       b"Accept-Encoding: gzip, deflate\r\nConnection: keep-alive\r\n\r\n")
+POST = (b"POST /submit HTTP/1.1\r\nHost: localhost:8080\r\n"
+        b"Content-Type: application/x-www-form-urlencoded\r\n"
+        b"Content-Length: 900\r\n\r\n" + b"f=" + b"x" * 898)
+
+
+def legacy_parse(request):
+    """ Прежний Request.parse_http_request (str после recv(1024).decode()) """
+    split_request = request.split("\r\n")
+    method, endpoint, protocol = split_request[0].split()
+    headers = {}
+    for line in split_request[1:]:
+        if line == "":
+            break
+        key, value = line.split(": ", 1)
+        headers[key] = value
+    body_index = split_request.index("") + 1
+    if body_index < len(split_request):
+        body = "\r\n".join(split_request[body_index:])
+    else:
+        body = None
+    return method, endpoint, protocol, headers, body
+
+
+POOL = BufferPool()
+
+
+def parse_new(raw):
+    parser = RequestParser(pool=POOL)
+    parser.feed(raw)
+    request = parser.next_request()
+    parser.close()
+    return request
+
+
+def run(number=20000):
+    results = {}
+    for name, raw in (("get", GET), ("post", POST)):
+        legacy = timeit.timeit(lambda: legacy_parse(raw.decode()),
+                               number=number)
+        new = timeit.timeit(lambda: parse_new(raw), number=number)
+        results[f"parser.legacy.{name}"] = legacy / number * 1e6
+        results[f"parser.incremental.{name}"] = new / number * 1e6
+
+    # Конвейер: 10 запросов в одном буфере на одно соединение
+    pipelined = GET * 10
+
+    def parse_pipelined():
+        parser = RequestParser(pool=POOL)
+        parser.feed(pipelined)
+        while parser.next_request() is not None:
+            pass
+        parser.close()
+
+    seconds = timeit.timeit(parse_pipelined, number=number // 10)
+    results["parser.incremental.pipelined"] = seconds / number * 1e6
+
+    # Путь сервера: recv_into в буфер соединения, без промежуточных bytes
+    server, client = socket.socketpair()
+    parser = RequestParser(pool=POOL)
+
+    def parse_recv_into():
+        client.sendall(GET)
+        request = None
+        while request is None:
+            parser.commit(server.recv_into(parser.writable()))
+            request = parser.next_request()
+
+    seconds = timeit.timeit(parse_recv_into, number=number)
+    results["parser.recv_into.get"] = seconds / number * 1e6
+    parser.close()
+    server.close()
+    client.close()
+    return results
+
+
+if __name__ == "__main__":
+    for name, usec in run().items():
+        print(f"{name:<32} {usec:8.3f} us/request  "
+              f"{1e6 / usec:12.0f} req/s")
@@ -0,0 +1,91 @@
+""" Request: память на объект и время разбора - прежний класс и ленивый со слотами """
+import os
+import sys
+import timeit
+import tracemalloc
+from functools import cached_property
+from urllib.parse import parse_qsl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from request_ import BufferPool, RequestParser
+
+REQUEST = (b"GET /user/alice?tab=posts&page=2 HTTP/1.1\r\nHost: localhost:8080\r\n"
+           b"User-Agent: bench/1.0\r\nAccept: */*\r\n"
+           b"Accept-Encoding: gzip, deflate\r\nConnection: keep-alive\r\n"
+           b"Cookie: sid=0123456789abcdef; theme=dark\r\n\r\n")
+
+
+class LegacyRequest:
+    """ Прежний Request: __dict__, заголовки сразу в словарь, cached_property """
+
+    def __init__(self, raw):
+        head, _, body = raw.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        self.method, self.endpoint, self.protocol = lines[0].split()
+        self.headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if not sep or not name or name.strip() != name:
+                raise ValueError("Invalid header line")
+            if name in self.headers:
+                self.headers[name] = f"{self.headers[name]}, {value.strip()}"
+            else:
+                self.headers[name] = value.strip()
+        if "\r\ncontent-length:" in head.decode("latin-1").lower():
+            body = body[:int(self.headers["Content-Length"])]
+        self.body = body
+        self.timings = None
+        self.route_name = None
+
+    @cached_property
+    def form(self):
+        return dict(parse_qsl(self.body.decode(), keep_blank_values=True))
+
+
+def measure_memory(factory, count=2000):
+    """ Средний размер объекта запроса со всеми его полями, в байтах """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [factory() for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del objects
+    return size / count
+
+
+def run(number=20000):
+    pool = BufferPool()
+    parser = RequestParser(pool=pool)
+
+    def parse_lazy():
+        parser.feed(REQUEST)
+        return parser.next_request()
+
+    def parse_legacy():
+        return LegacyRequest(REQUEST)
+
+    def route_lazy():
+        # Типичный обработчик: путь для маршрута и один заголовок
+        request = parse_lazy()
+        return request.path, request.get_header("Connection")
+
+    def route_legacy():
+        request = parse_legacy()
+        return request.endpoint.partition("?")[0], request.headers["Connection"]
+
+    results = {}
+    for name, func in (("legacy", route_legacy), ("lazy", route_lazy)):
+        seconds = min(timeit.repeat(func, number=number, repeat=5))
+        results[f"request.{name}.parse"] = seconds / number * 1e6
+    results["request.legacy.bytes"] = measure_memory(parse_legacy)
+    results["request.lazy.bytes"] = measure_memory(parse_lazy)
+    parser.close()
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        unit = "bytes/request" if name.endswith(".bytes") else "us/request"
+        print(f"{name:<28} {value:10.2f} {unit}")
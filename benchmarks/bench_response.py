@@ -0,0 +1,45 @@
+""" Микробенчмарк сериализации ответов """
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response import HtmlResponse, JsonResponse, dumps_json, fast_json
+
+HTML = "<h1>Hello</h1>" * 100
+LARGE = "x" * (1024 * 1024)
+DATA = {"username": "alice", "items": list(range(50))}
+
+
+def legacy_to_http_response(body, status="200 OK", content_type="text/html"):
+    """ Прежний Response.to_http_response """
+    body = body.encode("utf-8")
+    headers = f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n"
+    return headers.encode("utf-8") + body
+
+
+def run(number=5000):
+    html = HtmlResponse(HTML)
+    large = HtmlResponse(LARGE)
+    cases = {
+        "response.legacy.html": lambda: legacy_to_http_response(HTML),
+        "response.html": html.to_http_response,
+        "response.html.buffers": html.buffers,
+        "response.legacy.large": lambda: legacy_to_http_response(LARGE),
+        "response.large.buffers": large.buffers,
+        "response.legacy.json": lambda: legacy_to_http_response(
+            json.dumps(DATA), content_type="application/json"),
+        "response.json": lambda: JsonResponse(
+            DATA, encoder=dumps_json).to_http_response(),
+        "response.json.fast": lambda: JsonResponse(
+            DATA, encoder=fast_json).to_http_response(),
+    }
+    return {name: timeit.timeit(case, number=number) / number * 1e6
+            for name, case in cases.items()}
+
+
+if __name__ == "__main__":
+    for name, usec in run().items():
+        print(f"{name:<28} {usec:8.3f} us/response")
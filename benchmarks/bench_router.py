@@ -0,0 +1,44 @@
+""" Микробенчмарк поиска маршрута при 10, 100 и 1000 маршрутах """
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from router import Router
+
+
+def handler(app, **params):
+    return None
+
+
+def build_router(count):
+    router = Router()
+    for i in range(count):
+        if i % 2:
+            router.add_route(f"/static/page{i}", ["GET"], handler)
+        else:
+            router.add_route(f"/user{i}/<username>/json", ["GET"], handler)
+    return router
+
+
+def run(counts=(10, 100, 1000), number=20000):
+    results = {}
+    for count in counts:
+        router = build_router(count)
+        # Последние зарегистрированные маршруты - худший случай для перебора
+        paths = {
+            "static": f"/static/page{count - 1}",
+            "param": f"/user{count - 2}/alice/json",
+            "miss": "/no/such/route",
+        }
+        for kind, path in paths.items():
+            seconds = timeit.timeit(lambda: router.get_route(path, "GET"),
+                                    number=number)
+            results[f"router.{kind}.{count}"] = seconds / number * 1e6
+    return results
+
+
+if __name__ == "__main__":
+    for name, usec in run().items():
+        print(f"{name:<24} {usec:8.3f} us/lookup")
@@ -0,0 +1,81 @@
+""" Стоимость чтения и записи сессии при большом числе сессий в хранилище.
+
+    python benchmarks/bench_sessions.py --count 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sessions import MemoryStore, SQLiteStore, sign, unsign
+
+DATA = {"user_id": 42, "cart": [1, 2, 3], "theme": "dark"}
+
+
+def fill_sqlite(store, sids):
+    """ Массовая вставка одной транзакцией - save по одной заняла бы минуты """
+    db = store.connection()
+    expires = time.time() + store.ttl
+    db.execute("BEGIN")
+    db.executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                   ((sid, expires, '{"user_id": 42}') for sid in sids))
+    db.execute("COMMIT")
+
+
+def measure(store, sids, lookups):
+    """ Среднее время load и save в микросекундах на случайных сессиях """
+    sample = random.sample(sids, lookups)
+    start = time.perf_counter()
+    for sid in sample:
+        store.load(sid)
+    load = (time.perf_counter() - start) / lookups * 1e6
+    start = time.perf_counter()
+    for sid in sample:
+        store.save(sid, DATA)
+    save = (time.perf_counter() - start) / lookups * 1e6
+    return load, save
+
+
+def run(count=100000, lookups=5000):
+    sids = [f"{index:032x}" for index in range(count)]
+    results = {}
+
+    memory = MemoryStore(max_sessions=count)
+    for sid in sids:
+        memory.save(sid, DATA)
+    load, save = measure(memory, sids, lookups)
+    results["sessions.memory.load"] = load
+    results["sessions.memory.save"] = save
+
+    with tempfile.TemporaryDirectory() as folder:
+        sqlite = SQLiteStore(os.path.join(folder, "sessions.db"))
+        fill_sqlite(sqlite, sids)
+        load, save = measure(sqlite, sids, lookups)
+        results["sessions.sqlite.load"] = load
+        results["sessions.sqlite.save"] = save
+        sqlite.connection().close()
+
+    # Проверка подписи cookie - на каждый запрос с сессией
+    signed = sign(sids[0], b"secret")
+    start = time.perf_counter()
+    for _ in range(lookups):
+        unsign(signed, b"secret")
+    results["sessions.unsign"] = (time.perf_counter() - start) / lookups * 1e6
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args(argv)
+    for name, usec in run(args.count, args.lookups).items():
+        print(f"{name:<24} {usec:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
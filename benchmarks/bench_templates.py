@@ -0,0 +1,46 @@
+""" Микробенчмарк render_template: прежний str.replace и скомпилированный шаблон """
+import logging
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from server import SimpleFramework
+
+TEMPLATES = os.path.join(ROOT, "templates")
+CONTEXT = {"title": "WFW", "message": "Welcome to the Web Framework!"}
+
+
+def legacy_render(template_name, context):
+    """ Прежний SimpleFramework.render_template """
+    template_path = os.path.join(TEMPLATES, template_name)
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"Template '{template_name}' not found")
+    with open(template_path, "r") as f:
+        template = f.read()
+    for key, value in context.items():
+        template = template.replace(f"{{{{ {key} }}}}", str(value))
+    return template
+
+
+def run(number=5000):
+    app = SimpleFramework(template_folder=TEMPLATES)
+    app.logger.setLevel(logging.WARNING)
+    frozen = SimpleFramework(template_folder=TEMPLATES,
+                             template_auto_reload=False,
+                             precompile_templates=True)
+    cases = {
+        "templates.legacy": lambda: legacy_render("index.html", CONTEXT),
+        "templates.cached": lambda: app.render_template("index.html", CONTEXT),
+        "templates.no_reload": lambda: frozen.render_template("index.html",
+                                                              CONTEXT),
+    }
+    return {name: timeit.timeit(case, number=number) / number * 1e6
+            for name, case in cases.items()}
+
+
+if __name__ == "__main__":
+    for name, usec in run().items():
+        print(f"{name:<24} {usec:8.3f} us/render")
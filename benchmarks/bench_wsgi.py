@@ -0,0 +1,68 @@
+""" WSGI: накладные расходы адаптера и приложение под WSGI-сервером
+против встроенного start_server """
+import argparse
+import io
+import os
+import sys
+import timeit
+from wsgiref.util import setup_testing_defaults
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_load
+
+RAW_REQUEST = b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n"
+
+
+def make_environ():
+    environ = {"PATH_INFO": "/", "SCRIPT_NAME": "", "QUERY_STRING": "",
+               "REQUEST_METHOD": "GET", "HTTP_HOST": "localhost",
+               "wsgi.input": io.BytesIO()}
+    setup_testing_defaults(environ)
+    return environ
+
+
+def start_response(status, headers):
+    pass
+
+
+def run(number=20000):
+    app = bench_load.build_app(max_threads=1)
+    environ = make_environ()
+    cases = {
+        "wsgi.call": lambda: b"".join(app(environ, start_response)),
+        "wsgi.handle_request": lambda: app.handle_request(RAW_REQUEST),
+    }
+    return {name: timeit.timeit(case, number=number) / number * 1e6
+            for name, case in cases.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+",
+                        default=[1, 16])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    for name, usec in run().items():
+        print(f"{name:<24} {usec:8.3f} us/request")
+
+    # wsgiref закрывает соединение после ответа, поэтому для честного
+    # сравнения встроенный сервер тоже меряется без keep-alive
+    for concurrency in args.concurrency:
+        for engine, keep_alive in (("threads", True), ("threads", False),
+                                   ("wsgi", False)):
+            result = bench_load.run_engine(engine, concurrency,
+                                           args.requests,
+                                           keep_alive=keep_alive)
+            mode = "keep-alive" if keep_alive else "close"
+            print(f"{engine:<8} {mode:<10} c={concurrency:<4} "
+                  f"{result['rps']:9.1f} req/s  "
+                  f"p50={result['p50_ms']:.2f}ms "
+                  f"p99={result['p99_ms']:.2f}ms "
+                  f"errors={result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
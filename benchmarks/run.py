@@ -0,0 +1,148 @@
+""" Набор бенчмарков: микробенчмарки и нагрузочный тест, JSON и контроль регрессий.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --load --baseline results.json --threshold 0.15
+
+Код возврата 1, если хотя бы одна метрика хуже базовой больше чем на threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_load
+import bench_memoize
+import bench_middleware
+import bench_parser
+import bench_request
+import bench_response
+import bench_router
+import bench_sessions
+import bench_templates
+import bench_wsgi
+
+MICRO = {
+    "memoize": bench_memoize.run,
+    "middleware": bench_middleware.run,
+    "router": bench_router.run,
+    "sessions": bench_sessions.run,
+    "parser": bench_parser.run,
+    "request": bench_request.run,
+    "response": bench_response.run,
+    "templates": bench_templates.run,
+    "wsgi": bench_wsgi.run,
+}
+
+# Для этих метрик больше - лучше; для остальных (время) меньше - лучше
+HIGHER_IS_BETTER = (".rps",)
+
+
+def run_load(engines, concurrency_levels, requests):
+    metrics = {}
+    for engine in engines:
+        for concurrency in concurrency_levels:
+            result = bench_load.run_engine(engine, concurrency, requests)
+            prefix = f"load.{engine}.c{concurrency}"
+            for name in ("rps", "p50_ms", "p99_ms", "p999_ms"):
+                metrics[f"{prefix}.{name}"] = result[name]
+            metrics[f"{prefix}.errors"] = result["errors"]
+    return metrics
+
+
+def compare(current, baseline, threshold):
+    """ Список регрессий: (метрика, было, стало, изменение).
+
+    Метрика базы, которой нет в текущем прогоне, - тоже регрессия
+    (стало None): бенчмарк сломался или перестал ее отдавать.
+    """
+    regressions = []
+    for name, old in baseline.items():
+        new = current.get(name)
+        if new is None:
+            regressions.append((name, old, None, float("inf")))
+            continue
+        if name.endswith(".errors"):
+            # Ошибки сравниваются и с нулевой базой: 0 -> N - регрессия
+            if new > old:
+                regressions.append((name, old, new, float("inf")))
+            continue
+        if not old:
+            continue
+        if name.endswith(HIGHER_IS_BETTER):
+            change = (old - new) / old
+        else:
+            change = (new - old) / old
+        if change > threshold:
+            regressions.append((name, old, new, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Framework benchmark suite",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__)
+    parser.add_argument("--only", nargs="+", choices=sorted(MICRO),
+                        help="запустить только указанные микробенчмарки")
+    parser.add_argument("--load", action="store_true",
+                        help="добавить нагрузочный тест на localhost")
+    parser.add_argument("--engine", nargs="+", default=["threads", "asyncio"])
+    parser.add_argument("--concurrency", type=int, nargs="+",
+                        default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--output", help="файл для результатов в JSON")
+    parser.add_argument("--baseline", help="JSON предыдущего прогона")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="допустимое ухудшение (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    metrics = {}
+    groups = args.only or sorted(MICRO)
+    for name in groups:
+        print(f"running {name}...", file=sys.stderr)
+        metrics.update(MICRO[name]())
+    prefixes = [f"{name}." for name in groups]
+    if args.load:
+        print("running load...", file=sys.stderr)
+        metrics.update(run_load(args.engine, args.concurrency, args.requests))
+        prefixes += [f"load.{engine}.c{concurrency}."
+                     for engine in args.engine
+                     for concurrency in args.concurrency]
+
+    for name in sorted(metrics):
+        print(f"{name:<40} {metrics[name]:12.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "timestamp": time.time(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "metrics": metrics,
+            }, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["metrics"]
+        # Сравниваем только то, что запускали в этот раз (--only, --engine)
+        baseline = {name: value for name, value in baseline.items()
+                    if name.startswith(tuple(prefixes))}
+        regressions = compare(metrics, baseline, args.threshold)
+        for name, old, new, change in regressions:
+            if new is None:
+                print(f"REGRESSION {name}: {old:.3f} -> missing",
+                      file=sys.stderr)
+            else:
+                print(f"REGRESSION {name}: {old:.3f} -> {new:.3f} "
+                      f"({change:+.0%})", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from response import PreparedResponse
+
+
+# Ответы на остальные методы (POST и т.д.) зависят от тела запроса и
+# меняют состояние - их не кэшируем (RFC 9110, 9.2.3)
+CACHEABLE_METHODS = frozenset(("GET", "HEAD"))
+
+
+class CachePolicy:
+    """ Параметры кэширования маршрута: время жизни и заголовки Vary """
+
+    def __init__(self, ttl=60, vary=None):
+        self.ttl = ttl
+        self.vary = tuple(vary or ())
+
+    @staticmethod
+    def applies(request):
+        return request.method in CACHEABLE_METHODS
+
+    def key(self, request):
+        values = tuple(request.get_header(name, "") for name in self.vary)
+        return request.method, request.endpoint, values
+
+
+class CacheEntry:
+    __slots__ = ("expires", "etag", "response", "not_modified")
+
+    def __init__(self, expires, etag, response, not_modified):
+        self.expires = expires
+        self.etag = etag
+        self.response = response  # PreparedResponse с полным ответом
+        self.not_modified = not_modified  # Готовый ответ 304
+
+    @property
+    def data(self):
+        return self.response.data
+
+    def for_request(self, request):
+        """ Копия ответа (или 304) для запроса - ее можно менять """
+        if_none_match = request.get_header("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            if self.etag in tags or "*" in tags:
+                return self.not_modified.copy()
+        return self.response.copy()
+
+
+def make_etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+class ResponseCache:
+    """ LRU-кэш сериализованных ответов с ограничением по числу и байтам """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, response, ttl):
+        """ Сериализует Response с ETag и сохраняет; возвращает CacheEntry """
+        body = response.body
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        etag = make_etag(body)
+        response.headers.append(("ETag", etag))
+        data = response.header_bytes(len(body)) + body
+        prepared = PreparedResponse(data, body, response.status,
+                                    response.content_type, response.headers)
+        not_modified = PreparedResponse(
+            (f"HTTP/1.1 304 Not Modified\r\nETag: {etag}\r\n"
+             f"Content-Length: 0\r\n\r\n").encode("utf-8"),
+            b"", "304 Not Modified", None, [("ETag", etag)])
+        entry = CacheEntry(time.monotonic() + ttl, etag, prepared,
+                           not_modified)
+        if len(data) > self.max_bytes:
+            return entry
+
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = entry
+            self.size += len(data)
+            while (len(self.entries) > self.max_entries
+                   or self.size > self.max_bytes):
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return entry
+
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        self.size -= len(entry.data)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+class RouteMemo:
+    """ LRU готовых ответов (PreparedResponse) маршрута по значениям
+    параметров пути.
+
+    Для обработчиков - чистых функций параметров (route(memoize=N) и
+    route(static=True)): без TTL и Vary, вытесняется давно не запрошенное.
+    """
+
+    def __init__(self, max_entries, route=None):
+        self.max_entries = max_entries
+        self.route = route  # Шаблон пути - метка в статистике
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            data = self.entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def set(self, key, data):
+        with self.lock:
+            self.entries[key] = data
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
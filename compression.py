@@ -0,0 +1,132 @@
+import gzip
+from functools import lru_cache
+
+from middleware import Layer
+from response import (FileResponse, PreparedResponse, Response,
+                      StreamingResponse)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Сжимать имеет смысл только текстовые форматы
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/javascript",
+    "application/xml", "image/svg+xml",
+)
+
+EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding, supported):
+    """ Лучшая кодировка из supported по Accept-Encoding (с q) или None """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in supported:  # Порядок supported - предпочтение при равенстве
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class Compressor:
+    """ Согласование Accept-Encoding и сжатие gzip/brotli """
+
+    def __init__(self, min_size=1024, level=6, brotli_level=5,
+                 types=COMPRESSIBLE_TYPES):
+        self.min_size = min_size
+        self.level = level
+        self.brotli_level = brotli_level
+        self.types = tuple(types)
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def negotiate(self, request):
+        return negotiate(request.get_header("Accept-Encoding"),
+                         self.encodings)
+
+    def compressible(self, content_type, size):
+        return size >= self.min_size and content_type.startswith(self.types)
+
+    def compress(self, data, encoding):
+        if encoding == "br":
+            return brotli.compress(data, quality=self.brotli_level)
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compress_response(self, request, response):
+        """ Сжимает тело Response на месте, если клиент и тип позволяют """
+        if (not isinstance(response, Response)
+                or isinstance(response, (FileResponse, StreamingResponse,
+                                         PreparedResponse))):
+            return response
+        body = response.body
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if not self.compressible(response.content_type, len(body)):
+            return response
+        if any(name.lower() == "content-encoding"
+               for name, _ in response.headers):
+            return response
+        add_vary(response.headers, "Accept-Encoding")
+        encoding = self.negotiate(request)
+        if encoding is not None:
+            response.body = self.compress(body, encoding)
+            response.headers.append(("Content-Encoding", encoding))
+        return response
+
+
+class Compression(Layer):
+    """ Внешний слой middleware: сжимает Response после обработчика.
+
+    Ответы из кэша (PreparedResponse) проходят как есть - кэш хранит
+    сжатые варианты сам, статику отдает StaticFiles из файлов .gz/.br.
+    """
+
+    def __init__(self, compressor):
+        self.compressor = compressor
+
+    def wrap(self, call_next):
+        compress = self.compressor.compress_response
+
+        def layer(request):
+            response = call_next(request)
+            if request.endpoint.startswith("/static/"):
+                return response
+            return compress(request, response)
+
+        return layer
+
+    def wrap_async(self, call_next, max_workers=None):
+        compress = self.compressor.compress_response
+
+        async def layer(request):
+            response = await call_next(request)
+            if request.endpoint.startswith("/static/"):
+                return response
+            return compress(request, response)
+
+        return layer
+
+
+def add_vary(headers, name):
+    """ Добавляет имя в Vary (объединяя с уже существующим заголовком) """
+    for index, (header, value) in enumerate(headers):
+        if header.lower() == "vary":
+            names = [item.strip().lower() for item in value.split(",")]
+            if name.lower() not in names:
+                headers[index] = (header, f"{value}, {name}")
+            return
+    headers.append(("Vary", name))
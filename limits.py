@@ -0,0 +1,41 @@
+import threading
+
+
+class ConnectionLimiter:
+    """ Не больше max_per_ip одновременных соединений с одного адреса.
+
+    Соединение (сокет, writer или объект реактора) запоминается вместе с
+    адресом, поэтому release() не нужен getpeername - после обрыва он уже
+    не работает.
+    """
+
+    def __init__(self, max_per_ip):
+        self.max_per_ip = max_per_ip
+        self.counts = {}  # ip -> открытых соединений
+        self.owners = {}  # соединение -> ip
+        self.lock = threading.Lock()
+
+    def acquire(self, connection, address):
+        """ Учитывает соединение; False, если у адреса уже max_per_ip """
+        ip = address[0] if isinstance(address, tuple) else address
+        with self.lock:
+            count = self.counts.get(ip, 0)
+            if count >= self.max_per_ip:
+                return False
+            self.counts[ip] = count + 1
+            self.owners[connection] = ip
+            return True
+
+    def release(self, connection):
+        with self.lock:
+            ip = self.owners.pop(connection, None)
+            if ip is None:
+                return
+            count = self.counts[ip] - 1
+            if count:
+                self.counts[ip] = count
+            else:
+                del self.counts[ip]
+
+    def __len__(self):
+        return len(self.owners)
@@ -0,0 +1,138 @@
+import itertools
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class BoundedQueueHandler(QueueHandler):
+    """ Кладет записи в ограниченную очередь; при переполнении теряет или ждет """
+
+    def __init__(self, log_queue, block=False):
+        super().__init__(log_queue)
+        self.block = block
+        self.dropped = 0  # Потерянные записи (без блокировки, приблизительно)
+
+    def enqueue(self, record):
+        if self.block:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    """ Пишет записи из очереди пачками: один write на batch_size строк
+    или на момент, когда очередь опустела """
+
+    def __init__(self, log_queue, stream=None, batch_size=256):
+        super().__init__(stream)
+        self.log_queue = log_queue
+        self.batch_size = batch_size
+        self.buffer = []
+
+    def emit(self, record):
+        try:
+            self.buffer.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.buffer) >= self.batch_size or self.log_queue.empty():
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self.buffer and self.stream:
+                self.stream.write("".join(self.buffer))
+                self.buffer.clear()
+                if hasattr(self.stream, "flush"):
+                    self.stream.flush()
+        finally:
+            self.release()
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # put_nowait в переполненную очередь потерял бы сигнал остановки
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """ QueueHandler на потоках запросов и QueueListener в фоновом потоке.
+
+    Запись в поток вывода (stderr) идет только из фонового потока, поэтому
+    accept и обработка запросов не ждут ввода-вывода логов.
+    """
+
+    def __init__(self, stream=None, capacity=10000, block=False,
+                 batch_size=256, formatter=None):
+        self.stream = stream
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.formatter = formatter
+        self.handler = BoundedQueueHandler(queue.Queue(capacity), block)
+        self.handler.pipeline = self  # Найти конвейер по обработчику логгера
+        self.listener = None
+        self.start()
+        if hasattr(os, "register_at_fork"):
+            # Поток слушателя не переживает fork - запускаем новый в дочернем
+            os.register_at_fork(after_in_child=self.restart)
+
+    def start(self):
+        log_queue = self.handler.queue
+        target = BatchStreamHandler(log_queue, self.stream, self.batch_size)
+        if self.formatter is not None:
+            target.setFormatter(self.formatter)
+        self.listener = _Listener(log_queue, target)
+        self.listener.start()
+
+    def restart(self):
+        self.handler.queue = queue.Queue(self.capacity)
+        self.start()
+
+    def configure(self, capacity, block):
+        """ Меняет размер очереди и политику переполнения на ходу.
+
+        Новая очередь со своим слушателем подменяет старую, затем старый
+        слушатель дописывает то, что успело в нее попасть.
+        """
+        self.handler.block = block
+        if capacity == self.capacity:
+            return
+        self.capacity = capacity
+        previous = self.listener
+        if previous is None:
+            self.handler.queue = queue.Queue(capacity)
+            return
+        self.restart()
+        stop_listener(previous)
+
+    def stop(self):
+        """ Дописывает накопленные записи и останавливает фоновый поток """
+        if self.listener is not None:
+            stop_listener(self.listener)
+            self.listener = None
+
+
+def stop_listener(listener):
+    listener.stop()
+    for handler in listener.handlers:
+        handler.flush()
+
+
+class AccessLog:
+    """ Выборочный журнал соединений: каждая every-я запись идет в логгер """
+
+    def __init__(self, logger, sample_rate=1.0):
+        self.logger = logger
+        self.every = round(1 / sample_rate) if sample_rate > 0 else 0
+        self.counter = itertools.count()
+
+    def log(self, message, *args):
+        if not self.every or next(self.counter) % self.every:
+            return
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(message, *args)
@@ -0,0 +1,166 @@
+import bisect
+import threading
+
+# Границы корзин гистограмм задержки, секунды
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Shard:
+    """ Данные одного потока: пишутся без блокировок """
+    __slots__ = ("histograms", "counters", "busy")
+
+    def __init__(self):
+        self.histograms = {}  # (имя, метки) -> [счетчики корзин..., сумма]
+        self.counters = {}  # (имя, метки) -> значение
+        self.busy = False
+
+
+class Metrics:
+    """ Счетчики и гистограммы задержек в формате Prometheus.
+
+    Каждый поток пишет в свой шард (threading.local), поэтому запись не
+    берет блокировок; шарды суммируются только при чтении /metrics.
+    Завершающийся поток вызывает retire(): его шард сливается в общий
+    итог, и пул потоков, растущий и сжимающийся, не копит шарды.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.local = threading.local()
+        self.shards = []
+        self.retired = _Shard()  # Сумма шардов завершившихся потоков
+        self.lock = threading.Lock()  # Регистрация шардов, gauge и чтение
+        self.gauges = {}  # имя -> (описание, функция)
+        self.collectors = []  # Функции -> [((имя, метки), значение)]
+
+    def shard(self):
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = _Shard()
+            with self.lock:
+                self.shards.append(shard)
+            return shard
+
+    def retire(self):
+        """ Вызывается потоком перед выходом: шард -> retired """
+        shard = getattr(self.local, "shard", None)
+        if shard is None:
+            return
+        del self.local.shard
+        with self.lock:
+            self.shards.remove(shard)
+            merge_shard(self.retired.histograms, self.retired.counters, shard)
+
+    def observe(self, name, labels, value):
+        histograms = self.shard().histograms
+        key = (name, labels)
+        values = histograms.get(key)
+        if values is None:
+            values = histograms[key] = [0] * (len(self.buckets) + 2)
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def inc(self, name, labels, amount=1):
+        counters = self.shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def set_busy(self, busy):
+        self.shard().busy = busy
+
+    def busy_workers(self):
+        return sum(1 for shard in list(self.shards) if shard.busy)
+
+    def gauge(self, name, help_text, func):
+        with self.lock:
+            self.gauges[name] = (help_text, func)
+
+    def collector(self, func):
+        """ Счетчики, которые ведутся вне шардов (например, статистика
+        кэшей): func() вызывается только при чтении /metrics """
+        with self.lock:
+            self.collectors.append(func)
+
+    def record_request(self, method, route, status, timings):
+        """ Учет одного запроса: счетчик и гистограммы по этапам """
+        self.inc("http_requests_total",
+                 (("method", method), ("route", route), ("status", status)))
+        for stage, seconds in timings.items():
+            self.observe("http_request_duration_seconds",
+                         (("route", route), ("stage", stage)), seconds)
+
+    def collect(self):
+        """ Сумма по всем шардам: (гистограммы, счетчики) """
+        histograms = {}
+        counters = {}
+        # Под блокировкой: иначе шард, слитый в retired во время чтения,
+        # посчитался бы дважды
+        with self.lock:
+            for shard in self.shards:
+                merge_shard(histograms, counters, shard)
+            merge_shard(histograms, counters, self.retired)
+        for func in list(self.collectors):
+            for key, value in func():
+                counters[key] = counters.get(key, 0) + value
+        return histograms, counters
+
+    def render(self):
+        """ Текстовый формат экспозиции Prometheus 0.0.4 """
+        histograms, counters = self.collect()
+        lines = []
+
+        seen = set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{format_labels(labels)} {value}")
+
+        seen = set()
+        for (name, labels), values in sorted(histograms.items()):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                bucket_labels = labels + (("le", repr(bound)),)
+                lines.append(
+                    f"{name}_bucket{format_labels(bucket_labels)} {cumulative}")
+            cumulative += values[len(self.buckets)]
+            lines.append(f"{name}_bucket"
+                         f"{format_labels(labels + (('le', '+Inf'),))} "
+                         f"{cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {values[-1]}")
+            lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+
+        for name, (help_text, func) in sorted(self.gauges.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {func()}")
+        return "\n".join(lines) + "\n"
+
+
+def merge_shard(histograms, counters, shard):
+    """ Прибавляет данные шарда к словарям гистограмм и счетчиков """
+    for key, values in list(shard.histograms.items()):
+        total = histograms.get(key)
+        if total is None:
+            histograms[key] = list(values)
+        else:
+            for i, value in enumerate(values):
+                total[i] += value
+    for key, value in list(shard.counters.items()):
+        counters[key] = counters.get(key, 0) + value
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
@@ -0,0 +1,187 @@
+import asyncio
+import inspect
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Layer(ABC):
+    """ Слой цепочки middleware: оборачивает следующий вызов один раз """
+
+    @abstractmethod
+    def wrap(self, call_next):
+        """ Синхронная цепочка: request -> ответ """
+
+    @abstractmethod
+    def wrap_async(self, call_next, max_workers=None):
+        """ Асинхронная цепочка: request -> awaitable ответ """
+
+    def close(self):
+        """ Освобождает ресурсы слоя: при пересборке цепочки и остановке """
+
+
+class EnvironLayer(Layer):
+    """ Прежний формат: mw(environ) -> environ с ключами method и path """
+
+    def __init__(self, func):
+        self.func = func
+
+    def rewrite(self, request):
+        environ = self.func({"method": request.method,
+                             "path": request.endpoint})
+        request.method = environ["method"]
+        request.endpoint = environ["path"]
+
+    def wrap(self, call_next):
+        rewrite = self.rewrite
+
+        def layer(request):
+            rewrite(request)
+            return call_next(request)
+
+        return layer
+
+    def wrap_async(self, call_next, max_workers=None):
+        rewrite = self.rewrite
+
+        async def layer(request):
+            rewrite(request)
+            return await call_next(request)
+
+        return layer
+
+
+class HookLayer(Layer):
+    """ before(request) -> None или готовый ответ (дальше не идем);
+    after(request, response) -> ответ. Функции могут быть async """
+
+    def __init__(self, before=None, after=None):
+        self.before = before
+        self.after = after
+
+    def wrap(self, call_next):
+        before = run_sync(self.before) if self.before else None
+        after = run_sync(self.after) if self.after else None
+
+        def layer(request):
+            if before is not None:
+                response = before(request)
+                if response is not None:
+                    return response
+            response = call_next(request)
+            if after is not None:
+                response = after(request, response)
+            return response
+
+        return layer
+
+    def wrap_async(self, call_next, max_workers=None):
+        # Синхронные хуки вызываются прямо в цикле событий - они должны быть быстрыми
+        before = run_async(self.before) if self.before else None
+        after = run_async(self.after) if self.after else None
+
+        async def layer(request):
+            if before is not None:
+                response = await before(request)
+                if response is not None:
+                    return response
+            response = await call_next(request)
+            if after is not None:
+                response = await after(request, response)
+            return response
+
+        return layer
+
+
+class OnionLayer(Layer):
+    """ mw(request, call_next) -> ответ: код до и после call_next,
+    без вызова call_next запрос дальше не идет """
+
+    def __init__(self, func):
+        self.func = func
+        self.is_async = inspect.iscoroutinefunction(func)
+        self.pool = None
+
+    def wrap(self, call_next):
+        func = self.func
+        if not self.is_async:
+            return lambda request: func(request, call_next)
+
+        async def async_next(request):
+            return call_next(request)
+
+        # async-middleware на потоках: свой цикл событий на запрос
+        return lambda request: asyncio.run(func(request, async_next))
+
+    def wrap_async(self, call_next, max_workers=None):
+        func = self.func
+        if self.is_async:
+            return lambda request: func(request, call_next)
+
+        async def layer(request):
+            # sync-middleware в потоке слоя; call_next возвращается в цикл
+            loop = asyncio.get_running_loop()
+
+            def sync_next(inner_request):
+                return asyncio.run_coroutine_threadsafe(
+                    call_next(inner_request), loop).result()
+
+            pool = self.pool or self.start_pool(max_workers)
+            return await loop.run_in_executor(pool, func, request, sync_next)
+
+        return layer
+
+    def start_pool(self, max_workers):
+        # Свой пул у каждого sync-слоя: поток слоя ждет call_next, а
+        # обработчику нужен поток из app.executor. В общем пуле ожидающие
+        # слои заняли бы все потоки, и запрос не завершился бы никогда.
+        # Пул создается при первом запросе: под движком threads его нет
+        self.pool = ThreadPoolExecutor(max_workers=max_workers,
+                                       thread_name_prefix="middleware")
+        return self.pool
+
+    def close(self):
+        pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+def as_layer(middleware):
+    """ Слой по объекту из app.middleware: Layer, mw(environ) или
+    mw(request, call_next) """
+    if isinstance(middleware, Layer):
+        return middleware
+    parameters = inspect.signature(middleware).parameters
+    if len(parameters) == 1:
+        return EnvironLayer(middleware)
+    return OnionLayer(middleware)
+
+
+def compose(middleware, endpoint):
+    """ Одна функция request -> ответ: первый middleware - внешний слой """
+    handler = endpoint
+    for layer in reversed([as_layer(mw) for mw in middleware]):
+        handler = layer.wrap(handler)
+    return handler
+
+
+def compose_async(middleware, endpoint, max_workers=None):
+    handler = endpoint
+    for layer in reversed([as_layer(mw) for mw in middleware]):
+        handler = layer.wrap_async(handler, max_workers)
+    return handler
+
+
+def run_sync(func):
+    if not inspect.iscoroutinefunction(func):
+        return func
+    return lambda *args: asyncio.run(func(*args))
+
+
+def run_async(func):
+    if inspect.iscoroutinefunction(func):
+        return func
+
+    async def call(*args):
+        return func(*args)
+
+    return call
@@ -0,0 +1,163 @@
+import os
+import signal
+import time
+
+# Рабочий, упавший быстрее этого срока после запуска, перезапускается с
+# такой же задержкой - чтобы не перезапускать в цикле падающий процесс
+RESTART_DELAY = 1.0
+
+
+class PreforkServer:
+    """ Мастер-процесс: N рабочих процессов на одном порту.
+
+    Рабочие наследуют общий слушающий сокет или (reuse_port=True) каждый
+    открывает свой с SO_REUSEPORT, и ядро само распределяет соединения.
+    Мастер перезапускает упавших рабочих, по SIGTERM/SIGINT завершает всех,
+    по SIGHUP по очереди заменяет рабочих новыми (rolling reload).
+    """
+
+    def __init__(self, app, host, port, workers, engine="threads",
+                 reuse_port=False, shutdown_timeout=10.0):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Pre-fork mode requires os.fork (POSIX)")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.worker_count = workers
+        self.engine = engine
+        self.reuse_port = reuse_port
+        # Рабочий дорабатывает запросы app.shutdown_timeout, мастер ждет чуть дольше
+        self.shutdown_timeout = max(shutdown_timeout,
+                                    app.shutdown_timeout + 1.0)
+        self.server_socket = None
+        self.workers = {}  # pid -> время запуска
+        self.restarts = []  # Когда запускать замену упавшим рабочим
+        self.stopping = False
+        self.reload_requested = False
+
+    def run(self):
+        if not self.reuse_port:
+            self.server_socket = self.app.create_server_socket(self.host,
+                                                               self.port)
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+
+        print(f"Server started at http://{self.host}:{self.port} "
+              f"({self.worker_count} workers)")
+        for _ in range(self.worker_count):
+            self.spawn_worker()
+
+        try:
+            while not self.stopping:
+                if self.reload_requested:
+                    self.reload_requested = False
+                    self.rolling_reload()
+                self.reap_workers()
+                self.spawn_due()
+                time.sleep(0.1)
+        finally:
+            self.stop_workers()
+            if self.server_socket is not None:
+                self.server_socket.close()
+
+    def handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def handle_reload(self, signum, frame):
+        self.reload_requested = True
+
+    def spawn_worker(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return pid
+
+        # Рабочий процесс: SIGTERM - плавная остановка с дообработкой
+        # запросов, остальными сигналами управляет мастер
+        signal.signal(signal.SIGTERM,
+                      lambda signum, frame: self.app.request_stop())
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            server_socket = self.server_socket
+            if server_socket is None:
+                server_socket = self.app.create_server_socket(
+                    self.host, self.port, reuse_port=True)
+            self.app.serve(server_socket, self.engine)
+        except BaseException:
+            self.app.logger.exception("Worker process failed")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def reap_workers(self):
+        """ Забирает завершившихся рабочих и запускает замену """
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            self.app.logger.warning(
+                f"Worker {pid} exited with status {status}, restarting")
+            now = time.monotonic()
+            # Замену запускает основной цикл: ожидание здесь задержало бы
+            # сигналы и остальных упавших рабочих
+            delay = RESTART_DELAY if now - started < RESTART_DELAY else 0.0
+            self.restarts.append(now + delay)
+
+    def spawn_due(self):
+        """ Запускает замены, срок которых наступил """
+        now = time.monotonic()
+        due = [when for when in self.restarts if when <= now]
+        if not due:
+            return
+        self.restarts = [when for when in self.restarts if when > now]
+        for _ in due:
+            self.spawn_worker()
+
+    def rolling_reload(self):
+        """ Заменяет рабочих по одному; сокет не закрывается ни на миг.
+
+        Мастер сначала сам перечитывает модули маршрутов - новые рабочие
+        получают свежий код через fork.
+        """
+        self.app.reload()
+        for old_pid in list(self.workers):
+            self.spawn_worker()
+            self.terminate(old_pid)
+        self.app.logger.info("Rolling reload finished")
+
+    def terminate(self, pid):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        deadline = time.monotonic() + self.shutdown_timeout
+        while time.monotonic() < deadline:
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if done:
+                break
+            time.sleep(0.05)
+        else:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.pop(pid, None)
+
+    def stop_workers(self):
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.workers.pop(pid, None)
+        for pid in list(self.workers):
+            self.terminate(pid)
@@ -0,0 +1,413 @@
+import collections
+import itertools
+import os
+import selectors
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from request_ import HTTPParseError
+from response import FileResponse, Response, StreamingResponse
+
+EVENT_READ = selectors.EVENT_READ
+EVENT_WRITE = selectors.EVENT_WRITE
+ACCEPT_BATCH = 64  # Соединений за одно событие слушающего сокета
+MAX_IOVEC = 512  # Буферов в одном sendmsg
+FILE_BLOCK_SIZE = 64 * 1024  # Чтение файла, если нет os.sendfile
+
+
+class Connection:
+    """ Состояние соединения в реакторе """
+    __slots__ = ("sock", "parser", "served", "last_active", "busy", "events",
+                 "output", "file", "keep_alive", "parse_time", "result",
+                 "pending", "phase", "deadline")
+
+    def __init__(self, sock, parser):
+        self.sock = sock
+        self.parser = parser
+        self.served = 0
+        self.last_active = time.monotonic()
+        self.busy = False  # Запрос у рабочего потока
+        self.events = 0  # На что соединение подписано в селекторе
+        self.output = collections.deque()  # memoryview и FileResponse
+        self.file = None  # [файл, смещение, остаток] отдаваемого тела
+        self.keep_alive = False
+        self.parse_time = 0.0
+        self.result = None  # Итог рабочего потока для реактора
+        self.pending = None  # (request, response, start, send_start)
+        self.phase = None  # Часть начатого запроса: заголовки или тело
+        self.deadline = None  # Срок этой части (header/body_timeout)
+
+
+class Reactor:
+    """ Движок engine="reactor": один поток на selectors (epoll/kqueue).
+
+    Реактор принимает соединения, читает и разбирает запросы без
+    блокировок; в пул потоков уходит только запрос, пришедший целиком, и
+    рабочий поток лишь вызывает dispatch. Готовый ответ реактор пишет сам
+    (sendmsg, os.sendfile для файлов), поэтому медленный клиент занимает
+    соединение, а не рабочий поток. Исключение - StreamingResponse: его
+    тело порождает код приложения, и отдает его рабочий поток.
+    """
+
+    def __init__(self, app, server_socket):
+        self.app = app
+        self.server_socket = server_socket
+        self.selector = selectors.DefaultSelector()
+        self.connections = set()
+        self.completed = collections.deque()  # Соединения с готовым ответом
+        self.wake_reader, self.wake_writer = socket.socketpair()
+        self.wake_pending = False  # Байт пробуждения уже отправлен
+        self.in_flight = 0  # Запросы в пуле: в работе и в очереди
+        self.max_in_flight = app.max_threads + app.task_queue.maxsize
+
+    def run(self):
+        app = self.app
+        if app.executor is None:
+            app.executor = ThreadPoolExecutor(max_workers=app.max_threads)
+        self.server_socket.setblocking(False)
+        self.wake_reader.setblocking(False)
+        self.wake_writer.setblocking(False)
+        self.selector.register(self.server_socket, EVENT_READ, self.accept)
+        self.selector.register(self.wake_reader, EVENT_READ, self.on_wake)
+        try:
+            next_sweep = time.monotonic() + app.poll_interval
+            while not app.stopping.is_set():
+                app.check_reload()
+                self.poll(app.poll_interval)
+                now = time.monotonic()
+                if now >= next_sweep:
+                    self.close_expired(now)
+                    next_sweep = now + app.poll_interval
+            self.drain()
+        finally:
+            for conn in list(self.connections):
+                self.close(conn)
+            self.selector.close()
+            self.wake_reader.close()
+            self.wake_writer.close()
+            self.server_socket.close()
+
+    def poll(self, timeout):
+        for key, events in self.selector.select(timeout):
+            if isinstance(key.data, Connection):
+                if events & EVENT_WRITE:
+                    self.flush(key.data)
+                else:
+                    self.read(key.data)
+            else:
+                key.data()
+
+    def drain(self):
+        """ Остановка: новых соединений нет, простаивающие закрываются,
+        начатые запросы дорабатывают до shutdown_timeout """
+        app = self.app
+        self.selector.unregister(self.server_socket)
+        self.server_socket.close()
+        deadline = time.monotonic() + app.shutdown_timeout
+        while True:
+            # Сначала чтение: запрос, уже отправленный в новое соединение,
+            # обслуживается, а не обрывается закрытием
+            self.poll(0.05)
+            for conn in list(self.connections):
+                if not conn.busy and not conn.output and conn.parser.idle:
+                    self.close(conn)
+            if not self.connections:
+                return
+            if time.monotonic() >= deadline:
+                app.logger.warning(f"Shutdown timeout: {len(self.connections)}"
+                                   f" connection(s) still in progress")
+                return
+
+    def close_expired(self, now):
+        """ 408 запросам, не пришедшим за header/body_timeout; закрывает
+        соединения без чтения и записи дольше keep_alive_timeout:
+        простаивающие, с недосланным запросом и не читающие ответ """
+        app = self.app
+        limit = now - app.keep_alive_timeout
+        for conn in list(self.connections):
+            if conn.busy:
+                continue
+            if conn.deadline is not None and conn.deadline <= now:
+                conn.phase = conn.deadline = None
+                app.logger.error("Invalid HTTP request: Request read timeout")
+                self.send(conn, [app.parse_error_response(
+                    app.request_timeout())], False)
+            elif conn.last_active < limit:
+                self.close(conn)
+
+    def accept(self):
+        app = self.app
+        for _ in range(ACCEPT_BATCH):
+            try:
+                sock, address = self.server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                app.logger.exception("Error accepting client connection")
+                return
+            app.access_log.log("New connection from %s", address)
+            if not app.admit(sock, address):
+                app.reject_connection(sock, app.too_many_connections_response,
+                                      "per_ip")
+                continue
+            sock.setblocking(False)
+            conn = Connection(sock, app.create_parser())
+            self.connections.add(conn)
+            self.set_events(conn, EVENT_READ)
+
+    def set_events(self, conn, events):
+        if events == conn.events:
+            return
+        if not events:
+            self.selector.unregister(conn.sock)
+        elif not conn.events:
+            self.selector.register(conn.sock, events, conn)
+        else:
+            self.selector.modify(conn.sock, events, conn)
+        conn.events = events
+
+    def close(self, conn):
+        self.set_events(conn, 0)
+        self.connections.discard(conn)
+        if conn.file is not None:
+            conn.file[0].close()
+            conn.file = None
+        conn.output.clear()
+        conn.parser.close()
+        self.app.release(conn.sock)
+        conn.sock.close()
+
+    def read(self, conn):
+        if conn.busy:
+            # Конвейерный запрос при занятом соединении: ждет в сокете,
+            # чтение возобновит finish()
+            self.set_events(conn, 0)
+            return
+        parser = conn.parser
+        try:
+            size = conn.sock.recv_into(parser.writable())
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self.close(conn)
+            return
+        if not size:
+            self.close(conn)  # Клиент закрыл соединение
+            return
+        conn.last_active = time.monotonic()
+        parser.commit(size)
+        self.next_request(conn)
+
+    def next_request(self, conn):
+        """ Отдает пулу запрос, если он пришел целиком """
+        app = self.app
+        start = time.perf_counter()
+        try:
+            request = conn.parser.next_request()
+        except HTTPParseError as e:
+            app.logger.error(f"Invalid HTTP request: {e}")
+            self.send(conn, [app.parse_error_response(e)], False)
+            return
+        conn.parse_time += time.perf_counter() - start
+        if request is None:
+            if not conn.parser.idle:
+                conn.phase, conn.deadline = app.request_deadline(
+                    conn.parser, conn.phase, conn.deadline)
+            return
+        conn.phase = conn.deadline = None
+        if app.metrics is not None:
+            request.timings = {"parse": conn.parse_time}
+        conn.parse_time = 0.0
+        if self.in_flight >= self.max_in_flight:
+            app.record_rejected("overloaded")
+            self.send(conn, [app.overloaded_response], False)
+            return
+        # Подписка на чтение остается: снимать и возвращать ее на каждый
+        # запрос - два лишних системных вызова
+        conn.busy = True
+        conn.served += 1
+        self.in_flight += 1
+        app.executor.submit(self.handle, conn, request)
+
+    def handle(self, conn, request):
+        """ Рабочий поток: обработчик и сериализация ответа """
+        app = self.app
+        if app.metrics is not None:
+            app.metrics.set_busy(True)
+        response = start = send_start = None
+        try:
+            start = time.perf_counter()
+            response = app.dispatch(request)
+            keep_alive = app.should_keep_alive(request, conn.served)
+            send_start = time.perf_counter()
+            if isinstance(response, StreamingResponse):
+                conn.sock.settimeout(app.keep_alive_timeout)
+                keep_alive = app.send_response(conn.sock, response, request,
+                                               keep_alive)
+                output = []
+            else:
+                output = self.serialize(response, request, keep_alive)
+        except ConnectionError:
+            output, keep_alive = None, False  # Клиент ушел или поток оборван
+        except Exception as e:
+            app.logger.exception("Error handling client request")
+            output = [app.handle_error(e).encode('utf-8')]
+            keep_alive = False
+            response = None
+        finally:
+            if app.metrics is not None:
+                app.metrics.set_busy(False)
+        conn.result = (output, keep_alive, (request, response, start,
+                                            send_start))
+        self.completed.append(conn)
+        self.wake()
+
+    def serialize(self, response, request, keep_alive):
+        """ Ответ -> список буферов для реактора (как send_response) """
+        app = self.app
+        if isinstance(response, FileResponse):
+            head = response.header_bytes(response.length)
+            return [app.apply_connection_header(head, request, keep_alive),
+                    response]
+        if isinstance(response, Response):
+            start = time.perf_counter()
+            buffers = response.buffers(app.connection_line(request,
+                                                           keep_alive))
+            if request.timings is not None:
+                request.timings["serialize"] = time.perf_counter() - start
+            return buffers
+        if isinstance(response, str):
+            response = response.encode('utf-8')
+        return [app.apply_connection_header(response, request, keep_alive)]
+
+    def wake(self):
+        if self.wake_pending:
+            return  # Реактор еще не разобрал completed - увидит и этот
+        self.wake_pending = True
+        try:
+            self.wake_writer.send(b"\0")
+        except OSError:
+            pass  # Реактор уже закрыт
+
+    def on_wake(self):
+        try:
+            while self.wake_reader.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        self.wake_pending = False
+        while self.completed:
+            conn = self.completed.popleft()
+            self.in_flight -= 1
+            conn.busy = False
+            output, keep_alive, conn.pending = conn.result
+            conn.result = None
+            if conn not in self.connections:
+                continue  # Закрыто по сроку остановки
+            if output is None:
+                self.close(conn)
+                continue
+            if conn.sock.gettimeout() != 0.0:
+                conn.sock.setblocking(False)  # После StreamingResponse
+            self.send(conn, output, keep_alive)
+
+    def send(self, conn, output, keep_alive):
+        for item in output:
+            if isinstance(item, FileResponse):
+                if item.length:
+                    conn.output.append(item)
+            elif len(item):
+                conn.output.append(memoryview(item))
+        conn.keep_alive = keep_alive
+        self.flush(conn)
+
+    def flush(self, conn):
+        """ Пишет сколько примет сокет; остальное - по EVENT_WRITE """
+        try:
+            done = self.write(conn)
+        except OSError:
+            self.close(conn)
+            return
+        if not done:
+            self.set_events(conn, EVENT_WRITE)
+            return
+        self.finish(conn)
+
+    def write(self, conn):
+        output = conn.output
+        sock = conn.sock
+        while output:
+            if isinstance(output[0], FileResponse):
+                if not self.write_file(conn, output[0]):
+                    return False
+                output.popleft()
+                continue
+            buffers = list(itertools.islice(
+                itertools.takewhile(
+                    lambda item: not isinstance(item, FileResponse), output),
+                MAX_IOVEC))
+            try:
+                if hasattr(sock, "sendmsg"):
+                    sent = sock.sendmsg(buffers)
+                else:
+                    sent = sock.send(buffers[0])  # Windows: sendmsg нет
+            except (BlockingIOError, InterruptedError):
+                return False
+            conn.last_active = time.monotonic()
+            # Частичная отправка: отбрасываем ушедшие буферы и хвост первого
+            while sent:
+                first = len(output[0])
+                if sent >= first:
+                    sent -= first
+                    output.popleft()
+                else:
+                    output[0] = output[0][sent:]
+                    sent = 0
+        return True
+
+    def write_file(self, conn, response):
+        """ Тело файла кусками без блокировки; True, когда отправлено """
+        if conn.file is None:
+            conn.file = [open(response.path, "rb"), response.offset,
+                         response.length]
+        f, offset, remaining = conn.file
+        sock = conn.sock
+        while remaining:
+            try:
+                if hasattr(os, "sendfile"):
+                    sent = os.sendfile(sock.fileno(), f.fileno(), offset,
+                                       remaining)
+                else:
+                    f.seek(offset)
+                    sent = sock.send(f.read(min(remaining, FILE_BLOCK_SIZE)))
+            except (BlockingIOError, InterruptedError):
+                conn.file[1:] = offset, remaining
+                return False
+            if not sent:
+                raise ConnectionAbortedError("File is shorter than expected")
+            conn.last_active = time.monotonic()
+            offset += sent
+            remaining -= sent
+        f.close()
+        conn.file = None
+        return True
+
+    def finish(self, conn):
+        """ Ответ отправлен: метрики, затем закрытие или следующий запрос """
+        pending, conn.pending = conn.pending, None
+        if pending is not None:
+            request, response, start, send_start = pending
+            if request.timings is not None and response is not None:
+                self.app.finish_timings(request, response, start, send_start)
+        if not conn.keep_alive:
+            self.close(conn)
+            return
+        conn.last_active = time.monotonic()
+        self.set_events(conn, EVENT_READ)
+        if not conn.parser.idle:
+            self.next_request(conn)  # Конвейерный запрос уже в буфере
+
+
+def serve_reactor(app, server_socket):
+    Reactor(app, server_socket).run()
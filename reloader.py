@@ -0,0 +1,80 @@
+import importlib
+import os
+import sys
+import threading
+
+
+def route_modules(app):
+    """ Модули с обработчиками маршрутов, которые можно перечитать.
+
+    Модуль, создавший приложение, и __main__ пропускаются: повторный импорт
+    создал бы новый SimpleFramework, а не обновил маршруты этого.
+    """
+    skip = {"__main__", type(app).__module__, app.owner_module}
+    modules = {}
+    for func in app.router.routes.values():
+        name = getattr(func, "__module__", None)
+        if name is None or name in skip:
+            continue
+        module = sys.modules.get(name)
+        if module is not None and getattr(module, "__file__", None):
+            modules[name] = module
+    return modules
+
+
+def reload_modules(modules):
+    importlib.invalidate_caches()
+    for module in modules:
+        importlib.reload(module)
+
+
+class FileWatcher:
+    """ Фоновый опрос mtime файлов; callback() при изменении любого из них.
+
+    Опрос, а не inotify: без зависимостей и одинаково на всех ОС, а для
+    режима разработки раз в секунду достаточно.
+    """
+
+    def __init__(self, paths, callback, interval=1.0):
+        self.paths = paths  # Функция -> файлы и папки для слежения
+        self.callback = callback
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def snapshot(self):
+        mtimes = {}
+        for path in self.paths():
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    for name in files:
+                        self.stat(os.path.join(root, name), mtimes)
+            else:
+                self.stat(path, mtimes)
+        return mtimes
+
+    @staticmethod
+    def stat(path, mtimes):
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            pass  # Файл удален между обходом и stat
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="file-watcher",
+                                       daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        previous = self.snapshot()
+        while not self.stop_event.wait(self.interval):
+            current = self.snapshot()
+            if current != previous:
+                previous = current
+                self.callback()
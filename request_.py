@@ -1,31 +1,133 @@
+import json
+import re
+from collections.abc import MutableMapping
+from urllib.parse import parse_qsl
+
+
+_MISSING = object()  # json еще не разобран (None - допустимое значение)
+
+
+class HTTPParseError(ValueError):
+    """ Некорректный, слишком большой или слишком медленный запрос;
+    status уходит клиенту """
+
+    def __init__(self, message, status="400 Bad Request"):
+        super().__init__(message)
+        self.status = status
+
+
 class Request:
-    def __init__(self, raw_request):
+    """ HTTP-запрос.
+
+    Парсер заполняет только строку запроса, Headers (байты заголовков) и
+    тело; path, query_params, cookies, text, json и form считаются при первом
+    обращении и запоминаются в слотах.
+    """
+    __slots__ = ("method", "endpoint", "protocol", "headers", "body",
+                 "timings", "route_name", "session", "_query", "_cookies",
+                 "_text", "_json", "_form")
+
+    def __init__(self, raw_request=None):
         self.method = None
-        self.endpoint = None
+        self.endpoint = None  # Цель запроса как пришла: путь и ?query
         self.protocol = None
-        self.headers = {}
-        self.body = None
-        self.parse_http_request(raw_request)
+        self.headers = Headers()
+        self.body = b""
+        self.timings = None  # Длительности этапов, если включены метрики
+        self.route_name = None
+        self.session = None  # Session, если включены сессии
+        self._query = None  # (endpoint, словарь), сбрасывается при смене пути
+        self._cookies = None
+        self._text = None
+        self._json = _MISSING
+        self._form = None
+        if raw_request is not None:
+            self.parse_http_request(raw_request)
 
     def parse_http_request(self, request):
-        split_request = request.split("\r\n")
-        self.method, self.endpoint, self.protocol = split_request[0].split()
-
-        headers = []
-        for line in split_request[1:]:
-            if line == "":
-                break
-            headers.append(line)
-
-        for header in headers:
-            key, value = header.split(": ", 1)
-            self.headers[key] = value
-
-        body_index = split_request.index("") + 1
-        if body_index < len(split_request):
-            self.body = "\r\n".join(split_request[body_index:])
-        else:
-            self.body = None
+        """ Разбор запроса целиком (str или bytes) """
+        if isinstance(request, str):
+            request = request.encode("utf-8")
+        parser = RequestParser(max_header_bytes=None, max_body_bytes=None,
+                               buffer_size=max(len(request), 64))
+        parser.feed(request)
+        parsed = parser.next_request()
+        if parsed is None:
+            raise HTTPParseError("Incomplete HTTP request")
+        self.method = parsed.method
+        self.endpoint = parsed.endpoint
+        self.protocol = parsed.protocol
+        self.headers = parsed.headers
+        self.body = parsed.body
+
+    def get_header(self, name, default=None):
+        """ Заголовок без учета регистра имени """
+        return self.headers.get(name, default)
+
+    @property
+    def path(self):
+        """ Путь без query string - по нему ищется маршрут """
+        endpoint = self.endpoint
+        end = endpoint.find("?")
+        return endpoint if end < 0 else endpoint[:end]
+
+    @property
+    def query_string(self):
+        return self.endpoint.partition("?")[2]
+
+    @property
+    def query_params(self):
+        """ Параметры query string как словарь (последнее значение имени) """
+        endpoint = self.endpoint
+        cached = self._query
+        if cached is None or cached[0] is not endpoint:
+            # middleware может переписать endpoint - разбираем заново
+            cached = self._query = (endpoint, dict(parse_qsl(
+                endpoint.partition("?")[2], keep_blank_values=True)))
+        return cached[1]
+
+    @property
+    def cookies(self):
+        """ Cookie запроса как словарь """
+        if self._cookies is None:
+            cookies = {}
+            for item in self.get_header("Cookie", "").split(";"):
+                name, sep, value = item.partition("=")
+                name = name.strip()
+                if sep and name:
+                    value = value.strip()
+                    if len(value) > 1 and value[0] == value[-1] == '"':
+                        value = value[1:-1]
+                    cookies.setdefault(name, value)
+            self._cookies = cookies
+        return self._cookies
+
+    @property
+    def text(self):
+        """ Тело запроса как строка (кодировка из Content-Type) """
+        if self._text is None:
+            charset = "utf-8"
+            content_type = self.get_header("Content-Type", "")
+            for param in content_type.split(";")[1:]:
+                key, _, value = param.strip().partition("=")
+                if key.lower() == "charset" and value:
+                    charset = value.strip('"')
+            self._text = self.body.decode(charset, errors="replace")
+        return self._text
+
+    @property
+    def json(self):
+        """ Тело запроса как JSON (None, если тело пустое) """
+        if self._json is _MISSING:
+            self._json = json.loads(self.body) if self.body else None
+        return self._json
+
+    @property
+    def form(self):
+        """ Тело application/x-www-form-urlencoded как словарь """
+        if self._form is None:
+            self._form = dict(parse_qsl(self.text, keep_blank_values=True))
+        return self._form
 
     def __repr__(self):
         return (
@@ -35,3 +137,396 @@ class Request:
             f"Headers: {self.headers}\n"
             f"Body: {self.body}"
         )
+
+
+# Строки заголовков "имя:значение\r\n"; имя без пробелов (RFC 9112, 5.1)
+# Классы символов не пересекаются с разделителями - возвратов нет и без
+# possessive-квантификаторов (они есть только с Python 3.11)
+HEADER_LINES = re.compile(rb"(?:[^\s:]+:[^\r\n]*\r\n)*")
+
+CHUNK_SIZE = re.compile(rb"[0-9A-Fa-f]+")
+
+# Заголовки, от которых зависит тело (поиск в заголовках нижнего регистра)
+BODY_HEADERS = re.compile(rb"\r\n(?:content-length|transfer-encoding):")
+
+# Уже проверенные блоки заголовков, общие для всех соединений: клиенты
+# одного вида шлют одни и те же заголовки, а fullmatch - самая дорогая
+# часть разбора. Хранятся только короткие блоки; при переполнении
+# множество очищается целиком
+VALID_BLOCKS = set()
+VALID_BLOCKS_MAX = 1024
+VALID_BLOCK_MAX_SIZE = 2048
+
+DEFAULT_BUFFER_SIZE = 16 * 1024
+
+# Имя заголовка -> b"\r\nимя:" для поиска в байтах (имен немного)
+SEARCH_KEYS = {}
+
+
+class Headers(MutableMapping):
+    """ Заголовки без учета регистра имени.
+
+    Хранят байты блока заголовков. get() ищет одно имя прямо в байтах и
+    декодирует только его значение; словарь строится лишь при переборе
+    или изменении.
+    """
+    __slots__ = ("_raw", "_lower", "_items")
+
+    def __init__(self, raw=b"", lower=None):
+        self._raw = raw
+        self._lower = lower  # b"\r\n" + raw в нижнем регистре, для поиска
+        self._items = None  # имя в нижнем регистре -> (имя, значение)
+
+    def _parsed(self):
+        items = self._items
+        if items is None:
+            items = self._items = {}
+            for line in self._raw.decode("latin-1").split("\r\n"):
+                if not line:
+                    continue
+                name, _, value = line.partition(":")
+                key = name.lower()
+                value = value.strip()
+                if key in items:
+                    name, previous = items[key]
+                    value = f"{previous}, {value}"
+                items[key] = (name, value)
+            self._raw = self._lower = None
+        return items
+
+    def get(self, name, default=None):
+        if self._items is not None:
+            item = self._items.get(name.lower())
+            return default if item is None else item[1]
+        raw = self._raw
+        lower = self._lower
+        if lower is None:
+            lower = self._lower = b"\r\n" + raw.lower()
+        key = SEARCH_KEYS.get(name)
+        if key is None:
+            key = SEARCH_KEYS[name] = b"\r\n" + name.lower().encode(
+                "latin-1") + b":"
+        found = lower.find(key)
+        if found < 0:
+            return default
+        value = None
+        while found >= 0:
+            # Смещения в lower на 2 больше, чем в raw
+            start = found + len(key) - 2
+            end = raw.find(b"\r\n", start)
+            if end < 0:
+                end = len(raw)
+            item = raw[start:end].strip().decode("latin-1")
+            value = item if value is None else f"{value}, {item}"
+            found = lower.find(key, end + 2)
+        return value
+
+    def __getitem__(self, name):
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __setitem__(self, name, value):
+        self._parsed()[name.lower()] = (name, value)
+
+    def __delitem__(self, name):
+        del self._parsed()[name.lower()]
+
+    def __contains__(self, name):
+        return isinstance(name, str) and self.get(name) is not None
+
+    def __iter__(self):
+        return (name for name, _ in self._parsed().values())
+
+    def __len__(self):
+        return len(self._parsed())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class BufferPool:
+    """ Пул приемных буферов одного размера, общий для рабочих потоков.
+
+    list.pop/append атомарны под GIL, поэтому блокировка не нужна.
+    """
+
+    def __init__(self, size=DEFAULT_BUFFER_SIZE, max_buffers=256):
+        self.size = size
+        self.max_buffers = max_buffers
+        self.free = []
+
+    def acquire(self):
+        try:
+            return self.free.pop()
+        except IndexError:
+            return bytearray(self.size)
+
+    def release(self, buffer):
+        # Выросшие буферы в пул не возвращаем
+        if len(buffer) == self.size and len(self.free) < self.max_buffers:
+            self.free.append(buffer)
+
+
+class RequestParser:
+    """ Инкрементальный разбор HTTP-запросов из потока байтов.
+
+    Данные лежат в заранее выделенном bytearray (из BufferPool) между
+    смещениями start и end. Сокет пишет прямо в него: recv_into(writable()),
+    затем commit(n); feed(data) копирует готовые байты. Готовые запросы
+    забираются через next_request(). Остаток буфера относится к следующему
+    (конвейерному) запросу того же соединения.
+    """
+
+    def __init__(self, max_header_bytes=65536, max_body_bytes=10 * 1024 * 1024,
+                 pool=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.max_header_bytes = max_header_bytes
+        self.max_body_bytes = max_body_bytes
+        self.pool = pool
+        self.buffer = pool.acquire() if pool is not None else bytearray(
+            buffer_size)
+        self.view = memoryview(self.buffer)
+        self.start = 0  # Начало необработанных данных
+        self.end = 0  # Конец полученных данных
+        self._scanned = 0  # До какого смещения искали конец заголовков
+        self._request = None  # Запрос, у которого еще не дочитано тело
+        self._length = None  # Ожидаемая длина тела (Content-Length)
+        self._body = None  # Большое тело: читается прямо в свой bytearray
+        self._body_filled = 0
+        self._chunks = None  # Уже декодированные чанки (chunked)
+
+    @property
+    def idle(self):
+        """ Нет ни байта следующего запроса - соединение простаивает """
+        return self.start == self.end and self._request is None
+
+    @property
+    def receiving_body(self):
+        """ Заголовки разобраны, тело еще не пришло целиком """
+        return self._request is not None
+
+    def writable(self):
+        """ memoryview свободного места для recv_into """
+        if self._body is not None:
+            if self._body_filled == len(self._body):
+                self._grow_body()
+            return memoryview(self._body)[self._body_filled:]
+        if self.start == self.end:
+            self.start = self.end = self._scanned = 0
+        elif len(self.buffer) - self.end < 4096 and self.start:
+            self._compact()
+        if self.end == len(self.buffer):
+            self._grow()
+        return self.view[self.end:]
+
+    def commit(self, size):
+        """ Учитывает size байт, записанных в writable() """
+        if self._body is not None:
+            self._body_filled += size
+        else:
+            self.end += size
+
+    def feed(self, data):
+        end = self.end + len(data)
+        if self._body is None and end <= len(self.buffer):
+            # Обычный случай: данные помещаются в буфер целиком
+            self.buffer[self.end:end] = data
+            self.end = end
+            return
+        data = memoryview(data)
+        while data:
+            target = self.writable()
+            size = min(len(target), len(data))
+            target[:size] = data[:size]
+            self.commit(size)
+            data = data[size:]
+
+    def close(self):
+        """ Возвращает буфер в пул (в конце соединения) """
+        self.view.release()
+        if self.pool is not None:
+            self.pool.release(self.buffer)
+        self.buffer = None
+
+    def _compact(self):
+        # Сдвигаем необработанный хвост в начало буфера
+        size = self.end - self.start
+        self.buffer[:size] = self.buffer[self.start:self.end]
+        self._scanned -= self.start
+        self.start = 0
+        self.end = size
+
+    def _grow(self):
+        # Запрос (заголовки или чанк) не помещается - буфер вдвое больше
+        buffer = bytearray(len(self.buffer) * 2)
+        buffer[:self.end - self.start] = self.view[self.start:self.end]
+        self.view.release()
+        if self.pool is not None:
+            self.pool.release(self.buffer)
+        self._scanned -= self.start
+        self.end -= self.start
+        self.start = 0
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+
+    def _grow_body(self):
+        # Тело растет вдвое по мере прихода, но не больше Content-Length:
+        # объявленная длина без данных не занимает память
+        body = bytearray(min(self._length, len(self._body) * 2))
+        body[:self._body_filled] = self._body
+        self._body = body
+
+    def next_request(self):
+        """ Возвращает очередной полный запрос или None, если байт мало """
+        if self._request is None and not self._parse_head():
+            return None
+
+        if self._chunks is not None:
+            if not self._parse_chunks():
+                return None
+            body = bytes(self._chunks)
+        elif self._body is not None:
+            if self._body_filled < self._length:
+                return None
+            body = bytes(self._body)
+            self._body = None
+        elif self._length:
+            if self.end - self.start < self._length:
+                return None
+            body = bytes(self.view[self.start:self.start + self._length])
+            self.start += self._length
+        else:
+            body = b""
+
+        request = self._request
+        request.body = body
+        self._request = None
+        self._length = None
+        self._chunks = None
+        return request
+
+    def _parse_head(self):
+        buffer = self.buffer
+        start = self.start
+        data_end = self.end
+        # Пустые строки перед строкой запроса допускаются (RFC 9112, 2.2)
+        while (data_end - start >= 2 and buffer[start] == 13
+               and buffer[start + 1] == 10):
+            start += 2
+        self.start = start
+
+        search_from = self._scanned - 3
+        if search_from < start:
+            search_from = start
+        end = buffer.find(b"\r\n\r\n", search_from, data_end)
+        limit = self.max_header_bytes
+        if end < 0:
+            self._scanned = data_end
+            if limit is not None and data_end - start > limit:
+                raise HTTPParseError(
+                    "Request headers too large",
+                    "431 Request Header Fields Too Large")
+            return False
+        if limit is not None and end - start > limit:
+            raise HTTPParseError("Request headers too large",
+                                 "431 Request Header Fields Too Large")
+
+        # Единственная копия заголовков из общего буфера (с последним \r\n)
+        head = bytes(self.view[start:end + 2])
+        self.start = self._scanned = end + 4
+
+        line_end = head.find(b"\r\n")
+        parts = head[:line_end].decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise HTTPParseError("Invalid request line")
+        header_block = head[line_end + 2:]
+        if header_block not in VALID_BLOCKS:
+            if HEADER_LINES.fullmatch(header_block) is None:
+                raise HTTPParseError("Invalid header line")
+            if len(header_block) <= VALID_BLOCK_MAX_SIZE:
+                if len(VALID_BLOCKS) >= VALID_BLOCKS_MAX:
+                    VALID_BLOCKS.clear()
+                VALID_BLOCKS.add(header_block)
+
+        request = Request()
+        request.method, request.endpoint, request.protocol = parts
+        lowered = head.lower()
+        headers = request.headers = Headers(header_block, lowered[line_end:])
+
+        # Заголовки тела ищем прямо в байтах, остальные не декодируются;
+        # у GET их обычно нет - хватает одного прохода по заголовкам
+        if BODY_HEADERS.search(lowered) is None:
+            self._length = 0
+        else:
+            transfer_encoding = None
+            if b"\r\ntransfer-encoding:" in lowered:
+                transfer_encoding = headers.get("Transfer-Encoding")
+            self._start_body(headers.get("Content-Length"), transfer_encoding)
+        self._request = request
+        return True
+
+    def _start_body(self, content_length, transfer_encoding):
+        if transfer_encoding is not None:
+            if transfer_encoding.lower().rsplit(",", 1)[-1].strip() != "chunked":
+                raise HTTPParseError("Unsupported Transfer-Encoding")
+            self._chunks = bytearray()
+            return
+
+        if content_length is None:
+            self._length = 0
+            return
+        # isdigit() без isascii() пропустил бы "²" - int() упал бы с 500
+        if not (content_length.isascii() and content_length.isdigit()):
+            raise HTTPParseError("Invalid Content-Length")
+        self._length = int(content_length)
+        self._check_body_size(self._length)
+        if self._length > len(self.buffer):
+            # Тело больше буфера: отдельный bytearray, recv_into пишет в него
+            self._body = bytearray(min(self._length, 2 * len(self.buffer)))
+            available = min(self.end - self.start, self._length)
+            self._body[:available] = self.view[self.start:self.start
+                                               + available]
+            self._body_filled = available
+            self.start += available
+
+    def _check_body_size(self, size):
+        if self.max_body_bytes is not None and size > self.max_body_bytes:
+            raise HTTPParseError("Request body too large",
+                                 "413 Payload Too Large")
+
+    def _parse_chunks(self):
+        """ Декодирует доступные чанки; True, когда тело закончилось """
+        buffer = self.buffer
+        while True:
+            line_end = buffer.find(b"\r\n", self.start, self.end)
+            if line_end < 0:
+                if self.end - self.start > 1024:
+                    raise HTTPParseError("Invalid chunk size line")
+                return False
+            # Перед ";" допустимы пробелы (BWS), а int() принял бы и "-2",
+            # "0x10" и "1_0" - поэтому сначала проверяем сами цифры
+            size_field = bytes(self.view[self.start:line_end]).split(
+                b";", 1)[0].rstrip(b" \t")
+            if CHUNK_SIZE.fullmatch(size_field) is None:
+                raise HTTPParseError("Invalid chunk size")
+            size = int(size_field, 16)
+
+            if size == 0:
+                # Последний чанк: пропускаем trailer-поля до пустой строки
+                trailer_end = buffer.find(b"\r\n\r\n", line_end, self.end)
+                if trailer_end < 0:
+                    return False
+                self.start = trailer_end + 4
+                return True
+
+            data_start = line_end + 2
+            data_end = data_start + size
+            if self.end < data_end + 2:
+                self._check_body_size(len(self._chunks) + size)
+                return False
+            if self.view[data_end:data_end + 2] != b"\r\n":
+                raise HTTPParseError("Invalid chunk terminator")
+            self._chunks += self.view[data_start:data_end]
+            self._check_body_size(len(self._chunks))
+            self.start = data_end + 2
@@ -1,35 +1,328 @@
+import asyncio
 import json
+import os
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@lru_cache(maxsize=256)
+def status_line(status):
+    """ Закодированная строка статуса (кэшируется) """
+    return f"HTTP/1.1 {status}\r\n".encode("latin-1")
+
+
+@lru_cache(maxsize=256)
+def content_type_line(content_type):
+    if content_type is None:
+        return b""  # Ответ без тела (304)
+    return f"Content-Type: {content_type}\r\n".encode("utf-8")
+
+
+_HEAD_PREFIXES = {}
+
+
+def head_prefix(status, content_type):
+    """ Статус, Content-Type и начало Content-Length одним bytes (кэшируется) """
+    key = (status, content_type)
+    prefix = _HEAD_PREFIXES.get(key)
+    if prefix is None:
+        if len(_HEAD_PREFIXES) >= 1024:
+            _HEAD_PREFIXES.clear()
+        prefix = _HEAD_PREFIXES[key] = (
+            status_line(status) + content_type_line(content_type)
+            + b"Content-Length: ")
+    return prefix
 
 
 class Response:
-    def __init__(self, body, status="200 OK", content_type="text/html"):
+    def __init__(self, body, status="200 OK", content_type="text/html",
+                 headers=None):
         if not isinstance(body, (str, bytes)):
             raise TypeError("Body must be of type str or bytes")
         self.body = body
         self.status = status
         self.content_type = content_type
+        self.headers = list(headers) if headers else []  # [(имя, значение)]
 
     def to_http_response(self):
         """ Формирует HTTP-ответ """
-        if isinstance(self.body, str):
-            body = self.body.encode("utf-8")
-        else:
+        body = self.body
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if not self.headers:
+            return b"%b%d\r\n\r\n%b" % (
+                head_prefix(self.status, self.content_type), len(body), body)
+        return b"".join(self.buffers(body=body))
+
+    def header_parts(self, content_length, connection=None):
+        """ Заголовки списком bytes-частей, включая пустую строку в конце """
+        parts = [head_prefix(self.status, self.content_type),
+                 b"%d\r\n" % content_length]
+        for name, value in self.headers:
+            parts.append(f"{name}: {value}\r\n".encode("utf-8"))
+        if connection is not None:
+            parts.append(connection)
+        parts.append(b"\r\n")
+        return parts
+
+    def header_bytes(self, content_length):
+        """ Строка статуса и заголовки, включая пустую строку в конце """
+        return b"".join(self.header_parts(content_length))
+
+    def buffers(self, connection=None, body=None):
+        """ Заголовки и тело отдельными буферами для sendmsg (без склейки) """
+        if body is None:
             body = self.body
-        headers = f"HTTP/1.1 {self.status}\r\nContent-Type: {self.content_type}\r\nContent-Length: {len(body)}\r\n\r\n"
-        return headers.encode("utf-8") + body
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+        if not self.headers:
+            # Частый случай: весь заголовок - кэшированный префикс и длина
+            return [head_prefix(self.status, self.content_type),
+                    b"%d\r\n%b\r\n" % (len(body), connection or b""),
+                    body]
+        parts = self.header_parts(len(body), connection)
+        parts.append(body)
+        return parts
+
+
+def dumps_json(data):
+    return json.dumps(data)
+
+
+def dumps_orjson(data):
+    return orjson.dumps(data)
+
+
+# Самый быстрый доступный кодировщик: orjson, если установлен
+fast_json = dumps_orjson if orjson is not None else dumps_json
 
 
 class JsonResponse(Response):
-    def __init__(self, data, status="200 OK"):
-        super().__init__(json.dumps(data), status,
-                         content_type="application/json")
+    encoder = staticmethod(dumps_json)  # Подменяется на fast_json глобально
+
+    def __init__(self, data, status="200 OK", encoder=None, headers=None):
+        super().__init__((encoder or self.encoder)(data), status,
+                         content_type="application/json", headers=headers)
 
 
 class HtmlResponse(Response):
-    def __init__(self, html, status="200 OK"):
-        super().__init__(html, status, content_type="text/html")
+    def __init__(self, html, status="200 OK", headers=None):
+        super().__init__(html, status, content_type="text/html",
+                         headers=headers)
 
 
 class TextResponse(Response):
-    def __init__(self, text, status="200 OK"):
-        super().__init__(text, status, content_type="text/plain")
+    def __init__(self, text, status="200 OK", headers=None):
+        super().__init__(text, status, content_type="text/plain",
+                         headers=headers)
+
+
+class PreparedResponse(Response):
+    """ Ответ из кэша или memoize: уже сериализован в data.
+
+    Каждое попадание получает свою копию (copy), чтобы хуки и middleware
+    могли менять заголовки. Пока статус, заголовки и тело не тронуты,
+    отдаются готовые байты; иначе ответ сериализуется заново.
+    """
+
+    def __init__(self, data, body, status, content_type, headers):
+        super().__init__(body, status, content_type, headers)
+        self.data = data
+        self.prepared = (body, status, content_type, list(headers))
+        # Длина строки статуса: после нее вставляется заголовок Connection
+        self.status_length = data.index(b"\r\n") + 2
+
+    @classmethod
+    def from_response(cls, response, data):
+        body = response.body
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        return cls(data, body, response.status, response.content_type,
+                   response.headers)
+
+    def copy(self):
+        body, status, content_type, headers = self.prepared
+        return PreparedResponse(self.data, body, status, content_type,
+                                headers)
+
+    def modified(self):
+        body, status, content_type, headers = self.prepared
+        return (self.body is not body or self.status != status
+                or self.content_type != content_type
+                or self.headers != headers)
+
+    def to_http_response(self):
+        if self.modified():
+            return super().to_http_response()
+        return self.data
+
+    def buffers(self, connection=None, body=None):
+        if body is not None or self.modified():
+            return super().buffers(connection, body)
+        if connection is None:
+            return [self.data]
+        data = memoryview(self.data)
+        return [data[:self.status_length], connection,
+                data[self.status_length:]]
+
+
+def send_buffers(sock, buffers):
+    """ Отправляет буферы одним sendmsg без склейки в один bytes """
+    if not hasattr(sock, "sendmsg"):
+        sock.sendall(b"".join(buffers))  # Windows: sendmsg нет
+        return
+    views = [memoryview(buffer) for buffer in buffers]
+    while views:
+        sent = sock.sendmsg(views)
+        # Частичная отправка: отбрасываем ушедшие буферы и хвост первого
+        while sent:
+            first = len(views[0])
+            if sent >= first:
+                sent -= first
+                views.pop(0)
+            else:
+                views[0] = views[0][sent:]
+                sent = 0
+
+
+class FileResponse(Response):
+    """ Ответ с телом из файла: отправляется через socket.sendfile без копии в память """
+
+    def __init__(self, path, status="200 OK",
+                 content_type="application/octet-stream", offset=0,
+                 length=None, headers=None):
+        if length is None:
+            length = os.path.getsize(path) - offset
+        self.body = None
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.status = status
+        self.content_type = content_type
+        self.headers = list(headers) if headers else []
+
+    def to_http_response(self):
+        """ Запасной путь для транспортов без sendfile """
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            body = f.read(self.length)
+        return self.header_bytes(len(body)) + body
+
+    def send_body(self, sock):
+        """ Отправляет тело файла в сокет (os.sendfile, если доступен) """
+        if not self.length:
+            return
+        with open(self.path, "rb") as f:
+            sock.sendfile(f, self.offset, self.length)
+
+    async def send_body_async(self, writer):
+        if not self.length:
+            return
+        loop = asyncio.get_running_loop()
+        with open(self.path, "rb") as f:
+            await loop.sendfile(writer.transport, f, self.offset, self.length)
+
+
+class StreamingResponse(Response):
+    """ Ответ, тело которого отдается по частям из (async) итератора.
+
+    Если content_length известен, чанки пишутся как есть с Content-Length,
+    иначе - с Transfer-Encoding: chunked. Память не зависит от размера тела.
+    """
+
+    def __init__(self, content, status="200 OK", content_type="text/html",
+                 headers=None, content_length=None):
+        self.body = None
+        self.content = content
+        self.status = status
+        self.content_type = content_type
+        self.headers = list(headers) if headers else []
+        self.content_length = content_length
+
+    def stream_header_bytes(self, chunked):
+        """ Заголовки потока: chunked или Content-Length, если длина известна """
+        parts = [status_line(self.status),
+                 content_type_line(self.content_type)]
+        if chunked:
+            parts.append(b"Transfer-Encoding: chunked\r\n")
+        elif self.content_length is not None:
+            parts.append(b"Content-Length: %d\r\n" % self.content_length)
+        # Иначе (HTTP/1.0) тело идет до закрытия соединения
+        for name, value in self.headers:
+            parts.append(f"{name}: {value}\r\n".encode("utf-8"))
+        parts.append(b"\r\n")
+        return b"".join(parts)
+
+    def iter_chunks(self):
+        """ Синхронный обход чанков как bytes (пустые пропускаются) """
+        content = self.content
+        if hasattr(content, "__aiter__"):
+            content = iterate_async(content)
+        for chunk in content:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if chunk:
+                yield chunk
+
+    async def aiter_chunks(self, executor=None):
+        """ Асинхронный обход; sync-итератор читается в пуле потоков """
+        if hasattr(self.content, "__aiter__"):
+            async for chunk in self.content:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                if chunk:
+                    yield chunk
+            return
+
+        loop = asyncio.get_running_loop()
+        iterator = self.iter_chunks()
+        done = object()
+        while True:
+            chunk = await loop.run_in_executor(executor, next, iterator, done)
+            if chunk is done:
+                break
+            yield chunk
+
+    def to_http_response(self):
+        """ Собирает тело целиком (для транспортов без потоковой записи) """
+        body = b"".join(self.iter_chunks())
+        self.content_length = len(body)
+        return self.stream_header_bytes(chunked=False) + body
+
+    def send(self, sock, chunked):
+        for chunk in self.iter_chunks():
+            sock.sendall(frame_chunk(chunk) if chunked else chunk)
+        if chunked:
+            sock.sendall(b"0\r\n\r\n")
+
+    async def send_async(self, writer, chunked, executor=None):
+        async for chunk in self.aiter_chunks(executor):
+            writer.write(frame_chunk(chunk) if chunked else chunk)
+            await writer.drain()
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+
+
+def frame_chunk(chunk):
+    """ Кадр chunked-кодирования для одного непустого чанка """
+    return b"%x\r\n%b\r\n" % (len(chunk), chunk)
+
+
+def iterate_async(async_iterable):
+    """ Обход async-итератора из синхронного кода (рабочий поток) """
+    loop = asyncio.new_event_loop()
+    iterator = async_iterable.__aiter__()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(iterator.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
@@ -1,29 +1,119 @@
+import inspect
 import re
 
+
+class _TrieNode:
+    """ Узел дерева сегментов для маршрутов с параметрами """
+    __slots__ = ("children", "param", "handlers")
+
+    def __init__(self):
+        self.children = {}  # Статические сегменты
+        self.param = None  # Узел для сегмента <param>
+        self.handlers = {}  # method -> (func, имена параметров)
+
+
 class Router:
     def __init__(self):
         self.routes = {}
+        self.static_routes = {}  # path -> {method: func}
+        self.trie = _TrieNode()
+        self.regex_routes = []  # Маршруты, которые не ложатся в дерево
+        self.paths = {}  # func -> шаблон пути (метка маршрута в метриках)
+        self.request_handlers = set()  # Обработчики с параметром request
+        self.memos = {}  # func -> RouteMemo маршрутов с memoize/static
 
     def add_route(self, path: str, methods: list[str], func):
         route_key = (path, tuple(methods))
         if route_key in self.routes:
             raise ValueError(f"Route '{path}' with methods {methods} is already registered")
         self.routes[route_key] = func
+        self.paths.setdefault(func, path)
+        # Сигнатура проверяется один раз при регистрации, а не на запрос
+        if (callable(func)
+                and "request" in inspect.signature(func).parameters):
+            self.request_handlers.add(func)
+        memo = getattr(func, "route_memo", None)
+        if memo is not None:
+            self.memos[func] = memo
+        self._compile_route(path, methods, func)
+
+    def _compile_route(self, path, methods, func):
+        """ Компилирует маршрут в таблицу диспетчеризации один раз """
+        if "<" not in path:
+            handlers = self.static_routes.setdefault(path, {})
+            for method in methods:
+                handlers.setdefault(method, func)
+            return
+
+        segments = path.split("/")
+        if not all(self._is_param(s) or "<" not in s for s in segments):
+            # Параметр внутри сегмента (например, /file/<name>.txt)
+            pattern = re.sub(r'<([^>]+)>', r'(?P<\1>[^/]+)', path)
+            self.regex_routes.append(
+                (re.compile(f"^{pattern}$"), frozenset(methods), func))
+            return
+
+        node = self.trie
+        names = []
+        for segment in segments:
+            if self._is_param(segment):
+                if node.param is None:
+                    node.param = _TrieNode()
+                node = node.param
+                names.append(segment[1:-1])
+            else:
+                node = node.children.setdefault(segment, _TrieNode())
+        for method in methods:
+            node.handlers.setdefault(method, (func, tuple(names)))
+
+    @staticmethod
+    def _is_param(segment):
+        return (segment.startswith("<") and segment.endswith(">")
+                and segment.count("<") == 1 and segment.count(">") == 1)
 
     def get_route(self, path: str, method: str):
-        for (route_path, methods), func in self.routes.items():
+        handlers = self.static_routes.get(path)
+        if handlers is not None:
+            func = handlers.get(method)
+            if func is not None:
+                return func, {}
+
+        values = []
+        found = self._match(self.trie, path.split("/"), 0, method, values)
+        if found is not None:
+            func, names = found
+            # Получаем параметры из URL
+            return func, dict(zip(names, values))
+
+        for regex, methods, func in self.regex_routes:
             if method not in methods:
                 continue
+            match = regex.match(path)
+            if match:
+                return func, match.groupdict()
 
-            pattern = re.sub(r'<([^>]+)>', r'(?P<\1>[^/]+)', route_path)
-            regex = f"^{pattern}$"
+        return None
 
-            match = re.match(regex, path)
+    def _match(self, node, segments, index, method, values):
+        """ Обход дерева: сначала статический сегмент, затем параметр """
+        if index == len(segments):
+            return node.handlers.get(method)
+
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            found = self._match(child, segments, index + 1, method, values)
+            if found is not None:
+                return found
+
+        if node.param is not None and segment:
+            values.append(segment)
+            found = self._match(node.param, segments, index + 1, method,
+                                values)
+            if found is not None:
+                return found
+            values.pop()
 
-            if match:
-                # Получаем параметры из URL
-                return func, match.groupdict()
-        
         return None
 
     def route(self, path: str, methods: list[str] =["GET"]):
@@ -33,4 +123,4 @@ class Router:
             self.add_route(path, methods, func)
             return func
 
-        return wrapper
\ No newline at end of file
+        return wrapper
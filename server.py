@@ -1,10 +1,33 @@
-import mimetypes
+import asyncio
+import atexit
+import functools
+import inspect
+import signal
+import sys
 import threading
 import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from request_ import Request
-from response import Response
+from asgi import call_hook, handle_asgi
+from cache import CachePolicy, ResponseCache, RouteMemo
+from compression import Compression, Compressor, add_vary
+from limits import ConnectionLimiter
+from logqueue import AccessLog, BoundedQueueHandler, LogPipeline
+from metrics import Metrics
+from middleware import HookLayer, as_layer, compose, compose_async
+from prefork import PreforkServer
+from reactor import serve_reactor
+from request_ import BufferPool, HTTPParseError, Request, RequestParser
+from response import (FileResponse, HtmlResponse, PreparedResponse,
+                      Response, StreamingResponse, send_buffers)
+from reloader import FileWatcher, reload_modules, route_modules
 from router import Router
+from sessions import MemoryStore, SessionManager, Sessions, SQLiteStore
+from staticfiles import StaticFiles
+from templating import create_loader
+from workqueue import TaskQueue
+from wsgi import request_from_environ, serve_wsgi, wsgi_response
 import os
 import queue
 import logging
@@ -12,107 +35,623 @@ import logging
 
 class SimpleFramework:
     def __init__(self, static_folder="static", template_folder="templates",
-                 max_threads=5):
+                 max_threads=5, keep_alive_timeout=5.0,
+                 max_keep_alive_requests=100, max_header_bytes=65536,
+                 max_body_bytes=10 * 1024 * 1024, template_engine="simple",
+                 template_auto_reload=True, precompile_templates=False,
+                 cache_max_entries=1024, cache_max_bytes=64 * 1024 * 1024,
+                 log_queue_size=10000, log_overflow="drop",
+                 access_log_sample_rate=1.0, min_threads=None,
+                 max_queue_size=1024, listen_backlog=128, retry_after=1,
+                 thread_idle_timeout=30.0, shutdown_timeout=10.0,
+                 poll_interval=0.5, header_timeout=10.0, body_timeout=30.0,
+                 max_connections_per_ip=None, import_name=None):
+        if log_overflow not in ("drop", "block"):
+            raise ValueError(f"Unknown log overflow policy: {log_overflow}")
         self.router = Router()
         self.static_folder = static_folder
+        self.static_files = StaticFiles(static_folder)
         self.template_folder = template_folder
-        self.task_queue = queue.Queue()
+        self.templates = create_loader(template_engine, template_folder,
+                                       template_auto_reload)
+        # Ограниченная очередь: при переполнении клиент сразу получает 503
+        self.task_queue = TaskQueue(max_queue_size)
+        # Приемные буферы соединений переиспользуются рабочими потоками
+        self.buffer_pool = BufferPool(max_buffers=max_threads)
         self.max_threads = max_threads
+        self.min_threads = max_threads if min_threads is None else min_threads
+        self.thread_idle_timeout = thread_idle_timeout  # Простой сверх min, с
+        self.thread_count = 0
+        self.idle_threads = 0
+        self.pool_lock = threading.Lock()
+        self.listen_backlog = listen_backlog
+        self.rejected = 0  # Соединения, отклоненные с 503 или 429
+        self.overloaded_response = HtmlResponse(
+            "<h1>503 Service Unavailable</h1>", "503 Service Unavailable",
+            headers=[("Retry-After", str(retry_after)),
+                     ("Connection", "close")]).to_http_response()
+        # Лимит соединений с одного IP (None - без лимита), сверх него - 429
+        self.limiter = ConnectionLimiter(
+            max_connections_per_ip) if max_connections_per_ip else None
+        self.too_many_connections_response = HtmlResponse(
+            "<h1>429 Too Many Requests</h1>", "429 Too Many Requests",
+            headers=[("Retry-After", str(retry_after)),
+                     ("Connection", "close")]).to_http_response()
+        self.keep_alive_timeout = keep_alive_timeout  # Простой соединения, с
+        # Срок на заголовки от первого байта запроса и на тело после них, с:
+        # медленный клиент (slowloris) не держит поток дольше
+        self.header_timeout = header_timeout
+        self.body_timeout = body_timeout
+        self.max_keep_alive_requests = max_keep_alive_requests
+        self.max_header_bytes = max_header_bytes
+        self.max_body_bytes = max_body_bytes
+        self.shutdown_timeout = shutdown_timeout  # Срок дообработки при остановке, с
+        self.poll_interval = poll_interval  # Как часто цикл accept смотрит флаги
+        self.stopping = threading.Event()
+        self.reload_requested = False
+        self.idle_connections = set()  # Соединения keep-alive между запросами
+        self.pending_router = None  # Маршрутизатор, собираемый reload()
+        self.watcher = None  # FileWatcher после watch_files()
+        # Модуль, создавший приложение, reload() не перечитывает
+        self.owner_module = import_name or self.caller_module()
         self.lock = threading.Lock()
-        self.sessions = {}  # Хранение сессий
+        self.sessions = None  # SessionManager после enable_sessions()
+        if hasattr(os, "register_at_fork"):
+            # Один раз на приложение: менеджер сессий берется текущий
+            os.register_at_fork(after_in_child=self.restart_sweepers)
         self.middleware = []  # Список промежуточных обработчиков
+        self.chain = None  # Цепочка middleware, собранная compose_middleware
+        self.layers = {}  # middleware -> Layer: слои переживают пересборку
+        self.async_chain = None
+        self.chain_size = 0
+        self.response_cache = ResponseCache(cache_max_entries, cache_max_bytes)
+        self.executor = None  # Пул для sync-обработчиков в режиме asyncio
+        self.metrics = None  # Metrics после enable_metrics()
+        self.compressor = None  # Compressor после enable_compression()
+        self.startup_handlers = []
+        self.shutdown_handlers = []
+        self.log_queue_size = log_queue_size
+        self.log_overflow = log_overflow
         self.logger = self.setup_logging()
+        self.access_log = AccessLog(self.logger.getChild("access"),
+                                    access_log_sample_rate)
+        if precompile_templates:
+            self.templates.precompile()
+
+    def caller_module(self):
+        """ Модуль, создавший приложение: первый кадр стека вне __init__
+        этого объекта (у подкласса их несколько - по одному на класс) """
+        frame = sys._getframe(1)
+        while frame is not None and frame.f_locals.get("self") is self:
+            frame = frame.f_back
+        return frame.f_globals.get("__name__") if frame is not None else None
 
     def setup_logging(self):
-        """ Настройка логирования """
+        """ Настройка логирования: очередь и фоновый поток, один раз на процесс.
+
+        Конвейер общий для всех приложений процесса; следующее приложение
+        перенастраивает его под свои log_queue_size и log_overflow.
+        """
         logger = logging.getLogger('SimpleFramework')
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter(
-            '%(asctime)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        block = self.log_overflow == "block"
+        pipelines = [handler.pipeline for handler in logger.handlers
+                     if isinstance(handler, BoundedQueueHandler)]
+        if pipelines:
+            pipelines[0].configure(self.log_queue_size, block)
+        else:
+            formatter = logging.Formatter(
+                '%(asctime)s - %(levelname)s - %(message)s')
+            pipeline = LogPipeline(capacity=self.log_queue_size, block=block,
+                                   formatter=formatter)
+            logger.addHandler(pipeline.handler)
+            atexit.register(pipeline.stop)
         logger.setLevel(logging.INFO)
         return logger
 
-    def route(self, path, methods=["GET"]):
-        """Регистрация маршрута через маршрутизатор"""
-        return self.router.route(path, methods)
+    def route(self, path, methods=["GET"], memoize=None, static=False):
+        """Регистрация маршрута через маршрутизатор.
 
-    def render_template(self, template_name, context=None):
-        """ Простая шаблонизация """
+        memoize=N - готовые байты ответа хранятся в LRU на N значений
+        параметров пути; static=True - ответ маршрута без параметров
+        сериализуется один раз, при регистрации. Оба режима - для
+        обработчиков, зависящих только от параметров пути.
+        """
+        # Во время reload() маршруты модулей попадают в новый маршрутизатор
+        router = self.pending_router or self.router
+        register = router.route(path, methods)
+        if not memoize and not static:
+            return register
+
+        def wrapper(func):
+            if "request" in inspect.signature(func).parameters:
+                raise ValueError(f"Memoized route '{path}' must not take "
+                                 f"the request")
+            if static and "<" in path:
+                raise ValueError(f"Static route '{path}' has parameters")
+            # Для static - по варианту на каждое сжатие
+            memo = RouteMemo(memoize or 4, path)
+            func.route_memo = memo
+            register(func)
+            if static and self.compressor is None:
+                self.memoize_response(None, memo, (),
+                                      self.call_handler(func, {}))
+            return func
+
+        return wrapper
+
+    def cache(self, ttl=60, vary=None):
+        """ Кэширование сериализованного ответа маршрута (над или под route);
+        кэшируются только GET и HEAD """
+
+        def wrapper(func):
+            func.cache_policy = CachePolicy(ttl, vary)
+            return func
+
+        return wrapper
+
+    def enable_metrics(self, path="/metrics"):
+        """ Включает замеры этапов запроса и маршрут с метриками Prometheus """
+        self.metrics = Metrics()
+        self.metrics.gauge("http_task_queue_depth",
+                           "Connections waiting for a worker thread",
+                           self.task_queue.qsize)
+        self.metrics.gauge("http_busy_workers",
+                           "Worker threads serving a connection",
+                           self.metrics.busy_workers)
+        self.metrics.gauge("http_worker_threads", "Worker thread pool size",
+                           lambda: self.thread_count)
+        self.task_queue.observer = functools.partial(
+            self.metrics.observe, "http_queue_wait_seconds", ())
+        self.metrics.collector(self.memo_counters)
+
+        def metrics_endpoint(app):
+            return Response(app.metrics.render(),
+                            content_type="text/plain; version=0.0.4; "
+                                         "charset=utf-8")
+
+        self.router.add_route(path, ["GET"], metrics_endpoint)
+        return self.metrics
+
+    def enable_compression(self, min_size=1024, level=6, brotli_level=5,
+                           precompress_static=False):
+        """ Сжатие ответов gzip/brotli по Accept-Encoding.
+
+        Внешний слой middleware сжимает Response, кэш хранит сжатые
+        варианты, статика отдается из соседних .br/.gz (precompress_static
+        создает их при старте).
+        """
+        self.compressor = Compressor(min_size, level, brotli_level)
+        self.static_files.compressor = self.compressor
+        if precompress_static:
+            self.static_files.precompress()
+        self.middleware.insert(0, Compression(self.compressor))
+        self.chain = self.async_chain = None
+        return self.compressor
+
+    def enable_sessions(self, secret, backend="memory", path="sessions.db",
+                        ttl=3600, max_sessions=100000, cookie_name="session",
+                        secure=False, sweep_interval=60.0):
+        """ Серверные сессии: request.session в обработчиках.
+
+        backend="memory" - LRU в памяти процесса под self.lock;
+        backend="sqlite" - файл path, общий для процессов одного хоста.
+        """
+        if backend == "memory":
+            store = MemoryStore(max_sessions, ttl, self.lock)
+        elif backend == "sqlite":
+            store = SQLiteStore(path, ttl)
+        else:
+            raise ValueError(f"Unknown session backend: {backend}")
+        layer = Sessions(SessionManager(store, secret, cookie_name, ttl,
+                                        secure, sweep_interval=sweep_interval))
+        previous = self.sessions
+        if previous is None:
+            self.middleware.insert(0, layer)
+        else:
+            # Повторный вызов заменяет менеджер: прежний поток чистки не нужен
+            previous.stop_sweeper()
+            for index, mw in enumerate(self.middleware):
+                if isinstance(mw, Sessions) and mw.manager is previous:
+                    self.middleware[index] = layer
+        self.sessions = layer.manager
+        self.sessions.start_sweeper()
+        self.chain = self.async_chain = None
+        return self.sessions
+
+    def restart_sweepers(self):
+        """ После fork: поток чистки сессий не переживает его в дочернем """
+        if self.sessions is not None:
+            self.sessions.restart_sweeper()
+
+    def on_startup(self, func):
+        """ Функция (sync или async) для события lifespan.startup """
+        self.startup_handlers.append(func)
+        return func
+
+    def on_shutdown(self, func):
+        self.shutdown_handlers.append(func)
+        return func
+
+    async def startup(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_threads)
+        self.compose_middleware()
+        for hook in self.startup_handlers:
+            await call_hook(self, hook)
+
+    async def shutdown(self):
+        for hook in self.shutdown_handlers:
+            await call_hook(self, hook)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        for layer in self.layers.values():
+            layer.close()
+        if self.sessions is not None:
+            self.sessions.stop_sweeper()
+
+    def request_stop(self):
+        """ Плавная остановка: можно вызывать из обработчика сигнала """
+        self.stopping.set()
+
+    def request_reload(self):
+        """ reload() на следующем круге цикла accept (SIGHUP, FileWatcher) """
+        self.reload_requested = True
+
+    def reload(self):
+        """ Перечитывает модули с маршрутами и сбрасывает кэши.
+
+        Слушающий сокет и открытые соединения не трогаются; запросы в
+        работе дорабатывают со старым маршрутизатором, новый подменяется
+        одним присваиванием. Ошибка импорта оставляет прежние маршруты.
+        """
+        modules = route_modules(self)
+        router = Router()
+        for (path, methods), func in self.router.routes.items():
+            if getattr(func, "__module__", None) not in modules:
+                router.add_route(path, list(methods), func)
+        self.pending_router = router
         try:
-            if context is None:
-                context = {}
-            template_path = os.path.join(self.template_folder, template_name)
-            if not os.path.exists(template_path):
-                raise FileNotFoundError(f"Template '{template_name}' not found")
+            reload_modules(modules.values())
+        except Exception:
+            self.logger.exception("Reload failed, keeping previous routes")
+            return False
+        finally:
+            self.pending_router = None
+        self.router = router
+        self.response_cache.clear()
+        for memo in router.memos.values():
+            memo.clear()  # Ответы могли зависеть от шаблонов
+        self.templates.clear()
+        self.static_files.clear()
+        self.logger.info(f"Reloaded {len(modules)} route module(s)")
+        return True
 
-            with open(template_path, "r") as f:
-                template = f.read()
+    def watch_files(self, interval=1.0, paths=()):
+        """ Режим разработки: reload() при изменении модулей маршрутов,
+        шаблонов или файлов из paths """
 
-            # Заменяем переменные в шаблоне на значения из context
-            for key, value in context.items():
-                template = template.replace(f"{{{{ {key} }}}}", str(value))
+        def watched():
+            files = [module.__file__
+                     for module in route_modules(self).values()]
+            return [*files, self.template_folder, *paths]
 
-            return template
+        self.watcher = FileWatcher(watched, self.request_reload, interval)
+        self.watcher.start()
+        self.on_shutdown(lambda app: app.watcher.stop())
+        return self.watcher
+
+    def install_signal_handlers(self):
+        """ SIGTERM/SIGINT - плавная остановка, SIGHUP - reload() """
+        if threading.current_thread() is not threading.main_thread():
+            return  # signal.signal работает только в главном потоке
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.request_stop())
+        signal.signal(signal.SIGINT, lambda signum, frame: self.request_stop())
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP,
+                          lambda signum, frame: self.request_reload())
+
+    def check_reload(self):
+        if self.reload_requested:
+            self.reload_requested = False
+            self.reload()
+
+    async def asgi(self, scope, receive, send):
+        """ ASGI 3-приложение: uvicorn --loop uvloop app:app.asgi """
+        await handle_asgi(self, scope, receive, send)
+
+    def render_template(self, template_name, context=None):
+        """ Шаблонизация через кэш скомпилированных шаблонов """
+        try:
+            if context is None:
+                context = {}
+            return self.templates.render(template_name, context)
         except Exception as e:
             self.logger.exception("Error rendering template")
             raise
 
     def handle_request(self, raw_request):
+        """ Обработка запроса; возвращает готовый HTTP-ответ """
+        return self.finalize_response(self.dispatch(raw_request))
+
+    async def handle_request_async(self, raw_request):
+        """ Обработка запроса в режиме asyncio """
+        return self.finalize_response(await self.dispatch_async(raw_request))
+
+    def dispatch(self, raw_request):
+        """ Ответ на запрос: Response (еще не сериализованный), bytes или str """
         try:
             # Парсим запрос
-            request = Request(raw_request)
+            request = self.as_request(raw_request)
         except ValueError:
             self.logger.error("Invalid HTTP request format")
             return self.handle_error(Exception("Invalid HTTP request format"))
 
         try:
-            # Проверка на статические файлы
-            if request.endpoint.startswith("/static/"):
-                return self.serve_static_file(request.endpoint)
-
-            # Обработка маршрутов
-            environ = {"method": request.method, "path": request.endpoint}
-            for mw in self.middleware:
-                environ = mw(environ)
-
-            route_result = self.router.get_route(environ["path"],
-                                                 environ["method"])
-            if route_result is None:
-                # Если маршрут не найден
-                return self.build_response("404 Not Found", "text/html",
-                                           "<h1>404 Not Found</h1>")
-
-            # Распаковка обработчика и параметров
-            handler, params = route_result
-
-            # Вызов обработчика маршрута
-            response = handler(self, **params) if params else handler(self)
-
-            if isinstance(response, Response):
-                return response.to_http_response()
+            chain = self.chain
+            if chain is None or self.chain_size != len(self.middleware):
+                chain = self.compose_middleware()
+            return chain(request)
+        except Exception as e:
+            self.logger.exception("Error during request handling")
+            return self.handle_error(e)
+
+    def endpoint(self, request):
+        """ Внутренний слой цепочки: маршрут, кэш и обработчик """
+        timings = request.timings
+        start = time.perf_counter()
+        route_result = self.find_route(request)
+        if timings is not None:
+            timings["route"] = time.perf_counter() - start
+            request.route_name = self.route_name(request, route_result)
+        if not isinstance(route_result, tuple):
+            return route_result
+
+        # Распаковка обработчика и параметров
+        handler, params = route_result
+        start = time.perf_counter()
+        memo = self.router.memos.get(handler)
+        if memo is not None:
+            key = self.memo_key(request, params)
+            response = memo.get(key)
+            if response is not None:
+                response = response.copy()
             else:
-                raise ValueError(
-                    "Handler did not return a valid Response object")
+                response = self.memoize_response(
+                    request, memo, key, self.call_handler(handler, params))
+        else:
+            response = self.cached_response(request, handler)
+            if response is None:
+                response = self.cache_response(
+                    request, handler,
+                    self.call_handler(handler, params, request))
+        if timings is not None:
+            timings["handler"] = time.perf_counter() - start
+        return response
+
+    async def dispatch_async(self, raw_request):
+        """ Асинхронный аналог dispatch """
+        try:
+            request = self.as_request(raw_request)
+        except ValueError:
+            self.logger.error("Invalid HTTP request format")
+            return self.handle_error(Exception("Invalid HTTP request format"))
+
+        try:
+            chain = self.async_chain
+            if chain is None or self.chain_size != len(self.middleware):
+                self.compose_middleware()
+                chain = self.async_chain
+            return await chain(request)
         except Exception as e:
             self.logger.exception("Error during request handling")
             return self.handle_error(e)
 
+    async def endpoint_async(self, request):
+        """ Асинхронный аналог endpoint """
+        timings = request.timings
+        start = time.perf_counter()
+        route_result = self.find_route(request)
+        if timings is not None:
+            timings["route"] = time.perf_counter() - start
+            request.route_name = self.route_name(request, route_result)
+        if not isinstance(route_result, tuple):
+            return route_result
+
+        handler, params = route_result
+        start = time.perf_counter()
+        memo = self.router.memos.get(handler)
+        if memo is not None:
+            key = self.memo_key(request, params)
+            cached = memo.get(key)
+            if cached is not None:
+                cached = cached.copy()
+        else:
+            cached = self.cached_response(request, handler)
+        if cached is not None:
+            if timings is not None:
+                timings["handler"] = time.perf_counter() - start
+            return cached
+        if handler in self.router.request_handlers:
+            params = {**params, "request": request}
+        if inspect.iscoroutinefunction(handler):
+            response = await handler(self, **params)
+        else:
+            # Синхронный обработчик не должен блокировать цикл событий
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                self.executor,
+                functools.partial(self.call_handler, handler, params))
+        if memo is not None:
+            response = self.memoize_response(request, memo, key, response)
+        else:
+            response = self.cache_response(request, handler, response)
+        if timings is not None:
+            timings["handler"] = time.perf_counter() - start
+        return response
+
+    def compose_middleware(self):
+        """ Собирает middleware в одну функцию (sync и async) один раз """
+        middleware = list(self.middleware)
+        previous, self.layers = self.layers, {}
+        for mw in middleware:
+            if mw not in self.layers:
+                self.layers[mw] = previous.pop(mw, None) or as_layer(mw)
+        for layer in previous.values():
+            layer.close()  # Слой убран из цепочки - его пул больше не нужен
+        layers = [self.layers[mw] for mw in middleware]
+        self.chain = compose(layers, self.endpoint)
+        self.async_chain = compose_async(layers, self.endpoint_async,
+                                         self.max_threads)
+        self.chain_size = len(middleware)
+        return self.chain
+
+    @staticmethod
+    def as_request(raw_request):
+        if isinstance(raw_request, Request):
+            return raw_request
+        return Request(raw_request)
+
+    def find_route(self, request):
+        """ Возвращает готовый ответ или пару (обработчик, параметры) """
+        # Маршрут ищется по пути без query string
+        path = request.path
+        # Проверка на статические файлы
+        if path.startswith("/static/"):
+            return self.serve_static_file(path, request)
+
+        # Обработка маршрутов
+        route_result = self.router.get_route(path, request.method)
+        if route_result is None:
+            # Если маршрут не найден
+            return self.build_response("404 Not Found", "text/html",
+                                       "<h1>404 Not Found</h1>")
+        return route_result
+
+    def route_name(self, request, route_result):
+        """ Метка маршрута для метрик: шаблон пути, а не сам URL """
+        if isinstance(route_result, tuple):
+            return self.router.paths.get(route_result[0], "<unknown>")
+        if request.endpoint.startswith("/static/"):
+            return "/static/"
+        return "<unmatched>"
+
+    def record_metrics(self, request, response, timings):
+        if isinstance(response, Response):
+            status = response.status[:3]
+        elif isinstance(response, bytes):
+            status = response[9:12].decode("ascii", "replace")
+        else:
+            status = response[9:12]
+        self.metrics.record_request(request.method,
+                                    request.route_name or "<unmatched>",
+                                    status, timings)
+
+    def call_handler(self, handler, params, request=None):
+        """ Вызов обработчика маршрута; request передается, если он есть
+        в сигнатуре обработчика """
+        if request is not None and handler in self.router.request_handlers:
+            params = {**params, "request": request}
+        response = handler(self, **params) if params else handler(self)
+        if inspect.iscoroutine(response):
+            # async-обработчик при запуске на потоках
+            response = asyncio.run(response)
+        return response
+
+    def cached_response(self, request, handler):
+        """ Ответ из кэша (PreparedResponse) или None """
+        policy = getattr(handler, "cache_policy", None)
+        if policy is None or not policy.applies(request):
+            return None
+        entry = self.response_cache.get(self.cache_key(policy, request))
+        return entry.for_request(request) if entry is not None else None
+
+    def cache_key(self, policy, request):
+        key = policy.key(request)
+        if self.compressor is not None:
+            # Сжатые варианты кэшируются отдельно
+            key += (self.compressor.negotiate(request),)
+        return key
+
+    def cache_response(self, request, handler, response):
+        """ Сохраняет успешный ответ в кэш, если маршрут кэшируемый """
+        if not isinstance(response, Response):
+            raise ValueError("Handler did not return a valid Response object")
+        policy = getattr(handler, "cache_policy", None)
+        if (policy is None or not policy.applies(request)
+                or isinstance(response, (FileResponse, StreamingResponse))
+                or not response.status.startswith("200")
+                or self.session_changed(request)):
+            return response
+        for name in policy.vary:
+            add_vary(response.headers, name)
+        if self.compressor is not None:
+            self.compressor.compress_response(request, response)
+        entry = self.response_cache.set(self.cache_key(policy, request),
+                                        response, policy.ttl)
+        return entry.for_request(request)
+
+    @staticmethod
+    def session_changed(request):
+        """ Обработчик изменил сессию: ответ с Set-Cookie не кэшируется """
+        session = request.session if request is not None else None
+        return session is not None and session.changed
+
+    def memo_key(self, request, params):
+        """ Ключ memoize: значения параметров пути (и вариант сжатия) """
+        key = tuple(params.values())
+        if self.compressor is not None:
+            key = (key, self.compressor.negotiate(request))
+        return key
+
+    def memoize_response(self, request, memo, key, response):
+        """ Сохраняет успешный ответ в LRU маршрута уже сериализованным """
+        if not isinstance(response, Response):
+            raise ValueError("Handler did not return a valid Response object")
+        if (isinstance(response, (FileResponse, StreamingResponse))
+                or not response.status.startswith("200")
+                or self.session_changed(request)):
+            return response
+        if self.compressor is not None:
+            self.compressor.compress_response(request, response)
+        prepared = PreparedResponse.from_response(
+            response, response.to_http_response())
+        memo.set(key, prepared)
+        return prepared.copy()
+
+    def memo_stats(self):
+        """ Статистика memoize по шаблонам путей, с долей попаданий """
+        return {memo.route: memo.stats()
+                for memo in self.router.memos.values()}
+
+    def memo_counters(self):
+        for memo in list(self.router.memos.values()):
+            yield ("http_route_memo_total",
+                   (("route", memo.route), ("result", "hit"))), memo.hits
+            yield ("http_route_memo_total",
+                   (("route", memo.route), ("result", "miss"))), memo.misses
+
+    @staticmethod
+    def finalize_response(response):
+        """ Сериализует Response; потоковые ответы пишутся при отправке """
+        if isinstance(response, (FileResponse, StreamingResponse)):
+            return response
+        if isinstance(response, Response):
+            return response.to_http_response()
+        return response
+
     def build_response(self, status, content_type, body):
-        return f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n\r\n{body}"
+        length = len(body) if isinstance(body, bytes) else len(body.encode())
+        return (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {length}\r\n\r\n{body}")
 
-    def serve_static_file(self, path):
+    def serve_static_file(self, path, request=None):
         try:
-            file_path = os.path.join(self.static_folder, path[len("/static/"):])
-            if os.path.exists(file_path) and os.path.isfile(file_path):
-                mime_type, _ = mimetypes.guess_type(file_path)
-                mime_type = mime_type or "application/octet-stream"
-                with open(file_path, "rb") as f:
-                    content = f.read()
-                return self.build_response("200 OK", mime_type, content)
-            else:
+            response = self.static_files.serve(path[len("/static/"):],
+                                               request)
+            if response is None:
                 raise FileNotFoundError(f"Static file not found: {path}")
+            return response
         except FileNotFoundError as e:
             self.logger.warning(str(e))
             return self.build_response("404 Not Found", "text/html",
@@ -127,31 +666,64 @@ class SimpleFramework:
                                    f"<h1>500 Internal Server Error: {str(error)}</h1>")
 
     def __call__(self, environ, start_response):
-        """ Обработка входящих WSGI-запросов """
-        path = environ.get("PATH_INFO", "/")
-        method = environ.get("REQUEST_METHOD", "GET")
-        handler = self.router.get_route(path, method)
-
-        if handler:
-            response_body = handler(self)
-            start_response("200 OK", [("Content-Type", "text/html")])
+        """ Обработка входящих WSGI-запросов тем же dispatch, что и у сервера """
+        try:
+            request = request_from_environ(environ, self.max_body_bytes)
+        except HTTPParseError as e:
+            self.logger.error(f"Invalid HTTP request: {e}")
+            response = self.parse_error_response(e)
         else:
-            response_body = "<h1>404 Not Found</h1>"
-            start_response("404 Not Found", [("Content-Type", "text/html")])
-
-        return [response_body.encode("utf-8")]
+            response = self.dispatch(request)
+        status, headers, body = wsgi_response(response, environ)
+        start_response(status, headers)
+        return body
 
     def handle_client(self, client_socket):
-        """ Обрабатываем запрос клиента в отдельном потоке """
+        """ Обрабатываем запросы клиента в отдельном потоке (keep-alive) """
+        parser = self.create_parser()
         try:
-            request = client_socket.recv(
-                1024).decode()  # Декодируем входящий запрос
-            if request:
-                response = self.handle_request(request)
-                if isinstance(response,
-                              str):  # Если ответ в формате строки, преобразуем в байты
-                    response = response.encode('utf-8')
-                client_socket.sendall(response)  # Отправляем ответ
+            client_socket.settimeout(self.keep_alive_timeout)
+            served = 0
+            while True:
+                idle = parser.idle
+                if idle and self.stopping.is_set():
+                    if served:
+                        break  # Остановка: новых запросов по keep-alive не ждем
+                    # Первый запрос соединения из очереди уже отправлен -
+                    # его читаем, иначе клиент получил бы RST
+                    idle = False
+                if idle:
+                    # Простаивающее соединение drain() может закрыть сразу
+                    self.idle_connections.add(client_socket)
+                try:
+                    request = self.read_request(client_socket, parser)
+                except socket.timeout:
+                    break  # Соединение простаивает дольше keep_alive_timeout
+                except HTTPParseError as e:
+                    self.logger.error(f"Invalid HTTP request: {e}")
+                    client_socket.sendall(self.parse_error_response(e))
+                    break
+                finally:
+                    if idle:
+                        self.idle_connections.discard(client_socket)
+                if request is None:
+                    break  # Клиент закрыл соединение
+                served += 1
+
+                start = time.perf_counter()
+                response = self.dispatch(request)
+                # Решение после обработки: остановка могла начаться во время нее
+                keep_alive = self.should_keep_alive(request, served)
+                send_start = time.perf_counter()
+                keep_alive = self.send_response(
+                    client_socket, response, request,
+                    keep_alive)  # Отправляем ответ
+                if request.timings is not None:
+                    self.finish_timings(request, response, start, send_start)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass  # Клиент ушел или поток ответа оборван
         except Exception as e:
             self.logger.exception("Error handling client request")
             try:
@@ -160,46 +732,515 @@ class SimpleFramework:
             except Exception:
                 self.logger.error("Failed to send error response to client")
         finally:
+            parser.close()
+            self.release(client_socket)
             client_socket.close()
 
+    def finish_timings(self, request, response, start, send_start):
+        """ Досчитывает send и total и записывает запрос в метрики """
+        timings = request.timings
+        end = time.perf_counter()
+        timings["send"] = end - send_start - timings.get("serialize", 0.0)
+        timings["total"] = timings["parse"] + (end - start)
+        self.record_metrics(request, response, timings)
+
+    def send_response(self, client_socket, response, request, keep_alive):
+        """ Пишет ответ в сокет; возвращает, можно ли продолжать соединение """
+        if isinstance(response, StreamingResponse):
+            chunked, keep_alive = self.stream_framing(response, request,
+                                                      keep_alive)
+            client_socket.sendall(self.apply_connection_header(
+                response.stream_header_bytes(chunked), request, keep_alive))
+            try:
+                response.send(client_socket, chunked)
+            except OSError:
+                raise
+            except Exception:
+                # Заголовки уже отправлены - остается только оборвать ответ
+                self.logger.exception("Error while streaming response")
+                raise ConnectionAbortedError("Response stream failed")
+            return keep_alive
+        if isinstance(response, FileResponse):
+            head = response.header_bytes(response.length)
+            client_socket.sendall(self.apply_connection_header(
+                head, request, keep_alive))
+            response.send_body(client_socket)
+            return keep_alive
+        if isinstance(response, Response):
+            # Заголовки и тело уходят одним sendmsg без склейки
+            start = time.perf_counter()
+            buffers = response.buffers(self.connection_line(request,
+                                                            keep_alive))
+            if request.timings is not None:
+                request.timings["serialize"] = time.perf_counter() - start
+            send_buffers(client_socket, buffers)
+            return keep_alive
+        if isinstance(response,
+                      str):  # Если ответ в формате строки, преобразуем в байты
+            response = response.encode('utf-8')
+        client_socket.sendall(self.apply_connection_header(response, request,
+                                                           keep_alive))
+        return keep_alive
+
+    async def send_response_async(self, writer, response, request,
+                                  keep_alive):
+        if isinstance(response, StreamingResponse):
+            chunked, keep_alive = self.stream_framing(response, request,
+                                                      keep_alive)
+            writer.write(self.apply_connection_header(
+                response.stream_header_bytes(chunked), request, keep_alive))
+            try:
+                await response.send_async(writer, chunked, self.executor)
+            except OSError:
+                raise
+            except Exception:
+                self.logger.exception("Error while streaming response")
+                raise ConnectionAbortedError("Response stream failed")
+            return keep_alive
+        if isinstance(response, FileResponse):
+            head = response.header_bytes(response.length)
+            writer.write(self.apply_connection_header(head, request,
+                                                      keep_alive))
+            await writer.drain()
+            await response.send_body_async(writer)
+            return keep_alive
+        if isinstance(response, Response):
+            start = time.perf_counter()
+            buffers = response.buffers(self.connection_line(request,
+                                                            keep_alive))
+            if request.timings is not None:
+                request.timings["serialize"] = time.perf_counter() - start
+            writer.writelines(buffers)
+            await writer.drain()
+            return keep_alive
+        if isinstance(response, str):
+            response = response.encode('utf-8')
+        writer.write(self.apply_connection_header(response, request,
+                                                  keep_alive))
+        await writer.drain()
+        return keep_alive
+
+    @staticmethod
+    def stream_framing(response, request, keep_alive):
+        """ chunked для HTTP/1.1; для HTTP/1.0 без длины - тело до закрытия """
+        if response.content_length is not None:
+            return False, keep_alive
+        if request.protocol == "HTTP/1.1":
+            return True, keep_alive
+        return False, False
+
+    def create_parser(self):
+        return RequestParser(max_header_bytes=self.max_header_bytes,
+                             max_body_bytes=self.max_body_bytes,
+                             pool=self.buffer_pool)
+
+    def read_request(self, client_socket, parser):
+        """ Читает из сокета очередной запрос; None, если клиент закрыл соединение """
+        # Время разбора считается без ожидания данных в recv
+        start = time.perf_counter()
+        request = parser.next_request()
+        parse_time = time.perf_counter() - start
+        phase = deadline = None
+        try:
+            while request is None:
+                if not parser.idle:
+                    # Запрос начат: таймаут recv - не дальше срока его части
+                    phase, deadline = self.request_deadline(parser, phase,
+                                                            deadline)
+                    client_socket.settimeout(self.read_timeout(deadline))
+                # Читаем прямо в буфер соединения, без промежуточных bytes
+                size = client_socket.recv_into(parser.writable())
+                if not size:
+                    return None
+                start = time.perf_counter()
+                parser.commit(size)
+                request = parser.next_request()
+                parse_time += time.perf_counter() - start
+        except socket.timeout:
+            if parser.idle:
+                raise  # Простой keep-alive - соединение закрывается молча
+            raise self.request_timeout() from None
+        finally:
+            if deadline is not None:
+                client_socket.settimeout(self.keep_alive_timeout)
+        if self.metrics is not None:
+            request.timings = {"parse": parse_time}
+        return request
+
+    def request_deadline(self, parser, phase, deadline):
+        """ (фаза, срок) чтения начатого запроса: заголовки - header_timeout
+        от первого байта, тело - body_timeout от конца заголовков """
+        receiving_body = parser.receiving_body
+        if receiving_body is phase:
+            return phase, deadline
+        timeout = self.body_timeout if receiving_body else self.header_timeout
+        return receiving_body, time.monotonic() + timeout
+
+    def read_timeout(self, deadline):
+        """ Таймаут очередного чтения: до срока, но не дольше простоя """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise self.request_timeout()
+        return min(remaining, self.keep_alive_timeout)
+
+    @staticmethod
+    def request_timeout():
+        return HTTPParseError("Request read timeout", "408 Request Timeout")
+
+    def parse_error_response(self, error):
+        return self.build_response(error.status, "text/html",
+                                   f"<h1>{error.status}</h1>").encode('utf-8')
+
+    def should_keep_alive(self, request, served):
+        """ Решение о persistent-соединении по версии HTTP и Connection """
+        if served >= self.max_keep_alive_requests or self.stopping.is_set():
+            return False
+        connection = request.get_header("Connection", "").lower()
+        if request.protocol == "HTTP/1.1":
+            return connection != "close"
+        return connection == "keep-alive"
+
+    @staticmethod
+    def connection_line(request, keep_alive):
+        """ Заголовок Connection, если решение расходится с умолчанием версии """
+        if keep_alive == (request.protocol == "HTTP/1.1"):
+            return None
+        return b"Connection: keep-alive\r\n" if keep_alive else b"Connection: close\r\n"
+
+    def apply_connection_header(self, response, request, keep_alive):
+        line = self.connection_line(request, keep_alive)
+        if line is None:
+            return response
+        status, sep, rest = response.partition(b"\r\n")
+        return status + sep + line + rest
+
     def worker(self):
         """ Рабочий поток, который будет извлекать задачи из очереди и их обрабатывать """
         try:
             while True:
-                client_socket = self.task_queue.get()
+                with self.pool_lock:
+                    self.idle_threads += 1
+                try:
+                    client_socket = self.task_queue.get(
+                        timeout=self.thread_idle_timeout)
+                except queue.Empty:
+                    with self.pool_lock:
+                        self.idle_threads -= 1
+                        if self.thread_count > self.min_threads:
+                            self.thread_count -= 1
+                            return  # Лишний поток простаивает - сворачиваемся
+                    continue
+                with self.pool_lock:
+                    self.idle_threads -= 1
                 if client_socket is None:
+                    with self.pool_lock:
+                        self.thread_count -= 1
                     break  # Завершаем поток, если в очереди None
-                self.handle_client(client_socket)
+                if self.metrics is not None:
+                    self.metrics.set_busy(True)
+                try:
+                    self.handle_client(client_socket)
+                finally:
+                    if self.metrics is not None:
+                        self.metrics.set_busy(False)
                 self.task_queue.task_done()
         except Exception as e:
             self.logger.exception("Error in worker thread")
+        finally:
+            if self.metrics is not None:
+                self.metrics.retire()  # Шард потока - в общий итог
 
-    def start_server(self, host="127.0.0.1", port=8080):
-        """ Запуск сервера """
+    async def handle_client_async(self, reader, writer):
+        """ Обрабатываем соединение в цикле событий (keep-alive) """
+        parser = self.create_parser()
         try:
-            server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            server_socket.bind((host, port))
-            server_socket.listen(5)
+            served = 0
+            while True:
+                idle = parser.idle
+                if idle and self.stopping.is_set():
+                    if served:
+                        break
+                    idle = False  # Первый запрос соединения читаем
+                if idle:
+                    self.idle_connections.add(writer)
+                try:
+                    request = await self.read_request_async(reader, parser)
+                except asyncio.TimeoutError:
+                    break  # Соединение простаивает дольше keep_alive_timeout
+                except HTTPParseError as e:
+                    self.logger.error(f"Invalid HTTP request: {e}")
+                    writer.write(self.parse_error_response(e))
+                    await writer.drain()
+                    break
+                finally:
+                    if idle:
+                        self.idle_connections.discard(writer)
+                if request is None:
+                    break
+                served += 1
 
-            print(f"Server started at http://{host}:{port}")
+                start = time.perf_counter()
+                response = await self.dispatch_async(request)
+                keep_alive = self.should_keep_alive(request, served)
+                send_start = time.perf_counter()
+                keep_alive = await self.send_response_async(
+                    writer, response, request, keep_alive)
+                if request.timings is not None:
+                    self.finish_timings(request, response, start, send_start)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        except Exception as e:
+            self.logger.exception("Error handling client request")
+            try:
+                writer.write(self.handle_error(e).encode('utf-8'))
+                await writer.drain()
+            except Exception:
+                self.logger.error("Failed to send error response to client")
+        finally:
+            parser.close()
+            self.release(writer)
+            writer.close()
+
+    async def read_request_async(self, reader, parser):
+        """ Асинхронный аналог read_request """
+        start = time.perf_counter()
+        request = parser.next_request()
+        parse_time = time.perf_counter() - start
+        phase = deadline = None
+        while request is None:
+            if parser.idle:
+                timeout = self.keep_alive_timeout
+            else:
+                phase, deadline = self.request_deadline(parser, phase,
+                                                        deadline)
+                timeout = self.read_timeout(deadline)
+            try:
+                chunk = await asyncio.wait_for(reader.read(65536), timeout)
+            except asyncio.TimeoutError:
+                if parser.idle:
+                    raise
+                raise self.request_timeout() from None
+            if not chunk:
+                return None
+            start = time.perf_counter()
+            parser.feed(chunk)
+            request = parser.next_request()
+            parse_time += time.perf_counter() - start
+        if self.metrics is not None:
+            request.timings = {"parse": parse_time}
+        return request
 
-            # Запускаем несколько рабочих потоков
-            for _ in range(self.max_threads):
-                threading.Thread(target=self.worker, daemon=True).start()
+    def start_server(self, host="127.0.0.1", port=8080, engine="threads",
+                     workers=1, reuse_port=False):
+        """ Запуск сервера (engine: "threads", "asyncio", "reactor" или "wsgi").
 
-            while True:
-                try:
-                    client_socket, client_address = server_socket.accept()
-                    self.logger.info(f"New connection from {client_address}")
-                    # Помещаем клиентский сокет в очередь задач
-                    self.task_queue.put(client_socket)
-                except Exception as e:
-                    self.logger.exception("Error accepting client connection")
+        "reactor" - selectors/epoll: чтение, разбор и запись в одном потоке,
+        пул потоков только для обработчиков.
+        "wsgi" - приложение под wsgiref как под внешним WSGI-сервером.
+        workers > 1 - pre-fork: мастер и N рабочих процессов на одном порту.
+        """
+        if engine not in ("threads", "asyncio", "reactor", "wsgi"):
+            raise ValueError(f"Unknown server engine: {engine}")
+        try:
+            if workers > 1:
+                PreforkServer(self, host, port, workers, engine,
+                              reuse_port=reuse_port).run()
+                return
+
+            server_socket = self.create_server_socket(host, port, reuse_port)
+            self.install_signal_handlers()
+
+            print(f"Server started at http://{host}:{port}")
+
+            self.serve(server_socket, engine)
         except Exception as e:
             self.logger.exception("Failed to start server")
             raise
 
+    def create_server_socket(self, host, port, reuse_port=False):
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            # Каждый процесс слушает свой сокет, ядро балансирует accept
+            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        server_socket.bind((host, port))
+        server_socket.listen(self.listen_backlog)
+        return server_socket
+
+    def serve(self, server_socket, engine="threads"):
+        if engine == "asyncio":
+            asyncio.run(self.serve_asyncio(server_socket))
+        else:
+            self.compose_middleware()
+            if engine == "wsgi":
+                serve_wsgi(self, server_socket)
+                asyncio.run(self.shutdown())
+            elif engine == "reactor":
+                serve_reactor(self, server_socket)
+                asyncio.run(self.shutdown())
+            else:
+                self.serve_threads(server_socket)
+
+    def serve_threads(self, server_socket):
+        """ Цикл accept с передачей сокетов рабочим потокам """
+        # Запускаем min_threads рабочих; остальные - по мере роста очереди
+        for _ in range(self.min_threads):
+            self.spawn_worker()
+
+        # Таймаут accept - чтобы раз в poll_interval проверять флаги
+        server_socket.settimeout(self.poll_interval)
+        while not self.stopping.is_set():
+            self.check_reload()
+            try:
+                client_socket, client_address = server_socket.accept()
+            except socket.timeout:
+                continue
+            try:
+                self.access_log.log("New connection from %s", client_address)
+                if not self.admit(client_socket, client_address):
+                    self.reject_connection(client_socket,
+                                           self.too_many_connections_response,
+                                           "per_ip")
+                    continue
+                # Помещаем клиентский сокет в очередь задач
+                try:
+                    self.task_queue.put_nowait(client_socket)
+                except queue.Full:
+                    self.release(client_socket)
+                    self.reject_overloaded(client_socket)
+                    continue
+                if self.task_queue.qsize() > self.idle_threads:
+                    self.spawn_worker()  # Свободных потоков меньше, чем ждущих
+            except Exception as e:
+                self.logger.exception("Error accepting client connection")
+        self.drain(server_socket)
+
+    def drain(self, server_socket):
+        """ Остановка пула: очередь и активные запросы дорабатывают до
+        shutdown_timeout, затем закрывается слушающий сокет """
+        deadline = time.monotonic() + self.shutdown_timeout
+        while self.task_queue.unfinished_tasks:
+            # Закрываем и те соединения, что освободились после ответа
+            for client_socket in self.idle_connections.copy():
+                try:
+                    client_socket.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            if time.monotonic() >= deadline:
+                self.logger.warning(
+                    f"Shutdown timeout: {self.task_queue.unfinished_tasks} "
+                    f"connection(s) still in progress")
+                break
+            time.sleep(0.05)
+        for _ in range(self.thread_count):
+            try:
+                self.task_queue.put_nowait(None)  # Завершение рабочих
+            except queue.Full:
+                break
+        server_socket.close()
+        asyncio.run(self.shutdown())
+
+    def spawn_worker(self):
+        """ Запускает рабочий поток, если пул еще не достиг max_threads """
+        with self.pool_lock:
+            if self.thread_count >= self.max_threads:
+                return False
+            self.thread_count += 1
+        threading.Thread(target=self.worker, daemon=True).start()
+        return True
+
+    def reject_overloaded(self, client_socket):
+        """ Очередь полна: сразу 503 с Retry-After вместо ожидания в памяти """
+        self.reject_connection(client_socket, self.overloaded_response,
+                               "overloaded")
+
+    def reject_connection(self, client_socket, response, reason):
+        """ Отказ до чтения запроса: готовый ответ и закрытие """
+        self.record_rejected(reason)
+        try:
+            client_socket.setblocking(False)
+            try:
+                client_socket.recv(65536)  # Иначе close с непрочитанным - RST
+            except (BlockingIOError, InterruptedError):
+                pass
+            client_socket.send(response)
+        except OSError:
+            pass
+        finally:
+            client_socket.close()
+
+    def record_rejected(self, reason):
+        self.rejected += 1
+        if self.metrics is not None:
+            self.metrics.inc("http_rejected_total", (("reason", reason),))
+
+    def admit(self, connection, address):
+        """ Проверка лимита соединений с одного IP """
+        return self.limiter is None or self.limiter.acquire(connection,
+                                                            address)
+
+    def release(self, connection):
+        if self.limiter is not None:
+            self.limiter.release(connection)
+
+    async def serve_asyncio(self, server_socket):
+        """ Сервер на asyncio streams: одно ядро, тысячи соединений """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_threads)
+        self.compose_middleware()
+        server_socket.setblocking(False)
+        connections = set()
+
+        async def handle(reader, writer):
+            if not self.admit(writer, writer.get_extra_info("peername")):
+                self.record_rejected("per_ip")
+                writer.write(self.too_many_connections_response)
+                writer.close()
+                return
+            task = asyncio.current_task()
+            connections.add(task)
+            try:
+                await self.handle_client_async(reader, writer)
+            finally:
+                connections.discard(task)
+
+        server = await asyncio.start_server(handle, sock=server_socket)
+        while not self.stopping.is_set():
+            self.check_reload()
+            await asyncio.sleep(self.poll_interval)
+        server.close()  # Новые соединения больше не принимаются
+        for writer in self.idle_connections.copy():
+            writer.close()
+        if connections:
+            _, pending = await asyncio.wait(connections,
+                                            timeout=self.shutdown_timeout)
+            if pending:
+                self.logger.warning(f"Shutdown timeout: {len(pending)} "
+                                    f"connection(s) still in progress")
+                for task in pending:
+                    task.cancel()
+        await server.wait_closed()
+        await self.shutdown()
+
     def use(self, middleware):
-        """ Регистрация промежуточных обработчиков (middleware) """
+        """ Регистрация промежуточных обработчиков (middleware).
+
+        mw(request, call_next) - слой «луковицы» (sync или async),
+        mw(environ) - прежний формат с ключами method и path.
+        Первый зарегистрированный middleware - внешний слой.
+        """
         self.middleware.append(middleware)
+        self.chain = self.async_chain = None
+        return middleware
+
+    def before_request(self, func):
+        """ Хук до обработчика; вернул ответ - обработчик не вызывается """
+        self.use(HookLayer(before=func))
+        return func
+
+    def after_request(self, func):
+        """ Хук после обработчика: func(request, response) -> ответ """
+        self.use(HookLayer(after=func))
+        return func
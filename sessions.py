@@ -0,0 +1,353 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from middleware import Layer
+from response import Response
+
+logger = logging.getLogger("SimpleFramework.sessions")
+
+
+def sign(value, secret):
+    """ value.подпись: HMAC-SHA256 в base64url без выравнивания """
+    digest = hmac.new(secret, value.encode("ascii"), hashlib.sha256).digest()
+    return value + "." + base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def unsign(signed, secret):
+    """ Значение из подписанной строки или None, если подпись не сходится """
+    value, sep, _ = signed.rpartition(".")
+    if not sep or not value.isascii():
+        return None
+    if not hmac.compare_digest(sign(value, secret), signed):
+        return None
+    return value
+
+
+class MemoryStore:
+    """ Сессии в памяти процесса: LRU с ограничением числа и TTL простоя.
+
+    Порядок OrderedDict - порядок последнего обращения; раз TTL считается
+    от обращения, первыми истекают самые старые записи, и sweep снимает
+    их с начала, не просматривая остальные.
+    """
+
+    def __init__(self, max_sessions=100000, ttl=3600, lock=None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.entries = OrderedDict()  # sid -> (истекает, данные в JSON)
+        self.lock = lock or threading.Lock()
+        self.evictions = 0
+
+    def load(self, sid):
+        with self.lock:
+            entry = self.entries.get(sid)
+            if entry is None:
+                return None
+            now = time.monotonic()
+            if entry[0] <= now:
+                del self.entries[sid]
+                return None
+            self.entries[sid] = (now + self.ttl, entry[1])
+            self.entries.move_to_end(sid)
+        return json.loads(entry[1])
+
+    def save(self, sid, data):
+        entry = (time.monotonic() + self.ttl, json.dumps(data))
+        with self.lock:
+            self.entries[sid] = entry
+            self.entries.move_to_end(sid)
+            while len(self.entries) > self.max_sessions:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, sid):
+        with self.lock:
+            self.entries.pop(sid, None)
+
+    def sweep(self):
+        """ Удаляет истекшие сессии; возвращает их число """
+        removed = 0
+        now = time.monotonic()
+        with self.lock:
+            entries = self.entries
+            while entries:
+                sid = next(iter(entries))
+                if entries[sid][0] > now:
+                    break
+                del entries[sid]
+                removed += 1
+        return removed
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SQLiteStore:
+    """ Сессии в файле SQLite, общем для процессов одного хоста.
+
+    WAL позволяет читать параллельно с записью; у каждого потока свое
+    соединение. Срок хранится по часам стены (time.time), одинаковым для
+    всех процессов. Чтение продлевает срок, только когда прошло больше
+    половины TTL, - иначе каждый запрос был бы записью в файл.
+    """
+
+    def __init__(self, path, ttl=3600, timeout=5.0):
+        self.path = path
+        self.ttl = ttl
+        self.timeout = timeout
+        self.local = threading.local()
+        with self.connection() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS sessions ("
+                       "sid TEXT PRIMARY KEY, expires REAL NOT NULL, "
+                       "data TEXT NOT NULL) WITHOUT ROWID")
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_expires "
+                       "ON sessions (expires)")
+
+    def connection(self):
+        db = getattr(self.local, "db", None)
+        if db is None or self.local.pid != os.getpid():
+            # Соединение SQLite нельзя использовать после fork
+            db = sqlite3.connect(self.path, timeout=self.timeout,
+                                 isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            # Чтение страниц через mmap, без копий в кэш каждого процесса
+            db.execute("PRAGMA mmap_size=268435456")
+            self.local.db = db
+            self.local.pid = os.getpid()
+        return db
+
+    def load(self, sid):
+        db = self.connection()
+        row = db.execute("SELECT expires, data FROM sessions WHERE sid = ?",
+                         (sid,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[0] <= now:
+            db.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+            return None
+        if row[0] - now < self.ttl / 2:
+            db.execute("UPDATE sessions SET expires = ? WHERE sid = ?",
+                       (now + self.ttl, sid))
+        return json.loads(row[1])
+
+    def save(self, sid, data):
+        self.connection().execute(
+            "INSERT OR REPLACE INTO sessions (sid, expires, data) "
+            "VALUES (?, ?, ?)", (sid, time.time() + self.ttl, json.dumps(data)))
+
+    def delete(self, sid):
+        self.connection().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def sweep(self):
+        cursor = self.connection().execute(
+            "DELETE FROM sessions WHERE expires <= ?", (time.time(),))
+        return cursor.rowcount
+
+    def __len__(self):
+        return self.connection().execute(
+            "SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class Session(MutableMapping):
+    """ Данные сессии запроса; хранилище читается при первом обращении.
+
+    Изменение вложенных объектов не отслеживается - после него нужно
+    выставить session.modified = True.
+    """
+    __slots__ = ("store", "sid", "_data", "modified", "new", "invalidated")
+
+    def __init__(self, store, sid):
+        self.store = store
+        self.sid = sid  # None - у клиента еще нет сессии
+        self._data = None
+        self.modified = False
+        self.new = False
+        self.invalidated = False
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    @property
+    def changed(self):
+        """ Ответ поставит cookie - такой ответ нельзя кэшировать """
+        return self.invalidated or self.modified
+
+    def _load(self):
+        data = self._data
+        if data is None:
+            if self.sid is not None:
+                data = self.store.load(self.sid)
+            if data is None:
+                data = {}
+                self.sid = secrets.token_urlsafe(24)
+                self.new = True
+            self._data = data
+        return data
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self._load()[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def regenerate(self):
+        """ Новый идентификатор с теми же данными (после входа в систему) """
+        data = self._load()
+        if not self.new:
+            self.store.delete(self.sid)
+        self.sid = secrets.token_urlsafe(24)
+        self._data = data
+        self.new = self.modified = True
+
+    def invalidate(self):
+        """ Удаляет сессию из хранилища и cookie у клиента """
+        self._data = {}
+        self.invalidated = True
+
+    def __repr__(self):
+        return f"Session({self.sid!r}, {self._data!r})"
+
+
+class SessionManager:
+    """ Подписанная cookie с идентификатором, хранилище и фоновая чистка """
+
+    def __init__(self, store, secret, cookie_name="session", ttl=3600,
+                 secure=False, same_site="Lax", sweep_interval=60.0):
+        if not secret:
+            raise ValueError("Session secret must not be empty")
+        self.store = store
+        self.secret = secret.encode("utf-8") if isinstance(secret, str) \
+            else secret
+        self.cookie_name = cookie_name
+        self.ttl = ttl
+        self.secure = secure
+        self.same_site = same_site
+        self.sweep_interval = sweep_interval
+        self.swept = 0
+        self.stop_event = None
+        self.sweeper = None
+
+    def session_for(self, request):
+        """ Session запроса без обращения к хранилищу """
+        sid = None
+        signed = request.cookies.get(self.cookie_name)
+        if signed:
+            sid = unsign(signed, self.secret)
+        return Session(self.store, sid)
+
+    def cookie(self, sid, max_age):
+        parts = [f"{self.cookie_name}={sign(sid, self.secret)}", "Path=/",
+                 f"Max-Age={max_age}", "HttpOnly"]
+        if self.same_site:
+            parts.append(f"SameSite={self.same_site}")
+        if self.secure:
+            parts.append("Secure")
+        return "; ".join(parts)
+
+    def commit(self, session, response):
+        """ Сохраняет измененную сессию и ставит cookie в ответ """
+        if not session.loaded:
+            return response  # Обработчик сессию не трогал
+        if session.invalidated:
+            if session.sid is None:
+                return response
+            if not session.new:
+                self.store.delete(session.sid)
+            cookie = self.cookie(session.sid, 0)
+        elif session.modified:
+            self.store.save(session.sid, session._data)
+            # Max-Age cookie продлевается вместе со сроком в хранилище
+            cookie = self.cookie(session.sid, self.ttl)
+        else:
+            return response
+        if isinstance(response, Response):
+            response.headers.append(("Set-Cookie", cookie))
+            return response
+        # Готовый ответ (404, ошибка): cookie - сразу после строки статуса,
+        # иначе сессия осталась бы в хранилище без клиента
+        line = f"Set-Cookie: {cookie}\r\n"
+        if isinstance(response, bytes):
+            status, sep, rest = response.partition(b"\r\n")
+            return status + sep + line.encode("latin-1") + rest
+        status, sep, rest = response.partition("\r\n")
+        return status + sep + line + rest
+
+    def start_sweeper(self):
+        """ Фоновый поток, раз в sweep_interval удаляющий истекшие сессии """
+        if self.sweep_interval is None or self.sweeper is not None:
+            return
+        self.stop_event = threading.Event()
+        self.sweeper = threading.Thread(target=self.sweep_loop,
+                                        args=(self.stop_event,),
+                                        name="session-sweeper", daemon=True)
+        self.sweeper.start()
+
+    def restart_sweeper(self):
+        # Поток не переживает fork - в дочернем процессе запускаем новый
+        if self.sweeper is not None:
+            self.sweeper = None
+            self.start_sweeper()
+
+    def stop_sweeper(self):
+        if self.sweeper is not None:
+            self.stop_event.set()
+            self.sweeper.join()
+            self.sweeper = None
+
+    def sweep_loop(self, stop_event):
+        while not stop_event.wait(self.sweep_interval):
+            try:
+                self.swept += self.store.sweep()
+            except sqlite3.OperationalError:
+                pass  # Занятый файл SQLite - попробуем в следующий раз
+            except Exception:
+                logger.exception("Session sweep failed")
+
+
+class Sessions(Layer):
+    """ Слой middleware: request.session до обработчика, сохранение после """
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def wrap(self, call_next):
+        manager = self.manager
+
+        def layer(request):
+            session = request.session = manager.session_for(request)
+            return manager.commit(session, call_next(request))
+
+        return layer
+
+    def wrap_async(self, call_next, max_workers=None):
+        manager = self.manager
+
+        async def layer(request):
+            session = request.session = manager.session_for(request)
+            return manager.commit(session, await call_next(request))
+
+        return layer
@@ -0,0 +1,221 @@
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import unquote
+
+from compression import EXTENSIONS, negotiate
+from response import FileResponse, Response
+
+
+class StaticFiles:
+    """ Раздача файлов из static_folder: sendfile, 304, Range и LRU-кэш мелких файлов """
+
+    def __init__(self, folder, cache_max_bytes=8 * 1024 * 1024,
+                 cache_max_entries=256, cache_max_file_size=64 * 1024):
+        self.folder = folder
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_max_entries = cache_max_entries
+        self.cache_max_file_size = cache_max_file_size
+        self.cache = OrderedDict()  # путь -> (mtime_ns, size, bytes)
+        self.cache_bytes = 0
+        self.lock = threading.Lock()
+        self.compressor = None  # Compressor: отдавать соседние .br/.gz
+
+    def resolve(self, relative_path):
+        """ Путь к файлу внутри папки или None (защита от ../) """
+        relative_path = unquote(relative_path.split("?", 1)[0])
+        root = os.path.realpath(self.folder)
+        file_path = os.path.realpath(os.path.join(root, relative_path))
+        if not file_path.startswith(root + os.sep):
+            return None
+        return file_path
+
+    def serve(self, relative_path, request=None):
+        """ Response/FileResponse для файла или None, если файла нет """
+        file_path = self.resolve(relative_path)
+        if file_path is None:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not os.path.isfile(file_path):
+            return None
+
+        mime_type, _ = mimetypes.guess_type(file_path)
+        mime_type = mime_type or "application/octet-stream"
+        compressible = (self.compressor is not None and request is not None
+                        and self.compressor.compressible(mime_type,
+                                                         stat.st_size))
+        encoding = None
+        if compressible and request.get_header("Range") is None:
+            variant = self.compressed_variant(file_path, stat, request)
+            if variant is not None:
+                # Готовый сжатый файл: ни байта CPU на сжатие при запросе
+                encoding, file_path, stat = variant
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        headers = [
+            ("ETag", etag),
+            ("Last-Modified", formatdate(stat.st_mtime, usegmt=True)),
+            ("Accept-Ranges", "bytes"),
+        ]
+        if compressible:
+            headers.append(("Vary", "Accept-Encoding"))
+        if encoding is not None:
+            headers.append(("Content-Encoding", encoding))
+
+        if request is not None and self.not_modified(request, etag,
+                                                     stat.st_mtime):
+            return Response(b"", "304 Not Modified", mime_type, headers)
+
+        byte_range = None
+        if request is not None:
+            range_header = request.get_header("Range")
+            if_range = request.get_header("If-Range")
+            if range_header and (if_range is None or if_range == etag):
+                byte_range = self.parse_range(range_header, stat.st_size)
+                if byte_range == "unsatisfiable":
+                    return Response(
+                        b"", "416 Range Not Satisfiable", mime_type,
+                        [("Content-Range", f"bytes */{stat.st_size}")])
+
+        if byte_range is not None:
+            start, end = byte_range
+            headers.append(("Content-Range",
+                            f"bytes {start}-{end}/{stat.st_size}"))
+            data = self.cached(file_path, stat)
+            if data is not None:
+                return Response(data[start:end + 1], "206 Partial Content",
+                                mime_type, headers)
+            return FileResponse(file_path, "206 Partial Content", mime_type,
+                                offset=start, length=end - start + 1,
+                                headers=headers)
+
+        data = self.cached(file_path, stat)
+        if data is not None:
+            return Response(data, "200 OK", mime_type, headers)
+        return FileResponse(file_path, "200 OK", mime_type,
+                            length=stat.st_size, headers=headers)
+
+    def compressed_variant(self, file_path, stat, request):
+        """ (кодировка, путь, stat) свежего соседнего .br/.gz или None """
+        accept_encoding = request.get_header("Accept-Encoding")
+        if not accept_encoding:
+            return None
+        for encoding in self.compressor.encodings:
+            if negotiate(accept_encoding, (encoding,)) is None:
+                continue
+            variant_path = file_path + EXTENSIONS[encoding]
+            try:
+                variant_stat = os.stat(variant_path)
+            except OSError:
+                continue
+            if variant_stat.st_mtime_ns >= stat.st_mtime_ns:
+                return encoding, variant_path, variant_stat
+        return None
+
+    def precompress(self):
+        """ Создает (или обновляет устаревшие) .br/.gz рядом с файлами;
+        возвращает число записанных файлов """
+        written = 0
+        suffixes = tuple(EXTENSIONS.values())
+        for root, _, files in os.walk(self.folder):
+            for file_name in files:
+                if file_name.endswith(suffixes):
+                    continue
+                path = os.path.join(root, file_name)
+                stat = os.stat(path)
+                mime_type, _ = mimetypes.guess_type(path)
+                if not self.compressor.compressible(
+                        mime_type or "application/octet-stream",
+                        stat.st_size):
+                    continue
+                data = None
+                for encoding in self.compressor.encodings:
+                    target = path + EXTENSIONS[encoding]
+                    try:
+                        if os.stat(target).st_mtime_ns >= stat.st_mtime_ns:
+                            continue
+                    except FileNotFoundError:
+                        pass
+                    if data is None:
+                        with open(path, "rb") as f:
+                            data = f.read()
+                    temporary = target + ".tmp"
+                    with open(temporary, "wb") as f:
+                        f.write(self.compressor.compress(data, encoding))
+                    os.replace(temporary, target)  # Атомарно для читателей
+                    written += 1
+        return written
+
+    @staticmethod
+    def not_modified(request, etag, mtime):
+        if_none_match = request.get_header("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags or f"W/{etag}" in tags
+        if_modified_since = request.get_header("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    @staticmethod
+    def parse_range(header, size):
+        """ (start, end) для одного диапазона bytes=..., иначе None """
+        unit, _, ranges = header.partition("=")
+        if unit.strip() != "bytes" or "," in ranges:
+            return None  # Несколько диапазонов не поддерживаем - отдаем весь файл
+        start, sep, end = ranges.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if start == "":
+                # Суффикс: последние N байт
+                length = int(end)
+                if length <= 0:
+                    return "unsatisfiable"
+                return max(0, size - length), size - 1
+            start = int(start)
+            end = int(end) if end else size - 1
+        except ValueError:
+            return None
+        if start >= size or end < start:
+            return "unsatisfiable"
+        return start, min(end, size - 1)
+
+    def cached(self, file_path, stat):
+        """ Содержимое мелкого файла из LRU-кэша (с чтением при промахе) """
+        if stat.st_size > self.cache_max_file_size:
+            return None
+        with self.lock:
+            entry = self.cache.get(file_path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns,
+                                                   stat.st_size):
+                self.cache.move_to_end(file_path)
+                return entry[2]
+
+        with open(file_path, "rb") as f:
+            data = f.read()
+
+        with self.lock:
+            old = self.cache.pop(file_path, None)
+            if old is not None:
+                self.cache_bytes -= len(old[2])
+            self.cache[file_path] = (stat.st_mtime_ns, stat.st_size, data)
+            self.cache_bytes += len(data)
+            while (len(self.cache) > self.cache_max_entries
+                   or self.cache_bytes > self.cache_max_bytes):
+                _, evicted = self.cache.popitem(last=False)
+                self.cache_bytes -= len(evicted[2])
+        return data
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.cache_bytes = 0
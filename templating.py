@@ -0,0 +1,117 @@
+import os
+import re
+
+PLACEHOLDER = re.compile(r"\{\{\s*(.+?)\s*\}\}")
+
+
+class Template:
+    """ Шаблон, разобранный один раз на литералы и подстановки {{ key }} """
+
+    def __init__(self, source):
+        self.parts = []  # Литералы и исходный текст подстановок
+        self.slots = []  # (индекс в parts, имя переменной)
+        position = 0
+        for match in PLACEHOLDER.finditer(source):
+            if match.start() > position:
+                self.parts.append(source[position:match.start()])
+            self.slots.append((len(self.parts), match.group(1)))
+            self.parts.append(match.group(0))
+            position = match.end()
+        if position < len(source):
+            self.parts.append(source[position:])
+
+    def render(self, context):
+        # Переменные, которых нет в context, остаются в тексте как есть
+        parts = self.parts.copy()
+        for index, name in self.slots:
+            if name in context:
+                parts[index] = str(context[name])
+        return "".join(parts)
+
+
+class TemplateLoader:
+    """ Кэш скомпилированных шаблонов с инвалидацией по mtime файла """
+
+    def __init__(self, folder, auto_reload=True):
+        self.folder = folder
+        self.auto_reload = auto_reload
+        self.cache = {}  # имя -> (mtime_ns, Template)
+
+    def get_template(self, name):
+        cached = self.cache.get(name)
+        if cached is not None and not self.auto_reload:
+            return cached[1]
+
+        path = os.path.join(self.folder, name)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Template '{name}' not found") from None
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, "r", encoding="utf-8") as f:
+            template = Template(f.read())
+        self.cache[name] = (mtime, template)
+        return template
+
+    def precompile(self):
+        """ Компилирует все шаблоны из папки (например, при старте) """
+        for root, _, files in os.walk(self.folder):
+            for file_name in files:
+                if file_name.startswith("."):
+                    continue
+                path = os.path.join(root, file_name)
+                self.get_template(os.path.relpath(path, self.folder))
+        return len(self.cache)
+
+    def clear(self):
+        self.cache.clear()
+
+    def render(self, name, context):
+        return self.get_template(name).render(context)
+
+
+class Jinja2Loader:
+    """ Необязательный движок Jinja2 с общим кэшем байткода """
+
+    def __init__(self, folder, auto_reload=True, bytecode_cache_dir=None):
+        try:
+            import jinja2
+        except ImportError:
+            raise RuntimeError(
+                "template_engine='jinja2' requires the jinja2 package"
+            ) from None
+        # Байткод на диске общий для всех процессов и перезапусков
+        self.environment = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(folder),
+            auto_reload=auto_reload,
+            bytecode_cache=jinja2.FileSystemBytecodeCache(bytecode_cache_dir),
+        )
+        self.not_found = jinja2.TemplateNotFound
+
+    def get_template(self, name):
+        try:
+            return self.environment.get_template(name)
+        except self.not_found:
+            raise FileNotFoundError(f"Template '{name}' not found") from None
+
+    def precompile(self):
+        names = self.environment.list_templates()
+        for name in names:
+            self.get_template(name)
+        return len(names)
+
+    def clear(self):
+        self.environment.cache.clear()
+
+    def render(self, name, context):
+        return self.get_template(name).render(context)
+
+
+def create_loader(engine, folder, auto_reload=True):
+    if engine == "simple":
+        return TemplateLoader(folder, auto_reload)
+    if engine == "jinja2":
+        return Jinja2Loader(folder, auto_reload)
+    raise ValueError(f"Unknown template engine: {engine}")
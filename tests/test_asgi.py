@@ -0,0 +1,199 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from response import HtmlResponse, JsonResponse, StreamingResponse
+from server import SimpleFramework
+
+
+class ASGIClient:
+    """ Тестовый клиент ASGI в том же процессе, без сети """
+
+    def __init__(self, app):
+        self.app = app
+
+    def request(self, method, path, body=b"", headers=(), chunks=None,
+                extensions=None):
+        return asyncio.run(self._request(method, path, body, headers, chunks,
+                                         extensions))
+
+    async def _request(self, method, path, body, headers, chunks, extensions):
+        path, _, query = path.partition("?")
+        scope = {"type": "http", "asgi": {"version": "3.0"},
+                 "http_version": "1.1", "method": method, "path": path,
+                 "raw_path": path.encode(), "query_string": query.encode(),
+                 "headers": [(name.lower().encode(), value.encode())
+                             for name, value in headers],
+                 "extensions": extensions or {}}
+        incoming = [{"type": "http.request", "body": chunk, "more_body": True}
+                    for chunk in (chunks or [])]
+        incoming.append({"type": "http.request", "body": body,
+                         "more_body": False})
+        messages = []
+
+        async def receive():
+            if incoming:
+                return incoming.pop(0)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.app.asgi(scope, receive, send)
+        start = messages[0]
+        return (start["status"],
+                {name.decode(): value.decode()
+                 for name, value in start["headers"]},
+                messages[1:])
+
+    def lifespan(self):
+        return asyncio.run(self._lifespan())
+
+    async def _lifespan(self):
+        incoming = [{"type": "lifespan.startup"},
+                    {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        await self.app.asgi({"type": "lifespan"}, receive, send)
+        return sent
+
+
+def body_of(messages):
+    return b"".join(message.get("body", b"") for message in messages)
+
+
+class TestASGI(unittest.TestCase):
+    def setUp(self):
+        self.app = SimpleFramework()
+        self.client = ASGIClient(self.app)
+
+        @self.app.route("/user/<name>")
+        async def user(app, name):
+            return HtmlResponse(f"<h1>{name}</h1>")
+
+        @self.app.route("/sync")
+        def sync(app):
+            return JsonResponse({"sync": True})
+
+        @self.app.route("/submit", methods=["POST"])
+        def submit(app):
+            return JsonResponse({"ok": True})
+
+        @self.app.route("/stream")
+        def stream(app):
+            async def chunks():
+                yield "a"
+                yield "b"
+
+            return StreamingResponse(chunks())
+
+    def test_async_handler(self):
+        """Тест async-обработчика с параметрами маршрута"""
+        status, headers, messages = self.client.request("GET", "/user/alice")
+        self.assertEqual(status, 200)
+        self.assertEqual(body_of(messages), b"<h1>alice</h1>")
+        self.assertEqual(headers["content-length"], "14")
+
+    def test_sync_handler(self):
+        """Тест sync-обработчика в пуле потоков"""
+        status, headers, messages = self.client.request("GET", "/sync")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-type"], "application/json")
+        self.assertEqual(body_of(messages), b'{"sync": true}')
+
+    def test_request_headers(self):
+        """Тест заголовков запроса без учета регистра имени"""
+        @self.app.route("/headers")
+        def headers(app, request):
+            return JsonResponse({
+                "type": request.headers.get("Content-Type"),
+                "accept": request.get_header("ACCEPT"),
+                "missing": request.get_header("X-Missing", "-")})
+
+        _, _, messages = self.client.request(
+            "GET", "/headers", headers=[("Content-Type", "text/plain"),
+                                        ("Accept", "a"), ("Accept", "b")])
+        self.assertEqual(body_of(messages),
+                         b'{"type": "text/plain", "accept": "a, b", '
+                         b'"missing": "-"}')
+
+    def test_request_body_chunks(self):
+        """Тест тела запроса из нескольких сообщений"""
+        status, _, _ = self.client.request("POST", "/submit", body=b"}",
+                                           chunks=[b'{"a":', b" 1"])
+        self.assertEqual(status, 200)
+
+    def test_body_limit(self):
+        """Тест 413 при превышении max_body_bytes"""
+        self.app.max_body_bytes = 4
+        status, _, _ = self.client.request("POST", "/submit",
+                                           body=b"0123456789")
+        self.assertEqual(status, 413)
+
+    def test_not_found_and_middleware(self):
+        """Тест 404 и общей цепочки middleware"""
+        def rewrite(environ):
+            environ["path"] = "/sync"
+            return environ
+
+        status, _, _ = self.client.request("GET", "/missing")
+        self.assertEqual(status, 404)
+        self.app.use(rewrite)
+        status, _, _ = self.client.request("GET", "/missing")
+        self.assertEqual(status, 200)
+
+    def test_streaming(self):
+        """Тест потоковой отдачи: по сообщению на чанк"""
+        status, headers, messages = self.client.request("GET", "/stream")
+        self.assertEqual(status, 200)
+        self.assertNotIn("transfer-encoding", headers)
+        self.assertEqual([m.get("body") for m in messages], [b"a", b"b", b""])
+        self.assertTrue(messages[0]["more_body"])
+        self.assertFalse(messages[-1].get("more_body", False))
+
+    def test_static_file(self):
+        """Тест раздачи файла блоками и через pathsend"""
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        with open(os.path.join(folder.name, "data.bin"), "wb") as f:
+            f.write(b"x" * 100000)
+        self.app.static_files.folder = folder.name
+        self.app.static_files.cache_max_file_size = 0
+
+        status, _, messages = self.client.request("GET", "/static/data.bin")
+        self.assertEqual(status, 200)
+        self.assertEqual(body_of(messages), b"x" * 100000)
+
+        _, _, messages = self.client.request(
+            "GET", "/static/data.bin",
+            extensions={"http.response.pathsend": {}})
+        self.assertEqual(messages[0]["type"], "http.response.pathsend")
+
+    def test_lifespan(self):
+        """Тест событий lifespan и хуков запуска/остановки"""
+        events = []
+
+        @self.app.on_startup
+        async def start(app):
+            events.append("startup")
+
+        @self.app.on_shutdown
+        def stop(app):
+            events.append("shutdown")
+
+        sent = self.client.lifespan()
+        self.assertEqual(sent, ["lifespan.startup.complete",
+                                "lifespan.shutdown.complete"])
+        self.assertEqual(events, ["startup", "shutdown"])
+        self.assertIsNone(self.app.executor)
+
+
+if __name__ == "__main__":
+    unittest.main()
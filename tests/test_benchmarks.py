@@ -0,0 +1,55 @@
+import importlib.util
+import os
+import unittest
+
+PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    "benchmarks", "run.py")
+spec = importlib.util.spec_from_file_location("benchmarks_run", PATH)
+run = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(run)
+
+
+class TestCompare(unittest.TestCase):
+    def test_threshold(self):
+        """Тест: время выросло больше порога, rps упал больше порога"""
+        baseline = {"parser.get": 10.0, "router.static": 1.0,
+                    "load.threads.c1.rps": 1000.0}
+        current = {"parser.get": 11.0, "router.static": 1.5,
+                   "load.threads.c1.rps": 800.0}
+        regressions = run.compare(current, baseline, 0.15)
+        self.assertEqual([name for name, *_ in regressions],
+                         ["router.static", "load.threads.c1.rps"])
+        self.assertAlmostEqual(regressions[0][3], 0.5)
+        self.assertAlmostEqual(regressions[1][3], 0.2)
+
+    def test_improvement_is_not_regression(self):
+        self.assertEqual(run.compare({"parser.get": 5.0,
+                                      "load.asyncio.c1.rps": 2000.0},
+                                     {"parser.get": 10.0,
+                                      "load.asyncio.c1.rps": 1000.0}, 0.15),
+                         [])
+
+    def test_errors_against_zero_baseline(self):
+        """Тест: 0 -> N ошибок - регрессия, хотя относительного роста нет"""
+        regressions = run.compare({"load.threads.c1.errors": 3},
+                                  {"load.threads.c1.errors": 0}, 0.15)
+        self.assertEqual(regressions,
+                         [("load.threads.c1.errors", 0, 3, float("inf"))])
+        self.assertEqual(run.compare({"load.threads.c1.errors": 0},
+                                     {"load.threads.c1.errors": 0}, 0.15), [])
+
+    def test_missing_metric(self):
+        """Тест: метрика базы, пропавшая из прогона, - регрессия"""
+        regressions = run.compare({"parser.get": 10.0},
+                                  {"parser.get": 10.0, "parser.post": 12.0},
+                                  0.15)
+        self.assertEqual(regressions,
+                         [("parser.post", 12.0, None, float("inf"))])
+
+    def test_new_metric_ignored(self):
+        self.assertEqual(run.compare({"parser.get": 10.0, "parser.new": 1.0},
+                                     {"parser.get": 10.0}, 0.15), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
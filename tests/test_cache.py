@@ -0,0 +1,202 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from cache import ResponseCache, RouteMemo
+from response import HtmlResponse, JsonResponse, TextResponse
+from server import SimpleFramework
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_lru_by_entries(self):
+        """Тест вытеснения самой старой записи по числу записей"""
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", TextResponse("a"), ttl=60)
+        cache.set("b", TextResponse("b"), ttl=60)
+        cache.get("a")
+        cache.set("c", TextResponse("c"), ttl=60)
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_lru_by_bytes(self):
+        """Тест ограничения по объему"""
+        first = ResponseCache().set("x", TextResponse("x"), ttl=60)
+        cache = ResponseCache(max_bytes=len(first.data) * 2)
+        for key in "abc":
+            cache.set(key, TextResponse(key), ttl=60)
+        self.assertEqual(len(cache.entries), 2)
+        self.assertLessEqual(cache.size, cache.max_bytes)
+
+    def test_ttl(self):
+        """Тест истечения времени жизни"""
+        cache = ResponseCache()
+        with patch("cache.time.monotonic", return_value=100.0):
+            cache.set("a", TextResponse("a"), ttl=10)
+        with patch("cache.time.monotonic", return_value=105.0):
+            self.assertIsNotNone(cache.get("a"))
+        with patch("cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["entries"], 0)
+
+
+class TestCachedRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = SimpleFramework()
+        self.calls = 0
+
+        @self.app.cache(ttl=60, vary=["Accept-Language"])
+        @self.app.route("/")
+        def index(app):
+            self.calls += 1
+            return HtmlResponse(f"<h1>{self.calls}</h1>")
+
+    def get(self, *headers):
+        lines = "".join(f"{header}\r\n" for header in headers)
+        return self.app.handle_request(f"GET / HTTP/1.1\r\n{lines}\r\n")
+
+    def test_cached_route(self):
+        """Тест повторного ответа из кэша без вызова обработчика"""
+        first = self.get()
+        second = self.get()
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+        self.assertIn(b"ETag: ", first)
+        self.assertIn(b"Vary: Accept-Language", first)
+        self.assertEqual(self.app.response_cache.stats()["hits"], 1)
+
+    def test_conditional_get(self):
+        """Тест 304 по ETag из кэша"""
+        response = self.get()
+        etag = response.split(b"ETag: ")[1].split(b"\r\n")[0].decode()
+        not_modified = self.get(f"If-None-Match: {etag}")
+        self.assertTrue(not_modified.startswith(b"HTTP/1.1 304 Not Modified"))
+        self.assertNotIn(b"<h1>", not_modified)
+
+    def test_vary(self):
+        """Тест отдельных записей для разных значений Vary"""
+        self.get("Accept-Language: ru")
+        self.get("Accept-Language: en")
+        self.get("Accept-Language: ru")
+        self.assertEqual(self.calls, 2)
+
+    def test_error_not_cached(self):
+        """Тест: ответы с ошибкой не кэшируются"""
+        @self.app.cache(ttl=60)
+        @self.app.route("/missing")
+        def missing(app):
+            return TextResponse("nope", status="404 Not Found")
+
+        request = "GET /missing HTTP/1.1\r\n\r\n"
+        self.app.handle_request(request)
+        self.app.handle_request(request)
+        self.assertEqual(len(self.app.response_cache.entries), 0)
+
+    def test_post_not_cached(self):
+        """Тест: ответы на POST не кэшируются и не берутся из кэша"""
+        @self.app.cache(ttl=60)
+        @self.app.route("/form", methods=["GET", "POST"])
+        def form(app):
+            self.calls += 1
+            return TextResponse(str(self.calls))
+
+        self.app.handle_request("GET /form HTTP/1.1\r\n\r\n")
+        for _ in range(2):
+            response = self.app.handle_request(
+                "POST /form HTTP/1.1\r\nContent-Length: 0\r\n\r\n")
+            self.assertNotIn(b"ETag: ", response)
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(len(self.app.response_cache.entries), 1)
+
+
+
+class TestRouteMemo(unittest.TestCase):
+    def test_lru(self):
+        memo = RouteMemo(2, "/user/<name>")
+        memo.set(("a",), b"A")
+        memo.set(("b",), b"B")
+        self.assertEqual(memo.get(("a",)), b"A")
+        memo.set(("c",), b"C")
+        self.assertIsNone(memo.get(("b",)))
+        stats = memo.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual((stats["entries"], stats["evictions"]), (2, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+
+class TestMemoizedRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = SimpleFramework()
+        self.calls = []
+
+        @self.app.route("/user/<username>/json", memoize=2)
+        def show_user(app, username):
+            self.calls.append(username)
+            return JsonResponse({"username": username})
+
+        @self.app.route("/about", static=True)
+        def about(app):
+            self.calls.append("about")
+            return TextResponse("about")
+
+    def get(self, path):
+        return self.app.handle_request(f"GET {path} HTTP/1.1\r\n\r\n")
+
+    def test_memoized_by_params(self):
+        """Тест: обработчик вызывается раз на значение параметров"""
+        first = self.get("/user/alice/json")
+        self.assertEqual(self.get("/user/alice/json?x=1"), first)
+        self.get("/user/bob/json")
+        self.assertEqual(self.calls, ["about", "alice", "bob"])
+        self.assertTrue(first.endswith(b'{"username": "alice"}'))
+        stats = self.app.memo_stats()["/user/<username>/json"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_static_serialized_at_registration(self):
+        self.assertEqual(self.calls, ["about"])
+        self.assertTrue(self.get("/about").endswith(b"about"))
+        self.get("/about")
+        self.assertEqual(self.calls, ["about"])
+        self.assertEqual(self.app.memo_stats()["/about"]["hit_ratio"], 1.0)
+
+    def test_async_engine(self):
+        request = "GET /user/carol/json HTTP/1.1\r\n\r\n"
+        first = asyncio.run(self.app.handle_request_async(request))
+        second = asyncio.run(self.app.handle_request_async(request))
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls.count("carol"), 1)
+
+    def test_compressed_variants(self):
+        """Тест: сжатый и несжатый ответы хранятся раздельно"""
+        self.app.enable_compression(min_size=1)
+        plain = self.get("/user/dave/json")
+        gzipped = self.app.handle_request(
+            "GET /user/dave/json HTTP/1.1\r\nAccept-Encoding: gzip\r\n\r\n")
+        self.assertNotIn(b"Content-Encoding", plain)
+        self.assertIn(b"Content-Encoding: gzip", gzipped)
+        self.assertEqual(self.calls.count("dave"), 2)
+
+    def test_hit_ratio_in_metrics(self):
+        self.app.enable_metrics()
+        self.get("/user/erin/json")
+        self.get("/user/erin/json")
+        body = self.get("/metrics").decode()
+        self.assertIn('http_route_memo_total{route="/user/<username>/json",'
+                      'result="hit"} 1', body)
+
+    def test_request_handler_rejected(self):
+        with self.assertRaises(ValueError):
+            @self.app.route("/echo/<name>", memoize=10)
+            def echo(app, name, request):
+                return TextResponse(name)
+
+        with self.assertRaises(ValueError):
+            @self.app.route("/item/<id>", static=True)
+            def item(app, id):
+                return TextResponse(id)
+
+
+if __name__ == "__main__":
+    unittest.main()
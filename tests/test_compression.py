@@ -0,0 +1,137 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compression import Compressor, add_vary, negotiate
+from request_ import Request
+from response import HtmlResponse, JsonResponse
+from server import SimpleFramework
+
+PAGE = "<p>" + "hello world " * 200 + "</p>"
+
+
+def split(raw):
+    head, _, body = raw.partition(b"\r\n\r\n")
+    return head.decode(), body
+
+
+class TestNegotiation(unittest.TestCase):
+    def test_quality_values(self):
+        """Тест выбора кодировки по q и предпочтению сервера"""
+        self.assertEqual(negotiate("gzip, br", ("br", "gzip")), "br")
+        self.assertEqual(negotiate("gzip;q=1, br;q=0.5", ("br", "gzip")),
+                         "gzip")
+        self.assertIsNone(negotiate("gzip;q=0", ("gzip",)))
+        self.assertEqual(negotiate("*", ("gzip",)), "gzip")
+        self.assertIsNone(negotiate("identity", ("gzip",)))
+        self.assertIsNone(negotiate(None, ("gzip",)))
+
+    def test_threshold_and_types(self):
+        """Тест порога размера и сжимаемых типов"""
+        compressor = Compressor(min_size=100)
+        self.assertTrue(compressor.compressible("text/html", 100))
+        self.assertFalse(compressor.compressible("text/html", 99))
+        self.assertFalse(compressor.compressible("image/png", 10000))
+
+    def test_add_vary(self):
+        """Тест объединения заголовка Vary"""
+        headers = [("Vary", "Accept-Language")]
+        add_vary(headers, "Accept-Encoding")
+        add_vary(headers, "accept-encoding")
+        self.assertEqual(headers,
+                         [("Vary", "Accept-Language, Accept-Encoding")])
+
+
+class TestCompressedResponses(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.app = SimpleFramework(static_folder=self.folder)
+        self.calls = 0
+
+        @self.app.route("/page")
+        def page(app):
+            return HtmlResponse(PAGE)
+
+        @self.app.route("/small")
+        def small(app):
+            return JsonResponse({"a": 1})
+
+        @self.app.cache(ttl=60)
+        @self.app.route("/cached")
+        def cached(app):
+            self.calls += 1
+            return HtmlResponse(PAGE)
+
+    def get(self, path, encoding=None):
+        header = f"Accept-Encoding: {encoding}\r\n" if encoding else ""
+        response = self.app.handle_request(
+            f"GET {path} HTTP/1.1\r\n{header}\r\n")
+        if isinstance(response, str):
+            response = response.encode()
+        elif not isinstance(response, bytes):
+            response = response.to_http_response()
+        return split(response)
+
+    def test_gzip_negotiated(self):
+        """Тест сжатия gzip и заголовков"""
+        self.app.enable_compression(level=9)
+        head, body = self.get("/page", "gzip")
+        self.assertIn("Content-Encoding: gzip", head)
+        self.assertIn("Vary: Accept-Encoding", head)
+        self.assertIn(f"Content-Length: {len(body)}", head)
+        self.assertEqual(gzip.decompress(body).decode(), PAGE)
+
+    def test_not_compressed(self):
+        """Тест: без Accept-Encoding, ниже порога и без enable_compression"""
+        head, body = self.get("/page", "gzip")
+        self.assertNotIn("Content-Encoding", head)
+        self.app.enable_compression()
+        head, body = self.get("/page")
+        self.assertNotIn("Content-Encoding", head)
+        self.assertIn("Vary: Accept-Encoding", head)
+        head, _ = self.get("/small", "gzip")
+        self.assertNotIn("Content-Encoding", head)
+
+    def test_cached_variants(self):
+        """Тест отдельных вариантов кэша для разных кодировок"""
+        self.app.enable_compression()
+        gzip_head, gzip_body = self.get("/cached", "gzip")
+        plain_head, plain_body = self.get("/cached")
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.get("/cached", "gzip")[1], gzip_body)
+        self.assertEqual(self.get("/cached")[1], plain_body)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(gzip.decompress(gzip_body), plain_body)
+        self.assertIn("Content-Encoding: gzip", gzip_head)
+        self.assertNotIn("Content-Encoding", plain_head)
+
+    def test_precompressed_static(self):
+        """Тест статики из соседнего .gz, созданного при старте"""
+        path = os.path.join(self.folder, "app.js")
+        with open(path, "w") as f:
+            f.write("console.log(1);\n" * 200)
+        compressor = self.app.enable_compression(precompress_static=True)
+        self.assertTrue(os.path.exists(path + ".gz"))
+        self.assertEqual(self.app.static_files.precompress(), 0)
+
+        request = Request("GET /static/app.js HTTP/1.1\r\n"
+                          "Accept-Encoding: gzip\r\n\r\n")
+        response = self.app.static_files.serve("app.js", request)
+        self.assertIn(("Content-Encoding", "gzip"), response.headers)
+        self.assertIn(("Vary", "Accept-Encoding"), response.headers)
+        self.assertIn("javascript", response.content_type)
+        self.assertEqual(gzip.decompress(response.body),
+                         b"console.log(1);\n" * 200)
+
+        ranged = self.app.static_files.serve("app.js", Request(
+            "GET /static/app.js HTTP/1.1\r\nAccept-Encoding: gzip\r\n"
+            "Range: bytes=0-3\r\n\r\n"))
+        self.assertEqual(ranged.body, b"cons")
+        self.assertEqual(compressor.encodings[-1], "gzip")
+
+
+if __name__ == "__main__":
+    unittest.main()
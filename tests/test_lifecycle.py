@@ -0,0 +1,267 @@
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+
+from response import TextResponse
+from server import SimpleFramework
+from reloader import FileWatcher
+
+
+class ServerThread:
+    """ Сервер на свободном порту в фоновом потоке """
+
+    def __init__(self, app, engine="threads"):
+        self.app = app
+        self.socket = app.create_server_socket("127.0.0.1", 0)
+        self.port = self.socket.getsockname()[1]
+        self.thread = threading.Thread(target=app.serve,
+                                       args=(self.socket, engine), daemon=True)
+        self.thread.start()
+
+    def connect(self):
+        return socket.create_connection(("127.0.0.1", self.port), timeout=5)
+
+    def stop(self):
+        self.app.request_stop()
+        self.thread.join(timeout=10)
+
+
+def read_all(sock):
+    chunks = []
+    while chunk := sock.recv(65536):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class TestGracefulShutdown(unittest.TestCase):
+    def setUp(self):
+        self.app = SimpleFramework(poll_interval=0.05, shutdown_timeout=2.0)
+        self.started = threading.Event()
+
+        @self.app.route("/slow")
+        def slow(app):
+            self.started.set()
+            time.sleep(0.3)
+            return TextResponse("done")
+
+    def test_in_flight_request_finishes(self):
+        """Тест: запрос в работе дорабатывает, новые соединения не принимаются"""
+        server = ServerThread(self.app)
+        client = server.connect()
+        client.sendall(b"GET /slow HTTP/1.1\r\n\r\n")
+        self.started.wait(5)
+        server.app.request_stop()
+        response = read_all(client)
+        self.assertIn(b"200 OK", response)
+        self.assertIn(b"Connection: close", response)
+        self.assertTrue(response.endswith(b"done"))
+        server.thread.join(timeout=5)
+        self.assertFalse(server.thread.is_alive())
+        with self.assertRaises(OSError):
+            server.connect()
+
+    def test_queued_connection_served(self):
+        """Тест: соединение, ждавшее в очереди, получает ответ при остановке"""
+        self.app.max_threads = 1
+        server = ServerThread(self.app)
+        busy = server.connect()
+        self.addCleanup(busy.close)
+        busy.sendall(b"GET /slow HTTP/1.1\r\n\r\n")
+        self.started.wait(5)
+        queued = server.connect()
+        self.addCleanup(queued.close)
+        queued.sendall(b"GET /missing HTTP/1.1\r\n\r\n")
+        time.sleep(0.1)
+        server.app.request_stop()
+        self.assertTrue(read_all(busy).endswith(b"done"))
+        response = read_all(queued)
+        self.assertIn(b"404", response)
+        self.assertIn(b"Connection: close", response)
+        server.thread.join(timeout=5)
+
+    def test_idle_keep_alive_closed(self):
+        """Тест: простаивающее keep-alive соединение закрывается сразу"""
+        self.app.keep_alive_timeout = 30
+        server = ServerThread(self.app)
+        client = server.connect()
+        client.sendall(b"GET /missing HTTP/1.1\r\n\r\n")
+        self.assertIn(b"404", client.recv(65536))
+        start = time.monotonic()
+        server.stop()
+        self.assertEqual(read_all(client), b"")
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_deadline(self):
+        """Тест: зависший запрос не держит остановку дольше shutdown_timeout"""
+        self.app.shutdown_timeout = 0.1
+        hooks = []
+        self.app.on_shutdown(lambda app: hooks.append("shutdown"))
+        server = ServerThread(self.app)
+        client = server.connect()
+        client.sendall(b"GET /slow HTTP/1.1\r\n\r\n")
+        self.started.wait(5)
+        start = time.monotonic()
+        server.stop()
+        self.assertLess(time.monotonic() - start, 0.3)
+        self.assertEqual(hooks, ["shutdown"])
+        client.close()
+
+    def test_asyncio_engine(self):
+        server = ServerThread(self.app, engine="asyncio")
+        client = server.connect()
+        client.sendall(b"GET /slow HTTP/1.1\r\n\r\n")
+        self.started.wait(5)
+        server.app.request_stop()
+        self.assertTrue(read_all(client).endswith(b"done"))
+        server.thread.join(timeout=5)
+        self.assertFalse(server.thread.is_alive())
+
+    def test_wsgi_engine(self):
+        """Тест: под wsgi запрос дорабатывает, простой закрывается сразу"""
+        server = ServerThread(self.app, engine="wsgi")
+        idle = server.connect()
+        self.addCleanup(idle.close)
+        client = server.connect()
+        self.addCleanup(client.close)
+        client.sendall(b"GET /slow HTTP/1.1\r\n\r\n")
+        self.started.wait(5)
+        start = time.monotonic()
+        server.app.request_stop()
+        self.assertTrue(read_all(client).endswith(b"done"))
+        self.assertEqual(read_all(idle), b"")
+        server.thread.join(timeout=5)
+        self.assertFalse(server.thread.is_alive())
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_wsgi_deadline(self):
+        """Тест: недосланный запрос не держит остановку wsgi дольше срока"""
+        self.app.shutdown_timeout = 0.2
+        self.app.header_timeout = 30
+        self.app.logger.disabled = True
+        self.addCleanup(setattr, self.app.logger, "disabled", False)
+        server = ServerThread(self.app, engine="wsgi")
+        client = server.connect()
+        self.addCleanup(client.close)
+        client.sendall(b"GET /slow HTTP/1.1\r\nX-Part")
+        time.sleep(0.1)
+        start = time.monotonic()
+        server.stop()
+        self.assertFalse(server.thread.is_alive())
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(read_all(client), b"")
+
+
+ROUTES = """
+from reload_test_app import app
+from response import TextResponse
+
+
+@app.route("/version")
+def version(app):
+    return TextResponse("{version}")
+"""
+
+
+class TestReload(unittest.TestCase):
+    def setUp(self):
+        self.app = SimpleFramework()
+        holder = types.ModuleType("reload_test_app")
+        holder.app = self.app
+        sys.modules["reload_test_app"] = holder
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = os.path.join(folder.name, "reload_test_routes.py")
+        self.write("v1")
+        sys.path.insert(0, folder.name)
+        self.addCleanup(sys.path.remove, folder.name)
+        self.addCleanup(sys.modules.pop, "reload_test_app", None)
+        self.addCleanup(sys.modules.pop, "reload_test_routes", None)
+        sys.dont_write_bytecode, previous = True, sys.dont_write_bytecode
+        self.addCleanup(setattr, sys, "dont_write_bytecode", previous)
+        __import__("reload_test_routes")
+
+        @self.app.route("/local")
+        def local(app):
+            return TextResponse("local")
+
+    def write(self, version):
+        with open(self.path, "w") as f:
+            f.write(ROUTES.format(version=version))
+
+    def get(self, path):
+        return self.app.handle_request(f"GET {path} HTTP/1.1\r\n\r\n")
+
+    def test_reload_route_module(self):
+        """Тест: модуль маршрутов перечитан, маршруты приложения на месте"""
+        self.assertTrue(self.get("/version").endswith(b"v1"))
+        self.write("version-2")
+        self.assertTrue(self.app.reload())
+        self.assertTrue(self.get("/version").endswith(b"version-2"))
+        self.assertTrue(self.get("/local").endswith(b"local"))
+
+    def test_failed_reload_keeps_routes(self):
+        with open(self.path, "w") as f:
+            f.write("def broken(:\n")
+        self.app.logger.disabled = True
+        self.addCleanup(setattr, self.app.logger, "disabled", False)
+        self.assertFalse(self.app.reload())
+        self.assertTrue(self.get("/version").endswith(b"v1"))
+
+    def test_reload_requested_by_serve_loop(self):
+        """Тест: флаг (как от SIGHUP) обрабатывает цикл accept"""
+        self.app.poll_interval = 0.05
+        server = ServerThread(self.app)
+        self.write("version-3")
+        self.app.request_reload()
+        deadline = time.monotonic() + 5
+        while self.app.reload_requested and time.monotonic() < deadline:
+            time.sleep(0.02)
+        server.stop()
+        self.assertTrue(self.get("/version").endswith(b"version-3"))
+
+
+SUBCLASS = """
+from server import SimpleFramework
+
+
+class App(SimpleFramework):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+"""
+
+
+class TestOwnerModule(unittest.TestCase):
+    def test_owner_module(self):
+        """Тест: владелец - модуль, создавший приложение, а не модуль
+        подкласса; import_name задает его явно"""
+        module = types.ModuleType("owner_test_subclass")
+        exec(SUBCLASS, module.__dict__)
+        self.assertEqual(SimpleFramework().owner_module, __name__)
+        self.assertEqual(module.App().owner_module, __name__)
+        self.assertEqual(module.App(import_name="myapp").owner_module,
+                         "myapp")
+
+
+class TestFileWatcher(unittest.TestCase):
+    def test_change_triggers_callback(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        path = os.path.join(folder.name, "page.html")
+        with open(path, "w") as f:
+            f.write("a")
+        changed = threading.Event()
+        watcher = FileWatcher(lambda: [folder.name], changed.set, 0.02)
+        watcher.start()
+        self.addCleanup(watcher.stop)
+        time.sleep(0.05)
+        os.utime(path, ns=(0, 0))
+        self.assertTrue(changed.wait(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import socket
+import threading
+import time
+import unittest
+
+from limits import ConnectionLimiter
+from response import TextResponse
+from server import SimpleFramework
+
+
+class SlowClient(threading.Thread):
+    """ Клиент, который шлет запрос по кусочку с паузами (slowloris) """
+
+    def __init__(self, port, data, delay, piece=1):
+        super().__init__(daemon=True)
+        self.port = port
+        self.data = data
+        self.delay = delay
+        self.piece = piece
+        self.response = b""
+        self.elapsed = None
+
+    def run(self):
+        started = time.monotonic()
+        with socket.create_connection(("127.0.0.1", self.port),
+                                      timeout=10) as sock:
+            try:
+                for i in range(0, len(self.data), self.piece):
+                    sock.sendall(self.data[i:i + self.piece])
+                    # Пауза - ожидание ответа: сервер может ответить, не
+                    # дождавшись конца запроса
+                    sock.settimeout(self.delay)
+                    try:
+                        self.response = sock.recv(65536)
+                    except socket.timeout:
+                        continue
+                    break
+                sock.settimeout(10)
+                while chunk := sock.recv(65536):
+                    self.response += chunk
+            except OSError:
+                pass  # Сервер закрыл соединение, не дочитав
+        self.elapsed = time.monotonic() - started
+
+
+class LimitsMixin:
+    """ Одни и те же сценарии для каждого движка """
+    engine = None
+    app_protocol = b"HTTP/1.1"  # Версия в ответах, прошедших приложение
+
+    def setUp(self):
+        self.app = SimpleFramework(max_threads=2, poll_interval=0.05,
+                                   keep_alive_timeout=1.0,
+                                   header_timeout=0.4, body_timeout=0.4,
+                                   max_header_bytes=1024, max_body_bytes=1024,
+                                   max_connections_per_ip=4)
+        self.app.logger.disabled = True
+
+        @self.app.route("/", methods=["GET", "POST"])
+        def index(app):
+            return TextResponse("ok")
+
+        server_socket = self.app.create_server_socket("127.0.0.1", 0)
+        self.port = server_socket.getsockname()[1]
+        self.thread = threading.Thread(target=self.app.serve,
+                                       args=(server_socket, self.engine),
+                                       daemon=True)
+        self.thread.start()
+        self.addCleanup(self.stop)
+
+    def stop(self):
+        self.app.request_stop()
+        self.thread.join(timeout=10)
+
+    def request(self, data):
+        with socket.create_connection(("127.0.0.1", self.port),
+                                      timeout=5) as sock:
+            sock.sendall(data)
+            response = b""
+            try:
+                while chunk := sock.recv(65536):
+                    response += chunk
+            except ConnectionResetError:
+                pass  # Сервер закрыл сокет с недочитанным телом
+            return response
+
+    def test_slow_headers_get_408(self):
+        """Тест: байт в 0.1 с не продлевает срок на заголовки"""
+        client = SlowClient(self.port, b"GET / HTTP/1.1\r\n" + b"X" * 100,
+                            0.1)
+        client.start()
+        client.join(10)
+        self.assertTrue(client.response.startswith(b"HTTP/1.1 408"))
+        self.assertLess(client.elapsed, 2.0)
+
+    def test_slow_body_gets_408(self):
+        client = SlowClient(self.port, b"POST / HTTP/1.1\r\n"
+                            b"Content-Length: 100\r\n\r\n" + b"x" * 100,
+                            0.1, piece=5)
+        client.start()
+        client.join(10)
+        self.assertTrue(client.response.startswith(b"HTTP/1.1 408"))
+
+    def test_size_limits(self):
+        response = self.request(b"GET / HTTP/1.1\r\nX-Big: " + b"x" * 2000
+                                + b"\r\n\r\n")
+        self.assertTrue(response.startswith(b"HTTP/1.1 431"))
+        response = self.request(b"POST / HTTP/1.1\r\n"
+                                b"Content-Length: 5000\r\n\r\n")
+        self.assertTrue(response.startswith(self.app_protocol + b" 413"))
+
+    def test_connections_per_ip(self):
+        idle = [socket.create_connection(("127.0.0.1", self.port))
+                for _ in range(4)]
+        for sock in idle:
+            self.addCleanup(sock.close)
+        time.sleep(0.2)
+        response = self.request(b"GET / HTTP/1.1\r\n\r\n")
+        self.assertTrue(response.startswith(b"HTTP/1.1 429"))
+        self.assertEqual(self.app.rejected, 1)
+        for sock in idle:
+            sock.close()
+        time.sleep(0.3)
+        response = self.request(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")
+        self.assertTrue(response.startswith(self.app_protocol + b" 200"))
+
+    def test_served_while_slow_clients_hang(self):
+        """Тест: медленных клиентов больше, чем потоков, а запрос проходит"""
+        slow = [SlowClient(self.port, b"GET / HTTP/1.1\r\n" + b"X" * 100, 0.1)
+                for _ in range(3)]
+        for client in slow:
+            client.start()
+        time.sleep(0.1)
+        started = time.monotonic()
+        response = self.request(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")
+        self.assertTrue(response.startswith(self.app_protocol + b" 200"))
+        self.assertLess(time.monotonic() - started, 2.0)
+        for client in slow:
+            client.join(10)
+
+
+class TestThreadsLimits(LimitsMixin, unittest.TestCase):
+    engine = "threads"
+
+
+class TestAsyncioLimits(LimitsMixin, unittest.TestCase):
+    engine = "asyncio"
+
+
+class TestReactorLimits(LimitsMixin, unittest.TestCase):
+    engine = "reactor"
+
+
+class TestWSGILimits(LimitsMixin, unittest.TestCase):
+    engine = "wsgi"
+    app_protocol = b"HTTP/1.0"  # Строку статуса пишет wsgiref
+
+
+class TestConnectionLimiter(unittest.TestCase):
+    def test_acquire_release(self):
+        limiter = ConnectionLimiter(2)
+        self.assertTrue(limiter.acquire("a", ("10.0.0.1", 1)))
+        self.assertTrue(limiter.acquire("b", ("10.0.0.1", 2)))
+        self.assertFalse(limiter.acquire("c", ("10.0.0.1", 3)))
+        self.assertTrue(limiter.acquire("d", ("10.0.0.2", 1)))
+        limiter.release("a")
+        limiter.release("a")  # Повторный release ничего не ломает
+        self.assertTrue(limiter.acquire("c", ("10.0.0.1", 3)))
+        self.assertEqual(len(limiter), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
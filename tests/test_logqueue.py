@@ -0,0 +1,106 @@
+import io
+import logging
+import queue
+import unittest
+from unittest.mock import MagicMock
+
+from logqueue import AccessLog, BatchStreamHandler, BoundedQueueHandler, LogPipeline
+from server import SimpleFramework
+
+
+def make_record(message):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message,
+                             None, None)
+
+
+class TestLogQueue(unittest.TestCase):
+    def test_drop_when_full(self):
+        """Тест политики drop: переполнение не блокирует и считается"""
+        handler = BoundedQueueHandler(queue.Queue(2))
+        for i in range(5):
+            handler.emit(make_record(f"line {i}"))
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+
+    def test_batch_write(self):
+        """Тест записи пачкой, пока в очереди есть записи"""
+        log_queue = queue.Queue()
+        stream = MagicMock()
+        handler = BatchStreamHandler(log_queue, stream, batch_size=3)
+        log_queue.put("pending")
+        handler.handle(make_record("a"))
+        handler.handle(make_record("b"))
+        stream.write.assert_not_called()
+        handler.handle(make_record("c"))
+        stream.write.assert_called_once_with("a\nb\nc\n")
+
+    def test_pipeline_writes_from_background(self):
+        """Тест доставки записей через фоновый поток"""
+        stream = io.StringIO()
+        pipeline = LogPipeline(stream=stream)
+        logger = logging.getLogger("test_logqueue.pipeline")
+        logger.propagate = False
+        logger.addHandler(pipeline.handler)
+        try:
+            for i in range(100):
+                logger.warning("line %d", i)
+        finally:
+            pipeline.stop()
+            logger.removeHandler(pipeline.handler)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines, [f"line {i}" for i in range(100)])
+
+    def test_access_log_sampling(self):
+        """Тест выборки каждой N-й записи журнала доступа"""
+        logger = MagicMock()
+        access_log = AccessLog(logger, sample_rate=0.25)
+        for i in range(8):
+            access_log.log("connection %s", i)
+        self.assertEqual([c.args[1] for c in logger.info.call_args_list],
+                         [0, 4])
+        disabled = AccessLog(logger, sample_rate=0)
+        disabled.log("connection %s", 1)
+        self.assertEqual(logger.info.call_count, 2)
+
+    def test_no_duplicate_handlers(self):
+        """Тест: повторное создание приложения не добавляет обработчик"""
+        SimpleFramework()
+        SimpleFramework()
+        handlers = [handler for handler in
+                    logging.getLogger("SimpleFramework").handlers
+                    if isinstance(handler, BoundedQueueHandler)]
+        self.assertEqual(len(handlers), 1)
+
+    def test_second_app_reconfigures(self):
+        """Тест: другое приложение с иными настройками меняет конвейер"""
+        self.addCleanup(SimpleFramework)  # Вернуть настройки по умолчанию
+        SimpleFramework(log_queue_size=5, log_overflow="block")
+        handler, = [handler for handler in
+                    logging.getLogger("SimpleFramework").handlers
+                    if isinstance(handler, BoundedQueueHandler)]
+        self.assertEqual(handler.queue.maxsize, 5)
+        self.assertTrue(handler.block)
+        SimpleFramework(log_queue_size=7)
+        self.assertEqual(handler.queue.maxsize, 7)
+        self.assertFalse(handler.block)
+
+    def test_reconfigure_keeps_records(self):
+        """Тест: записи из старой очереди дописываются после смены размера"""
+        stream = io.StringIO()
+        pipeline = LogPipeline(stream, capacity=10)
+        self.addCleanup(pipeline.stop)
+        pipeline.handler.emit(make_record("before"))
+        pipeline.configure(20, block=True)
+        pipeline.handler.emit(make_record("after"))
+        pipeline.stop()
+        self.assertEqual(stream.getvalue(), "before\nafter\n")
+        self.assertEqual(pipeline.handler.queue.maxsize, 20)
+
+    def test_invalid_policy(self):
+        """Тест неизвестной политики переполнения"""
+        with self.assertRaises(ValueError):
+            SimpleFramework(log_overflow="wait")
+
+
+if __name__ == "__main__":
+    unittest.main()
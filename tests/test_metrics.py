@@ -0,0 +1,121 @@
+import socket
+import threading
+import unittest
+
+from metrics import Metrics
+from response import TextResponse
+from server import SimpleFramework
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_buckets(self):
+        """Тест накопительных корзин, суммы и количества"""
+        metrics = Metrics(buckets=(0.1, 1.0))
+        labels = (("route", "/"),)
+        for value in (0.05, 0.5, 5.0):
+            metrics.observe("latency", labels, value)
+        text = metrics.render()
+        self.assertIn('latency_bucket{route="/",le="0.1"} 1', text)
+        self.assertIn('latency_bucket{route="/",le="1.0"} 2', text)
+        self.assertIn('latency_bucket{route="/",le="+Inf"} 3', text)
+        self.assertIn('latency_count{route="/"} 3', text)
+        self.assertIn('latency_sum{route="/"} 5.55', text)
+
+    def test_threads_are_merged(self):
+        """Тест суммирования шардов разных потоков"""
+        metrics = Metrics()
+
+        def work():
+            for _ in range(1000):
+                metrics.inc("hits", (("route", "/"),))
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(metrics.shards), 4)
+        self.assertIn('hits{route="/"} 4000', metrics.render())
+
+    def test_retired_threads(self):
+        """Тест: шард завершившегося потока сливается в итог, а не копится"""
+        metrics = Metrics(buckets=(1.0,))
+
+        def work():
+            metrics.inc("hits", ())
+            metrics.observe("latency", (), 0.5)
+            metrics.retire()
+
+        for _ in range(10):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        self.assertEqual(metrics.shards, [])
+        text = metrics.render()
+        self.assertIn("hits 10", text)
+        self.assertIn('latency_bucket{le="1.0"} 10', text)
+
+    def test_label_escaping(self):
+        """Тест экранирования значений меток"""
+        metrics = Metrics()
+        metrics.inc("hits", (("path", 'a"b\\c'),))
+        self.assertIn('hits{path="a\\"b\\\\c"} 1', metrics.render())
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = SimpleFramework()
+        self.app.enable_metrics()
+
+        @self.app.route("/user/<name>")
+        def user(app, name):
+            return TextResponse(name)
+
+    def serve(self, data):
+        server_socket, client_socket = socket.socketpair()
+        client_socket.sendall(data)
+        client_socket.shutdown(socket.SHUT_WR)
+        self.app.handle_client(server_socket)
+        chunks = []
+        while True:
+            chunk = client_socket.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        client_socket.close()
+        return b"".join(chunks)
+
+    def test_stages_recorded_per_route(self):
+        """Тест счетчиков и гистограмм по шаблону маршрута"""
+        self.serve(b"GET /user/a HTTP/1.1\r\n\r\n"
+                   b"GET /user/b HTTP/1.1\r\n\r\n"
+                   b"GET /missing HTTP/1.1\r\n\r\n")
+        text = self.app.metrics.render()
+        self.assertIn('http_requests_total{method="GET",route="/user/<name>",'
+                      'status="200"} 2', text)
+        self.assertIn('http_requests_total{method="GET",route="<unmatched>",'
+                      'status="404"} 1', text)
+        for stage in ("parse", "route", "handler", "serialize", "send",
+                      "total"):
+            self.assertIn('http_request_duration_seconds_count{'
+                          f'route="/user/<name>",stage="{stage}"}} 2', text)
+
+    def test_metrics_route(self):
+        """Тест маршрута /metrics и gauge очереди и рабочих"""
+        self.app.task_queue.put(object())
+        response = self.serve(b"GET /metrics HTTP/1.1\r\n\r\n")
+        self.assertIn(b"200 OK", response)
+        self.assertIn(b"text/plain; version=0.0.4", response)
+        self.assertIn(b"http_task_queue_depth 1", response)
+        self.assertIn(b"http_busy_workers 0", response)
+        self.assertIn(b"http_worker_threads 0", response)
+
+    def test_disabled_by_default(self):
+        """Тест: без enable_metrics замеры не записываются"""
+        app = SimpleFramework()
+        self.assertIsNone(app.metrics)
+        self.assertIn("404", app.handle_request("GET /metrics HTTP/1.1\r\n\r\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
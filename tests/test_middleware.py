@@ -0,0 +1,205 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from middleware import Layer
+from response import HtmlResponse, TextResponse
+from server import SimpleFramework
+
+REQUEST = "GET /hello HTTP/1.1\r\n\r\n"
+
+
+class TestMiddlewareChain(unittest.TestCase):
+    def setUp(self):
+        self.app = SimpleFramework()
+        self.calls = []
+
+        @self.app.route("/hello")
+        def hello(app):
+            self.calls.append("handler")
+            return TextResponse("hello")
+
+    def test_onion_order(self):
+        """Тест порядка слоев: первый зарегистрированный - внешний"""
+        def outer(request, call_next):
+            self.calls.append("outer:before")
+            response = call_next(request)
+            self.calls.append("outer:after")
+            return response
+
+        def inner(request, call_next):
+            self.calls.append("inner:before")
+            response = call_next(request)
+            self.calls.append("inner:after")
+            return response
+
+        self.app.use(outer)
+        self.app.use(inner)
+        self.app.dispatch(REQUEST)
+        self.assertEqual(self.calls, ["outer:before", "inner:before",
+                                      "handler", "inner:after",
+                                      "outer:after"])
+
+    def test_short_circuit(self):
+        """Тест ответа из before_request без вызова обработчика"""
+        @self.app.before_request
+        def auth(request):
+            if request.get_header("Authorization") is None:
+                return HtmlResponse("<h1>401</h1>", "401 Unauthorized")
+
+        response = self.app.handle_request(REQUEST)
+        self.assertTrue(response.startswith(b"HTTP/1.1 401"))
+        self.assertEqual(self.calls, [])
+        response = self.app.handle_request(
+            "GET /hello HTTP/1.1\r\nAuthorization: x\r\n\r\n")
+        self.assertTrue(response.endswith(b"hello"))
+
+    def test_after_request(self):
+        """Тест постобработки ответа"""
+        @self.app.after_request
+        def add_header(request, response):
+            response.headers.append(("X-Served-By", "test"))
+            return response
+
+        self.assertIn(b"X-Served-By: test\r\n",
+                      self.app.handle_request(REQUEST))
+
+    def test_after_request_on_cached_routes(self):
+        """Тест: хук получает Response и для кэша, и для memoize"""
+        @self.app.route("/cached")
+        @self.app.cache(ttl=60)
+        def cached(app):
+            return TextResponse("cached")
+
+        @self.app.route("/memo/<name>", memoize=4)
+        def memo(app, name):
+            return TextResponse(name)
+
+        @self.app.after_request
+        def add_header(request, response):
+            response.headers.append(("X-Served-By", "test"))
+            return response
+
+        for path in ("/cached", "/memo/a"):
+            request = f"GET {path} HTTP/1.1\r\n\r\n"
+            for _ in range(2):  # Промах и попадание
+                response = self.app.handle_request(request)
+                self.assertTrue(response.startswith(b"HTTP/1.1 200"))
+                self.assertEqual(response.count(b"X-Served-By: test\r\n"), 1)
+                response = asyncio.run(self.app.handle_request_async(request))
+                self.assertEqual(response.count(b"X-Served-By: test\r\n"), 1)
+        # Хук не меняет сохраненный в кэше ответ
+        response = self.app.handle_request(
+            "GET /cached HTTP/1.1\r\nIf-None-Match: *\r\n\r\n")
+        self.assertTrue(response.startswith(b"HTTP/1.1 304"))
+        self.assertIn(b"X-Served-By: test\r\n", response)
+
+    def test_async_middleware_on_threads(self):
+        """Тест async-middleware в синхронной цепочке"""
+        async def timing(request, call_next):
+            response = await call_next(request)
+            response.headers.append(("X-Async", "1"))
+            return response
+
+        self.app.use(timing)
+        self.assertIn(b"X-Async: 1\r\n", self.app.handle_request(REQUEST))
+
+    def test_sync_middleware_on_asyncio(self):
+        """Тест sync-слоя и async-хука в асинхронной цепочке"""
+        def sync_layer(request, call_next):
+            self.calls.append("sync")
+            return call_next(request)
+
+        async def after(request, response):
+            response.headers.append(("X-After", "1"))
+            return response
+
+        self.app.use(sync_layer)
+        self.app.after_request(after)
+        response = asyncio.run(self.app.handle_request_async(REQUEST))
+        self.assertIn(b"X-After: 1\r\n", response)
+        self.assertEqual(self.calls, ["sync", "handler"])
+
+    def test_sync_middleware_single_thread(self):
+        """Тест: sync-слой не занимает единственный поток обработчика"""
+        app = SimpleFramework(max_threads=1)
+
+        @app.route("/hello")
+        def hello(app):
+            return TextResponse("hello")
+
+        app.use(lambda request, call_next: call_next(request))
+        app.use(lambda request, call_next: call_next(request))
+
+        async def serve():
+            app.executor = ThreadPoolExecutor(max_workers=app.max_threads)
+            try:
+                requests = [app.handle_request_async(REQUEST)
+                            for _ in range(4)]
+                return await asyncio.wait_for(asyncio.gather(*requests), 5)
+            finally:
+                app.executor.shutdown(wait=False)
+
+        for response in asyncio.run(serve()):
+            self.assertTrue(response.endswith(b"hello"))
+
+    def test_layer_pool_reused_and_closed(self):
+        """Тест: пул sync-слоя один на слой, пересборка его не плодит,
+        shutdown закрывает"""
+        def layer(request, call_next):
+            return call_next(request)
+
+        self.app.use(layer)
+        self.app.compose_middleware()
+        self.assertIsNone(self.app.layers[layer].pool)  # До первого запроса
+        asyncio.run(self.app.handle_request_async(REQUEST))
+        pool = self.app.layers[layer].pool
+        self.app.use(lambda request, call_next: call_next(request))
+        asyncio.run(self.app.handle_request_async(REQUEST))
+        self.assertIs(self.app.layers[layer].pool, pool)
+        asyncio.run(self.app.shutdown())
+        self.assertIsNone(self.app.layers[layer].pool)
+        self.assertTrue(pool._shutdown)
+
+    def test_environ_middleware(self):
+        """Тест прежнего формата mw(environ)"""
+        def rewrite(environ):
+            environ["path"] = "/hello"
+            return environ
+
+        self.app.use(rewrite)
+        response = self.app.handle_request("GET /old HTTP/1.1\r\n\r\n")
+        self.assertTrue(response.endswith(b"hello"))
+
+    def test_composed_once(self):
+        """Тест: цепочка собирается один раз и пересобирается после use"""
+        self.app.use(lambda request, call_next: call_next(request))
+        self.app.dispatch(REQUEST)
+        chain = self.app.chain
+        self.app.dispatch(REQUEST)
+        self.assertIs(self.app.chain, chain)
+        self.app.use(lambda request, call_next: call_next(request))
+        self.app.dispatch(REQUEST)
+        self.assertIsNot(self.app.chain, chain)
+
+    def test_layer_protocol(self):
+        """Тест: Layer без wrap_async не создается"""
+        class SyncOnly(Layer):
+            def wrap(self, call_next):
+                return call_next
+
+        with self.assertRaises(TypeError):
+            SyncOnly()
+
+    def test_middleware_error(self):
+        """Тест ошибки в middleware - ответ 500"""
+        def broken(request, call_next):
+            raise RuntimeError("boom")
+
+        self.app.use(broken)
+        self.assertIn("500 Internal Server Error",
+                      self.app.handle_request(REQUEST))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import unittest
+from unittest import mock
+
+from prefork import RESTART_DELAY, PreforkServer
+from response import TextResponse
+from server import SimpleFramework
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_master(port, reuse_port):
+    app = SimpleFramework()
+    app.logger.setLevel(logging.CRITICAL)
+
+    @app.route("/pid")
+    def pid(app):
+        return TextResponse(str(os.getpid()))
+
+    app.start_server("127.0.0.1", port, workers=2, reuse_port=reuse_port)
+
+
+def get_pid(port, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1) as s:
+                s.sendall(b"GET /pid HTTP/1.1\r\nConnection: close\r\n\r\n")
+                data = b""
+                while chunk := s.recv(4096):
+                    data += chunk
+            return int(data.rpartition(b"\r\n\r\n")[2])
+        except (OSError, ValueError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "pre-fork requires os.fork")
+class TestPrefork(unittest.TestCase):
+    def start_master(self, reuse_port=False):
+        port = free_port()
+        master = multiprocessing.Process(target=run_master,
+                                         args=(port, reuse_port))
+        master.start()
+        self.addCleanup(master.kill)
+        return master, port
+
+    def test_workers_serve_and_restart(self):
+        """Тест обслуживания рабочими и перезапуска упавшего рабочего"""
+        master, port = self.start_master()
+        pid = get_pid(port)
+        self.assertNotEqual(pid, master.pid)
+
+        os.kill(pid, signal.SIGKILL)
+        deadline = time.monotonic() + 5
+        while get_pid(port) == pid and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertNotEqual(get_pid(port), pid)
+
+        os.kill(master.pid, signal.SIGTERM)
+        master.join(timeout=15)
+        self.assertEqual(master.exitcode, 0)
+
+    def test_rolling_reload(self):
+        """Тест замены рабочих по SIGHUP с SO_REUSEPORT"""
+        master, port = self.start_master(reuse_port=True)
+        before = get_pid(port)
+        os.kill(master.pid, signal.SIGHUP)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                os.kill(before, 0)
+            except ProcessLookupError:
+                break
+            time.sleep(0.05)
+        self.assertNotEqual(get_pid(port), before)
+
+        os.kill(master.pid, signal.SIGTERM)
+        master.join(timeout=15)
+        self.assertEqual(master.exitcode, 0)
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "pre-fork requires os.fork")
+class TestRestartSchedule(unittest.TestCase):
+    def test_crash_loop_restart_is_delayed_not_slept(self):
+        """Тест: reap_workers не спит, замена запускается из цикла позже"""
+        app = SimpleFramework()
+        app.logger.disabled = True
+        self.addCleanup(setattr, app.logger, "disabled", False)
+        server = PreforkServer(app, "127.0.0.1", 0, workers=1)
+        server.workers = {111: time.monotonic()}
+        spawned = []
+        server.spawn_worker = lambda: spawned.append(True)
+        with mock.patch("os.waitpid", side_effect=[(111, 256), (0, 0)]):
+            start = time.monotonic()
+            server.reap_workers()
+            self.assertLess(time.monotonic() - start, 0.5)
+        server.spawn_due()
+        self.assertEqual(spawned, [])
+        later = time.monotonic() + RESTART_DELAY + 0.1
+        with mock.patch("prefork.time.monotonic", return_value=later):
+            server.spawn_due()
+        self.assertEqual(spawned, [True])
+        self.assertEqual(server.restarts, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
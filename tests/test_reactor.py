@@ -0,0 +1,152 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from response import StreamingResponse, TextResponse
+from server import SimpleFramework
+
+
+def read_response(sock):
+    """ Один ответ с Content-Length: (заголовки, тело) """
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("closed before headers")
+        data += chunk
+    head, _, body = data.partition(b"\r\n\r\n")
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.lower() == b"content-length":
+            length = int(value)
+    while len(body) < length:
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("closed before body")
+        body += chunk
+    return head, body
+
+
+class TestReactor(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.static = folder.name
+        self.app = SimpleFramework(static_folder=folder.name, max_threads=1,
+                                   poll_interval=0.05, keep_alive_timeout=2.0)
+        self.app.logger.disabled = True
+
+        @self.app.route("/hello")
+        def hello(app):
+            return TextResponse("Hello")
+
+        @self.app.route("/big")
+        def big(app):
+            return TextResponse("x" * (16 * 1024 * 1024))
+
+        @self.app.route("/fail")
+        def fail(app):
+            raise RuntimeError("boom")
+
+        @self.app.route("/stream")
+        def stream(app):
+            return StreamingResponse(iter(["ab", "cd"]))
+
+        self.socket = self.app.create_server_socket("127.0.0.1", 0)
+        self.port = self.socket.getsockname()[1]
+        self.thread = threading.Thread(target=self.app.serve,
+                                       args=(self.socket, "reactor"),
+                                       daemon=True)
+        self.thread.start()
+        self.addCleanup(self.stop)
+
+    def stop(self):
+        self.app.request_stop()
+        self.thread.join(timeout=10)
+
+    def connect(self):
+        return socket.create_connection(("127.0.0.1", self.port), timeout=5)
+
+    def test_keep_alive_and_pipelining(self):
+        with self.connect() as client:
+            client.sendall(b"GET /hello HTTP/1.1\r\n\r\n")
+            head, body = read_response(client)
+            self.assertTrue(head.startswith(b"HTTP/1.1 200"))
+            self.assertEqual(body, b"Hello")
+            client.sendall(b"GET /hello HTTP/1.1\r\n\r\n"
+                           b"GET /missing HTTP/1.1\r\n\r\n")
+            self.assertEqual(read_response(client)[1], b"Hello")
+            self.assertIn(b"404", read_response(client)[0])
+
+    def test_slow_client_does_not_hold_worker(self):
+        """Тест: недосланные заголовки не занимают единственный поток"""
+        slow = self.connect()
+        self.addCleanup(slow.close)
+        slow.sendall(b"GET /hello HTTP/1.1\r\nHost: ")
+        started = time.monotonic()
+        with self.connect() as client:
+            client.sendall(b"GET /hello HTTP/1.1\r\n\r\n")
+            self.assertEqual(read_response(client)[1], b"Hello")
+        self.assertLess(time.monotonic() - started, 1.0)
+        slow.sendall(b"localhost\r\n\r\n")
+        self.assertEqual(read_response(slow)[1], b"Hello")
+
+    def test_large_response_to_slow_reader(self):
+        """Тест: ответ больше буфера сокета дописывается по EVENT_WRITE"""
+        with self.connect() as client:
+            client.sendall(b"GET /big HTTP/1.1\r\n\r\n")
+            time.sleep(0.2)
+            with self.connect() as other:
+                other.sendall(b"GET /hello HTTP/1.1\r\n\r\n")
+                self.assertEqual(read_response(other)[1], b"Hello")
+            self.assertEqual(len(read_response(client)[1]), 16 * 1024 * 1024)
+
+    def test_static_file(self):
+        data = os.urandom(3 * 1024 * 1024)
+        with open(os.path.join(self.static, "blob.bin"), "wb") as f:
+            f.write(data)
+        with self.connect() as client:
+            client.sendall(b"GET /static/blob.bin HTTP/1.1\r\n\r\n")
+            head, body = read_response(client)
+            self.assertTrue(head.startswith(b"HTTP/1.1 200"))
+            self.assertEqual(body, data)
+
+    def test_errors(self):
+        with self.connect() as client:
+            client.sendall(b"GET /fail HTTP/1.1\r\n\r\n")
+            self.assertIn(b"500", client.recv(65536))
+        with self.connect() as client:
+            client.sendall(b"NONSENSE\r\n\r\n")
+            self.assertIn(b"400", client.recv(65536))
+            self.assertEqual(client.recv(65536), b"")
+
+    def test_streaming_response(self):
+        with self.connect() as client:
+            client.sendall(b"GET /stream HTTP/1.1\r\nConnection: close\r\n\r\n")
+            data = b""
+            while chunk := client.recv(65536):
+                data += chunk
+            self.assertIn(b"Transfer-Encoding: chunked", data)
+            self.assertTrue(data.endswith(b"2\r\nab\r\n2\r\ncd\r\n0\r\n\r\n"))
+
+    def test_idle_timeout(self):
+        self.app.keep_alive_timeout = 0.1
+        with self.connect() as client:
+            client.sendall(b"GET /hel")
+            self.assertEqual(client.recv(65536), b"")
+
+    def test_graceful_stop(self):
+        with self.connect() as client:
+            client.sendall(b"GET /hello HTTP/1.1\r\n\r\n")
+            read_response(client)
+            self.stop()
+            self.assertFalse(self.thread.is_alive())
+            self.assertEqual(client.recv(65536), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
-from Framework.request import Request
+from request_ import (VALID_BLOCK_MAX_SIZE, VALID_BLOCKS, BufferPool, Headers,
+                      HTTPParseError, Request, RequestParser)
 
 
 class TestRequest(unittest.TestCase):
@@ -19,7 +20,7 @@ class TestRequest(unittest.TestCase):
         self.assertEqual(request.headers["Host"], "localhost")
         self.assertEqual(request.headers["User-Agent"], "curl/7.68.0")
         self.assertEqual(request.headers["Accept"], "*/*")
-        self.assertEqual(request.body, "")
+        self.assertEqual(request.body, b"")
 
     def test_parse_http_request_post(self):
         raw_request = (
@@ -42,7 +43,10 @@ class TestRequest(unittest.TestCase):
             request.headers["Content-Type"], "application/x-www-form-urlencoded"
         )
         self.assertEqual(request.headers["Content-Length"], "27")
-        self.assertEqual(request.body, "field1=value1&field2=value2")
+        self.assertEqual(request.body, b"field1=value1&field2=value2")
+        self.assertEqual(request.text, "field1=value1&field2=value2")
+        self.assertEqual(request.form,
+                         {"field1": "value1", "field2": "value2"})
 
     def test_parse_http_request_no_headers(self):
         raw_request = "GET / HTTP/1.1\r\n" "\r\n"
@@ -52,7 +56,7 @@ class TestRequest(unittest.TestCase):
         self.assertEqual(request.endpoint, "/")
         self.assertEqual(request.protocol, "HTTP/1.1")
         self.assertEqual(request.headers, {})
-        self.assertEqual(request.body, "")
+        self.assertEqual(request.body, b"")
 
     def test_parse_http_request_empty_body(self):
         raw_request = (
@@ -72,4 +76,220 @@ class TestRequest(unittest.TestCase):
             request.headers["Content-Type"], "application/x-www-form-urlencoded"
         )
         self.assertEqual(request.headers["Content-Length"], "0")
-        self.assertEqual(request.body, "")
+        self.assertEqual(request.body, b"")
+
+    def test_parse_invalid_request_line(self):
+        with self.assertRaises(ValueError):
+            Request("GARBAGE\r\n\r\n")
+
+    def test_json_body(self):
+        request = Request(
+            'POST /api HTTP/1.1\r\nContent-Length: 13\r\n\r\n{"a": [1, 2]}'
+        )
+        self.assertEqual(request.json, {"a": [1, 2]})
+
+
+class TestLazyRequest(unittest.TestCase):
+    def test_path_and_query_params(self):
+        request = Request("GET /search?q=a+b&empty=&q=c HTTP/1.1\r\n\r\n")
+        self.assertEqual(request.path, "/search")
+        self.assertEqual(request.query_string, "q=a+b&empty=&q=c")
+        self.assertEqual(request.query_params, {"q": "c", "empty": ""})
+        self.assertIs(request.query_params, request.query_params)
+
+    def test_query_params_follow_rewritten_endpoint(self):
+        request = Request("GET /a?x=1 HTTP/1.1\r\n\r\n")
+        self.assertEqual(request.query_params, {"x": "1"})
+        request.endpoint = "/b?x=2"
+        self.assertEqual(request.query_params, {"x": "2"})
+
+    def test_cookies(self):
+        request = Request("GET / HTTP/1.1\r\n"
+                          "Cookie: sid=abc; theme=\"dark\"; broken\r\n\r\n")
+        self.assertEqual(request.cookies, {"sid": "abc", "theme": "dark"})
+        self.assertEqual(Request("GET / HTTP/1.1\r\n\r\n").cookies, {})
+
+    def test_body_views_are_cached(self):
+        request = Request("POST / HTTP/1.1\r\nContent-Length: 3\r\n\r\na=1")
+        self.assertEqual(request.form, {"a": "1"})
+        self.assertIs(request.form, request.form)
+        self.assertIs(request.text, request.text)
+        self.assertIsNone(Request("GET / HTTP/1.1\r\n\r\n").json)
+
+    def test_slots(self):
+        request = Request()
+        self.assertFalse(hasattr(request, "__dict__"))
+        with self.assertRaises(AttributeError):
+            request.unknown = 1
+
+
+class TestRequestParser(unittest.TestCase):
+    def test_incremental_feed(self):
+        parser = RequestParser()
+        data = (b"POST /upload HTTP/1.1\r\nContent-Length: 4\r\n\r\n"
+                b"\x00\xff\x01\x02")
+        for i in range(len(data) - 1):
+            parser.feed(data[i:i + 1])
+            self.assertIsNone(parser.next_request())
+        parser.feed(data[-1:])
+        request = parser.next_request()
+        self.assertEqual(request.method, "POST")
+        self.assertEqual(request.body, b"\x00\xff\x01\x02")
+
+    def test_pipelined_requests(self):
+        parser = RequestParser()
+        parser.feed(b"GET /a HTTP/1.1\r\n\r\n"
+                    b"POST /b HTTP/1.1\r\nContent-Length: 2\r\n\r\nok"
+                    b"GET /c HTTP/1.1\r\n")
+        self.assertEqual(parser.next_request().endpoint, "/a")
+        request = parser.next_request()
+        self.assertEqual((request.endpoint, request.body), ("/b", b"ok"))
+        self.assertIsNone(parser.next_request())
+        parser.feed(b"\r\n")
+        self.assertEqual(parser.next_request().endpoint, "/c")
+
+    def test_chunked_body(self):
+        parser = RequestParser()
+        parser.feed(b"POST /c HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+                    b"5\r\nhello\r\n")
+        self.assertIsNone(parser.next_request())
+        parser.feed(b"6;ext=1\r\n world\r\n0\r\nX-Trailer: 1\r\n\r\n"
+                    b"GET /next HTTP/1.1\r\n\r\n")
+        self.assertEqual(parser.next_request().body, b"hello world")
+        self.assertEqual(parser.next_request().endpoint, "/next")
+
+    def test_invalid_chunk_size(self):
+        """Тест: размер чанка - только шестнадцатеричные цифры"""
+        for size in (b"zz", b"-2", b"0x10", b"1_0", b" 10", b""):
+            with self.subTest(size=size):
+                parser = RequestParser()
+                parser.feed(b"POST / HTTP/1.1\r\n"
+                            b"Transfer-Encoding: chunked\r\n\r\n"
+                            + size + b"\r\n")
+                with self.assertRaises(HTTPParseError) as ctx:
+                    parser.next_request()
+                self.assertEqual(ctx.exception.status, "400 Bad Request")
+
+    def test_header_limit(self):
+        parser = RequestParser(max_header_bytes=64)
+        parser.feed(b"GET / HTTP/1.1\r\nX-Long: " + b"a" * 100)
+        with self.assertRaises(HTTPParseError) as ctx:
+            parser.next_request()
+        self.assertEqual(ctx.exception.status,
+                         "431 Request Header Fields Too Large")
+
+    def test_body_limit(self):
+        parser = RequestParser(max_body_bytes=10)
+        parser.feed(b"POST / HTTP/1.1\r\nContent-Length: 11\r\n\r\n")
+        with self.assertRaises(HTTPParseError) as ctx:
+            parser.next_request()
+        self.assertEqual(ctx.exception.status, "413 Payload Too Large")
+
+    def test_chunked_body_limit(self):
+        parser = RequestParser(max_body_bytes=4)
+        parser.feed(b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+                    b"3\r\nabc\r\n3\r\ndef\r\n")
+        with self.assertRaises(HTTPParseError):
+            parser.next_request()
+
+    def test_invalid_content_length(self):
+        for length in (b"-1", b"\xb2", b"1_0"):
+            with self.subTest(length=length):
+                parser = RequestParser()
+                parser.feed(b"POST / HTTP/1.1\r\nContent-Length: " + length
+                            + b"\r\n\r\n")
+                with self.assertRaises(HTTPParseError):
+                    parser.next_request()
+
+    def test_recv_into_large_body(self):
+        """Тест тела больше буфера: читается прямо в отдельный bytearray"""
+        parser = RequestParser(buffer_size=64)
+        body = bytes(range(256)) * 4
+        data = (b"POST /up HTTP/1.1\r\nContent-Length: 1024\r\n\r\n"
+                + body + b"GET /next HTTP/1.1\r\n\r\n")
+        request = None
+        while request is None:
+            target = parser.writable()
+            size = min(len(target), len(data), 50)
+            target[:size] = data[:size]
+            parser.commit(size)
+            data = data[size:]
+            request = parser.next_request()
+        self.assertEqual(request.body, body)
+        parser.feed(data)
+        self.assertEqual(parser.next_request().endpoint, "/next")
+
+    def test_declared_body_not_allocated(self):
+        """Тест: Content-Length без данных не выделяет память под все тело"""
+        parser = RequestParser(buffer_size=64)
+        parser.feed(b"POST /up HTTP/1.1\r\nContent-Length: 10000000\r\n\r\n")
+        self.assertIsNone(parser.next_request())
+        self.assertLessEqual(len(parser.writable()), 128)
+
+    def test_buffer_grows_for_long_headers(self):
+        """Тест роста и сдвига буфера под длинные заголовки"""
+        parser = RequestParser(buffer_size=32)
+        parser.feed(b"GET /a HTTP/1.1\r\n\r\nGET /b HTTP/1.1\r\n")
+        self.assertEqual(parser.next_request().endpoint, "/a")
+        parser.feed(b"X-Long: " + b"v" * 100 + b"\r\n\r\n")
+        request = parser.next_request()
+        self.assertEqual(request.endpoint, "/b")
+        self.assertEqual(request.headers["x-long"], "v" * 100)
+
+    def test_invalid_header_line(self):
+        parser = RequestParser()
+        parser.feed(b"GET / HTTP/1.1\r\nno colon here\r\n\r\n")
+        with self.assertRaises(HTTPParseError):
+            parser.next_request()
+
+    def test_validated_blocks_shared(self):
+        """Тест: проверенный блок заголовков не проверяется заново в другом
+        соединении, длинные блоки не запоминаются"""
+        block = b"X-Shared-Test: 1\r\n"
+        parser = RequestParser()
+        parser.feed(b"GET / HTTP/1.1\r\n" + block + b"\r\n")
+        parser.next_request()
+        self.assertIn(block, VALID_BLOCKS)
+        long_block = b"X-Long: " + b"v" * VALID_BLOCK_MAX_SIZE + b"\r\n"
+        parser.feed(b"GET / HTTP/1.1\r\n" + long_block + b"\r\n")
+        self.assertEqual(parser.next_request().headers["x-long"],
+                         "v" * VALID_BLOCK_MAX_SIZE)
+        self.assertNotIn(long_block, VALID_BLOCKS)
+        parser = RequestParser()
+        parser.feed(b"GET / HTTP/1.1\r\n" + block + b"bad line\r\n\r\n")
+        with self.assertRaises(HTTPParseError):
+            parser.next_request()
+
+    def test_buffer_pool(self):
+        """Тест возврата буфера в пул при закрытии соединения"""
+        pool = BufferPool(size=128, max_buffers=1)
+        parser = RequestParser(pool=pool)
+        buffer = parser.buffer
+        parser.close()
+        self.assertEqual(pool.free, [buffer])
+        self.assertIs(RequestParser(pool=pool).buffer, buffer)
+        self.assertEqual(pool.free, [])
+        pool.release(bytearray(256))  # Выросший буфер не возвращается
+        self.assertEqual(pool.free, [])
+
+
+class TestHeaders(unittest.TestCase):
+    def test_case_insensitive(self):
+        headers = Headers(b"Content-Type: text/html\r\nX-A: 1\r\nx-a: 2")
+        self.assertEqual(headers["content-type"], "text/html")
+        self.assertEqual(headers.get("CONTENT-TYPE"), "text/html")
+        self.assertIn("X-a", headers)
+        self.assertEqual(headers["X-A"], "1, 2")
+        self.assertEqual(list(headers), ["Content-Type", "X-A"])
+        self.assertIsNone(headers.get("Missing"))
+
+    def test_mutation(self):
+        headers = Headers()
+        headers["X-Test"] = "1"
+        self.assertEqual(headers["x-test"], "1")
+        del headers["X-TEST"]
+        self.assertEqual(len(headers), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
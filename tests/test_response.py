@@ -1,5 +1,8 @@
 import unittest
-from response import Response, JsonResponse, HtmlResponse, TextResponse
+from unittest.mock import MagicMock
+from response import (Response, JsonResponse, HtmlResponse, TextResponse,
+                      StreamingResponse, dumps_json, fast_json, send_buffers,
+                      status_line)
 
 
 class TestResponse(unittest.TestCase):
@@ -124,6 +127,70 @@ class TestResponse(unittest.TestCase):
         self.assertIn(b"Content-Type: text/plain", http_response)
         self.assertIn(b"Not Found", http_response)
 
+    def test_json_response_custom_encoder(self):
+        """Тест подключаемого JSON-кодировщика"""
+        response = JsonResponse({"a": 1}, encoder=lambda data: b"encoded")
+        self.assertTrue(response.to_http_response().endswith(b"encoded"))
+        fast = JsonResponse({"a": 1}, encoder=fast_json).to_http_response()
+        self.assertIn(b'"a":', fast)
+
+    def test_response_custom_headers(self):
+        """Тест пользовательских заголовков"""
+        response = HtmlResponse("<p>x</p>", headers=[("X-Test", "1")])
+        self.assertIn(b"\r\nX-Test: 1\r\n", response.to_http_response())
+
+    def test_response_buffers(self):
+        """Тест раздельных буферов заголовков и тела"""
+        response = TextResponse("body")
+        buffers = response.buffers()
+        self.assertEqual(buffers[-1], b"body")
+        self.assertEqual(b"".join(buffers), response.to_http_response())
+        self.assertIs(status_line("200 OK"), status_line("200 OK"))
+
+    def test_send_buffers_partial(self):
+        """Тест досылки при частичной отправке sendmsg"""
+        sent = []
+
+        class Socket:
+            def sendmsg(self, buffers):
+                data = b"".join(bytes(buffer) for buffer in buffers)[:3]
+                sent.append(data)
+                return len(data)
+
+        send_buffers(Socket(), [b"head\r\n", b"", b"body"])
+        self.assertEqual(b"".join(sent), b"head\r\nbody")
+
+    # Тесты для StreamingResponse
+    def test_streaming_response_chunked(self):
+        """Тест chunked-кодирования чанков генератора"""
+        sock = MagicMock()
+        response = StreamingResponse(iter(["ab", b"", b"cde"]))
+        self.assertIn(b"Transfer-Encoding: chunked",
+                      response.stream_header_bytes(chunked=True))
+        response.send(sock, chunked=True)
+        sent = b"".join(call.args[0] for call in sock.sendall.call_args_list)
+        self.assertEqual(sent, b"2\r\nab\r\n3\r\ncde\r\n0\r\n\r\n")
+
+    def test_streaming_response_known_length(self):
+        """Тест потока с известной длиной"""
+        sock = MagicMock()
+        response = StreamingResponse([b"ab", b"cd"], content_length=4)
+        self.assertIn(b"Content-Length: 4",
+                      response.stream_header_bytes(chunked=False))
+        response.send(sock, chunked=False)
+        sent = b"".join(call.args[0] for call in sock.sendall.call_args_list)
+        self.assertEqual(sent, b"abcd")
+
+    def test_streaming_response_async_generator(self):
+        """Тест async-генератора в синхронном to_http_response"""
+        async def produce():
+            for part in ("x", "y"):
+                yield part
+
+        http_response = StreamingResponse(produce()).to_http_response()
+        self.assertIn(b"Content-Length: 2", http_response)
+        self.assertTrue(http_response.endswith(b"xy"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from router import Router
+
+
+class TestRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = Router()
+
+    def test_static_route(self):
+        """Тест статического маршрута"""
+        @self.router.route("/time")
+        def time(app):
+            return None
+
+        self.assertEqual(self.router.get_route("/time", "GET"), (time, {}))
+        self.assertIsNone(self.router.get_route("/time", "POST"))
+
+    def test_param_route(self):
+        """Тест маршрута с параметрами"""
+        @self.router.route("/user/<username>/json")
+        def show_user(app, username):
+            return None
+
+        handler, params = self.router.get_route("/user/alice/json", "GET")
+        self.assertIs(handler, show_user)
+        self.assertEqual(params, {"username": "alice"})
+        self.assertIsNone(self.router.get_route("/user//json", "GET"))
+        self.assertIsNone(self.router.get_route("/user/alice", "GET"))
+
+    def test_static_segment_wins_over_param(self):
+        """Тест приоритета статического сегмента над параметром"""
+        self.router.add_route("/user/<username>", ["GET"], "param")
+        self.router.add_route("/user/me", ["GET"], "static")
+        self.assertEqual(self.router.get_route("/user/me", "GET"),
+                         ("static", {}))
+        self.assertEqual(self.router.get_route("/user/bob", "GET"),
+                         ("param", {"username": "bob"}))
+
+    def test_backtracking_to_param(self):
+        """Тест возврата к параметру, если статическая ветка не подошла"""
+        self.router.add_route("/a/b/c", ["GET"], "static")
+        self.router.add_route("/a/<x>/d", ["GET"], "param")
+        self.assertEqual(self.router.get_route("/a/b/d", "GET"),
+                         ("param", {"x": "b"}))
+
+    def test_different_param_names(self):
+        """Тест разных имен параметров в одной позиции"""
+        self.router.add_route("/item/<item_id>", ["GET"], "item")
+        self.router.add_route("/item/<name>/edit", ["POST"], "edit")
+        self.assertEqual(self.router.get_route("/item/7", "GET"),
+                         ("item", {"item_id": "7"}))
+        self.assertEqual(self.router.get_route("/item/x/edit", "POST"),
+                         ("edit", {"name": "x"}))
+
+    def test_param_inside_segment(self):
+        """Тест параметра внутри сегмента"""
+        self.router.add_route("/file/<name>.txt", ["GET"], "file")
+        self.assertEqual(self.router.get_route("/file/report.txt", "GET"),
+                         ("file", {"name": "report"}))
+
+    def test_duplicate_route(self):
+        """Тест повторной регистрации маршрута"""
+        self.router.add_route("/", ["GET"], "index")
+        with self.assertRaises(ValueError):
+            self.router.add_route("/", ["GET"], "index")
+
+    def test_methods(self):
+        """Тест разных обработчиков для разных методов"""
+        self.router.add_route("/submit", ["GET"], "get")
+        self.router.add_route("/submit", ["POST"], "post")
+        self.assertEqual(self.router.get_route("/submit", "POST"),
+                         ("post", {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
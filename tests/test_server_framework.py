@@ -1,7 +1,10 @@
+import asyncio
+import socket
 import threading
 import unittest
 from unittest.mock import MagicMock, patch
-from response import Response, HtmlResponse, JsonResponse, TextResponse
+from response import (Response, HtmlResponse, JsonResponse, TextResponse,
+                      StreamingResponse)
 from server import SimpleFramework
 
 
@@ -55,29 +58,184 @@ class TestSimpleFramework(unittest.TestCase):
     # Тесты обработки клиента
     def test_handle_client(self):
         """Тест обработки клиентских запросов"""
-        mock_socket = MagicMock()
-        mock_socket.recv.return_value = b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n"
+        server_socket, client_socket = socket.socketpair()
+        client_socket.sendall(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        client_socket.shutdown(socket.SHUT_WR)
 
         @self.app.route("/", methods=["GET"])
         def index(_):
             return HtmlResponse("<h1>Hello, World!</h1>")
 
-        self.app.handle_client(mock_socket)
-        mock_socket.sendall.assert_called_once()
-        response = mock_socket.sendall.call_args[0][0]
+        self.app.handle_client(server_socket)
+        response = self.read_all(client_socket)
+        self.assertEqual(response.count(b"HTTP/1.1"), 1)
         self.assertIn(b"200 OK", response)
         self.assertIn(b"Hello, World!", response)
 
+    def read_all(self, client_socket):
+        chunks = []
+        while True:
+            chunk = client_socket.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        client_socket.close()
+        return b"".join(chunks)
+
+    def serve_raw(self, data, **options):
+        """Отправляет байты в handle_client и возвращает весь ответ"""
+        for name, value in options.items():
+            setattr(self.app, name, value)
+        server_socket, client_socket = socket.socketpair()
+        client_socket.sendall(data)
+        thread = threading.Thread(target=self.app.handle_client,
+                                  args=(server_socket,))
+        thread.start()
+        thread.join(timeout=5)
+        return self.read_all(client_socket)
+
+    # Тесты keep-alive
+    def test_keep_alive_pipelining(self):
+        """Тест нескольких конвейерных запросов в одном соединении"""
+        @self.app.route("/user/<name>")
+        def user(_, name):
+            return TextResponse(name)
+
+        response = self.serve_raw(
+            b"GET /user/first HTTP/1.1\r\nHost: localhost\r\n\r\n"
+            b"GET /user/second HTTP/1.1\r\nHost: localhost\r\n\r\n"
+            b"GET /user/third HTTP/1.1\r\nConnection: close\r\n\r\n",
+            keep_alive_timeout=1.0)
+        self.assertEqual(response.count(b"200 OK"), 3)
+        self.assertLess(response.index(b"first"), response.index(b"second"))
+        self.assertLess(response.index(b"second"), response.index(b"third"))
+        self.assertTrue(response.endswith(b"third"))
+        self.assertIn(b"Connection: close", response)
+
+    def test_keep_alive_post_body(self):
+        """Тест тела запроса по Content-Length в persistent-соединении"""
+        @self.app.route("/submit", methods=["POST"])
+        def submit(_):
+            return TextResponse("ok")
+
+        response = self.serve_raw(
+            b"POST /submit HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello"
+            b"POST /submit HTTP/1.1\r\nContent-Length: 0\r\n"
+            b"Connection: close\r\n\r\n")
+        self.assertEqual(response.count(b"200 OK"), 2)
+
+    def test_http10_closes_connection(self):
+        """Тест закрытия соединения по умолчанию для HTTP/1.0"""
+        @self.app.route("/")
+        def index(_):
+            return TextResponse("index")
+
+        response = self.serve_raw(
+            b"GET / HTTP/1.0\r\n\r\nGET / HTTP/1.0\r\n\r\n")
+        self.assertEqual(response.count(b"200 OK"), 1)
+        self.assertNotIn(b"Connection:", response)
+
+    def test_http10_keep_alive(self):
+        """Тест Connection: keep-alive для HTTP/1.0"""
+        @self.app.route("/")
+        def index(_):
+            return TextResponse("index")
+
+        response = self.serve_raw(
+            b"GET / HTTP/1.0\r\nConnection: keep-alive\r\n\r\n"
+            b"GET / HTTP/1.0\r\n\r\n", keep_alive_timeout=1.0)
+        self.assertEqual(response.count(b"200 OK"), 2)
+        self.assertIn(b"Connection: keep-alive", response)
+
+    def test_max_keep_alive_requests(self):
+        """Тест ограничения числа запросов на соединение"""
+        @self.app.route("/")
+        def index(_):
+            return TextResponse("index")
+
+        response = self.serve_raw(
+            b"GET / HTTP/1.1\r\n\r\n" * 3, max_keep_alive_requests=2,
+            keep_alive_timeout=1.0)
+        self.assertEqual(response.count(b"200 OK"), 2)
+        self.assertIn(b"Connection: close", response)
+
+    def test_chunked_request_body(self):
+        """Тест запроса с Transfer-Encoding: chunked"""
+        @self.app.route("/echo", methods=["POST"])
+        def echo(_):
+            return TextResponse("echo")
+
+        response = self.serve_raw(
+            b"POST /echo HTTP/1.1\r\nTransfer-Encoding: chunked\r\n"
+            b"Connection: close\r\n\r\n4\r\ndata\r\n0\r\n\r\n")
+        self.assertIn(b"200 OK", response)
+
+    def test_request_body_too_large(self):
+        """Тест ответа 413 при превышении max_body_bytes"""
+        response = self.serve_raw(
+            b"POST /submit HTTP/1.1\r\nContent-Length: 100\r\n\r\n",
+            max_body_bytes=10)
+        self.assertIn(b"413 Payload Too Large", response)
+
+    # Тесты потоковых ответов
+    def test_streaming_response_chunked(self):
+        """Тест chunked-ответа из генератора с keep-alive"""
+        @self.app.route("/export")
+        def export(_):
+            return StreamingResponse((f"row{i}\n" for i in range(3)),
+                                     content_type="text/csv")
+
+        response = self.serve_raw(
+            b"GET /export HTTP/1.1\r\n\r\n"
+            b"GET /export HTTP/1.1\r\nConnection: close\r\n\r\n",
+            keep_alive_timeout=1.0)
+        self.assertEqual(response.count(b"Transfer-Encoding: chunked"), 2)
+        self.assertEqual(response.count(b"5\r\nrow2\n\r\n0\r\n\r\n"), 2)
+
+    def test_streaming_response_http10(self):
+        """Тест потока для HTTP/1.0: тело до закрытия соединения"""
+        @self.app.route("/export")
+        def export(_):
+            return StreamingResponse(iter([b"a", b"b"]))
+
+        response = self.serve_raw(
+            b"GET /export HTTP/1.0\r\nConnection: keep-alive\r\n\r\n")
+        self.assertNotIn(b"chunked", response)
+        self.assertTrue(response.endswith(b"\r\n\r\nab"))
+
+    def test_streaming_response_error_aborts(self):
+        """Тест обрыва соединения при ошибке в генераторе"""
+        def broken():
+            yield b"partial"
+            raise RuntimeError("boom")
+
+        @self.app.route("/broken")
+        def export(_):
+            return StreamingResponse(broken())
+
+        response = self.serve_raw(b"GET /broken HTTP/1.1\r\n\r\n")
+        self.assertIn(b"partial", response)
+        self.assertNotIn(b"500 Internal Server Error", response)
+        self.assertNotIn(b"0\r\n\r\n", response)
+
+    def test_keep_alive_idle_timeout(self):
+        """Тест закрытия простаивающего соединения"""
+        server_socket, client_socket = socket.socketpair()
+        self.app.keep_alive_timeout = 0.1
+        self.app.handle_client(server_socket)
+        self.assertEqual(self.read_all(client_socket), b"")
+
     def test_handle_client_error(self):
         """Тест обработки клиентских ошибок"""
         mock_socket = MagicMock()
-        mock_socket.recv.side_effect = Exception("Client error")
+        mock_socket.recv_into.side_effect = Exception("Client error")
         self.app.handle_client(mock_socket)
         mock_socket.sendall.assert_called()
 
     def test_worker(self):
         """Тест рабочего потока"""
         mock_socket = MagicMock()
+        mock_socket.recv_into.return_value = 0  # Клиент закрыл соединение
         self.app.task_queue.put(mock_socket)
         thread = threading.Thread(target=self.app.worker, daemon=True)
         thread.start()
@@ -95,6 +253,113 @@ class TestSimpleFramework(unittest.TestCase):
         self.app.use(test_middleware)
         self.assertIn(test_middleware, self.app.middleware)
 
+    # Тесты режима asyncio
+    def test_handle_request_async_coroutine_handler(self):
+        """Тест async-обработчика в режиме asyncio"""
+        @self.app.route("/async/<name>")
+        async def hello(app, name):
+            await asyncio.sleep(0)
+            return TextResponse(f"Hello {name}")
+
+        response = asyncio.run(self.app.handle_request_async(
+            "GET /async/bob HTTP/1.1\r\nHost: localhost\r\n\r\n"))
+        self.assertIn(b"200 OK", response)
+        self.assertIn(b"Hello bob", response)
+
+    def test_query_string_routing(self):
+        """Тест маршрута с query string и передачи request в обработчик"""
+        @self.app.route("/user/<name>")
+        def user(app, name, request):
+            return TextResponse(f"{name} {request.query_params['y']}")
+
+        @self.app.route("/plain")
+        def plain(app):
+            return TextResponse("plain")
+
+        response = self.app.handle_request(
+            "GET /user/x?y=1 HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        self.assertIn(b"200 OK", response)
+        self.assertIn(b"x 1", response)
+        response = self.app.handle_request("GET /plain?a=b HTTP/1.1\r\n\r\n")
+        self.assertIn(b"plain", response)
+
+    def test_async_handler_receives_request(self):
+        """Тест request в async-обработчике в режиме asyncio"""
+        @self.app.route("/echo", methods=["POST"])
+        async def echo(app, request):
+            return JsonResponse(request.json)
+
+        response = asyncio.run(self.app.handle_request_async(
+            "POST /echo HTTP/1.1\r\nContent-Length: 8\r\n\r\n{\"a\": 1}"))
+        self.assertIn(b'{"a": 1}', response)
+
+    def test_async_handler_on_threads(self):
+        """Тест async-обработчика при запуске на потоках"""
+        @self.app.route("/async")
+        async def hello(app):
+            return TextResponse("async")
+
+        response = self.app.handle_request(
+            "GET /async HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        self.assertIn(b"async", response)
+
+    def test_handle_client_async(self):
+        """Тест соединения через asyncio streams с sync-обработчиком"""
+        @self.app.route("/submit", methods=["POST"])
+        def submit(app):
+            return TextResponse("ok")
+
+        async def scenario():
+            server = await asyncio.start_server(
+                self.app.handle_client_async, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /submit HTTP/1.1\r\nHost: localhost\r\n"
+                         b"Content-Length: 3\r\n\r\na=1"
+                         b"POST /submit HTTP/1.1\r\nConnection: close\r\n"
+                         b"Content-Length: 0\r\n\r\n")
+            data = await reader.read()
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return data
+
+        data = asyncio.run(scenario())
+        self.assertEqual(data.count(b"200 OK"), 2)
+        self.assertTrue(data.endswith(b"ok"))
+
+    def test_streaming_response_asyncio(self):
+        """Тест async-генератора в режиме asyncio"""
+        async def produce():
+            for part in (b"one", b"two"):
+                await asyncio.sleep(0)
+                yield part
+
+        @self.app.route("/stream")
+        async def stream(app):
+            return StreamingResponse(produce())
+
+        async def scenario():
+            server = await asyncio.start_server(
+                self.app.handle_client_async, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /stream HTTP/1.1\r\nConnection: close\r\n\r\n")
+            data = await reader.read()
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return data
+
+        data = asyncio.run(scenario())
+        self.assertTrue(data.endswith(
+            b"3\r\none\r\n3\r\ntwo\r\n0\r\n\r\n"))
+
+    def test_unknown_engine(self):
+        """Тест неизвестного режима сервера"""
+        with self.assertRaises(ValueError):
+            self.app.start_server(engine="unknown")
+
 
 if __name__ == "__main__":
     unittest.main()
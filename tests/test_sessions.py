@@ -0,0 +1,218 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+from response import JsonResponse, TextResponse
+from server import SimpleFramework
+from sessions import MemoryStore, SQLiteStore, SessionManager, sign, unsign
+
+
+class TestSigning(unittest.TestCase):
+    def test_roundtrip_and_tampering(self):
+        signed = sign("abc", b"secret")
+        self.assertEqual(unsign(signed, b"secret"), "abc")
+        self.assertIsNone(unsign(signed, b"other"))
+        self.assertIsNone(unsign("abd" + signed[3:], b"secret"))
+        self.assertIsNone(unsign("no-signature", b"secret"))
+
+
+class TestMemoryStore(unittest.TestCase):
+    def test_lru_eviction(self):
+        """Тест вытеснения давно не использованной сессии"""
+        store = MemoryStore(max_sessions=2)
+        store.save("a", {"n": 1})
+        store.save("b", {"n": 2})
+        store.load("a")  # a становится свежее b
+        store.save("c", {"n": 3})
+        self.assertIsNone(store.load("b"))
+        self.assertEqual(store.load("a"), {"n": 1})
+        self.assertEqual(store.evictions, 1)
+
+    def test_ttl_and_sweep(self):
+        """Тест истечения срока и фоновой чистки с начала очереди"""
+        store = MemoryStore(ttl=0.05)
+        store.save("old", {})
+        time.sleep(0.1)
+        store.save("fresh", {})
+        self.assertEqual(store.sweep(), 1)
+        self.assertEqual(len(store), 1)
+        self.assertIsNone(store.load("old"))
+
+    def test_data_is_copied(self):
+        store = MemoryStore()
+        data = {"items": [1]}
+        store.save("a", data)
+        data["items"].append(2)
+        self.assertEqual(store.load("a"), {"items": [1]})
+
+
+class TestSQLiteStore(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = os.path.join(folder.name, "sessions.db")
+
+    def test_shared_between_instances(self):
+        """Тест: второй экземпляр (как другой процесс) видит сессию"""
+        SQLiteStore(self.path).save("a", {"user": "alice"})
+        other = SQLiteStore(self.path)
+        self.assertEqual(other.load("a"), {"user": "alice"})
+        other.delete("a")
+        self.assertIsNone(SQLiteStore(self.path).load("a"))
+
+    def test_sweep(self):
+        store = SQLiteStore(self.path, ttl=-1)
+        store.save("expired", {})
+        self.assertIsNone(store.load("expired"))
+        store.save("expired", {})
+        self.assertEqual(store.sweep(), 1)
+        self.assertEqual(len(store), 0)
+
+
+class FailingStore(MemoryStore):
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+        self.calls = 0
+
+    def sweep(self):
+        self.calls += 1
+        raise self.error
+
+
+class TestSweeper(unittest.TestCase):
+    def run_sweeps(self, store):
+        manager = SessionManager(store, "secret", sweep_interval=0.01)
+        stop = threading.Event()
+        thread = threading.Thread(target=manager.sweep_loop, args=(stop,))
+        thread.start()
+        deadline = time.monotonic() + 5
+        while store.calls < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stop.set()
+        thread.join()
+
+    def test_busy_database_retried(self):
+        """Тест: занятый файл SQLite - тихий повтор на следующем круге"""
+        store = FailingStore(sqlite3.OperationalError("database is locked"))
+        with self.assertNoLogs("SimpleFramework.sessions"):
+            self.run_sweeps(store)
+        self.assertGreaterEqual(store.calls, 2)
+
+    def test_other_errors_logged(self):
+        store = FailingStore(RuntimeError("boom"))
+        with self.assertLogs("SimpleFramework.sessions", "ERROR") as logs:
+            self.run_sweeps(store)
+        self.assertIn("Session sweep failed", logs.output[0])
+        self.assertGreaterEqual(store.calls, 2)
+
+
+class TestSessionMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.app = SimpleFramework()
+        self.manager = self.app.enable_sessions("secret", sweep_interval=None)
+
+        @self.app.route("/count")
+        def count(app, request):
+            request.session["count"] = request.session.get("count", 0) + 1
+            return JsonResponse({"count": request.session["count"]})
+
+        @self.app.route("/plain")
+        def plain(app):
+            return TextResponse("plain")
+
+        @self.app.route("/logout")
+        def logout(app, request):
+            request.session.invalidate()
+            return TextResponse("bye")
+
+    def get(self, path, cookie=None):
+        headers = f"Cookie: {cookie}\r\n" if cookie else ""
+        return self.app.handle_request(
+            f"GET {path} HTTP/1.1\r\n{headers}\r\n").decode()
+
+    @staticmethod
+    def cookie_of(response):
+        for line in response.split("\r\n"):
+            if line.startswith("Set-Cookie: "):
+                return line[len("Set-Cookie: "):].split(";")[0]
+        return None
+
+    def test_session_persists_across_requests(self):
+        response = self.get("/count")
+        cookie = self.cookie_of(response)
+        self.assertIn("HttpOnly", response)
+        self.assertIn('{"count": 1}', response)
+        self.assertIn('{"count": 2}', self.get("/count", cookie))
+        self.assertEqual(len(self.manager.store), 1)
+
+    def test_lazy_loading(self):
+        """Тест: без обращения к сессии нет ни чтения, ни cookie"""
+        cookie = self.cookie_of(self.get("/count"))
+        loads = []
+        store_load = self.manager.store.load
+        self.manager.store.load = lambda sid: loads.append(sid) or \
+            store_load(sid)
+        response = self.get("/plain", cookie)
+        self.assertIsNone(self.cookie_of(response))
+        self.assertEqual(loads, [])
+
+    def test_tampered_cookie_starts_new_session(self):
+        cookie = self.cookie_of(self.get("/count"))
+        forged = cookie[:-1] + ("A" if cookie[-1] != "A" else "B")
+        response = self.get("/count", forged)
+        self.assertIn('{"count": 1}', response)
+        self.assertNotEqual(self.cookie_of(response), cookie)
+
+    def test_cached_route_not_cached_with_session(self):
+        """Тест: ответ, изменивший сессию, не попадает в кэш, а cookie
+        доходит и до ответа без маршрута"""
+        @self.app.route("/visit")
+        @self.app.cache(ttl=60)
+        def visit(app, request):
+            request.session["seen"] = True
+            return TextResponse("visit")
+
+        @self.app.before_request
+        def touch(request):
+            if request.path == "/missing":
+                request.session["missed"] = True
+
+        for _ in range(2):
+            self.assertIsNotNone(self.cookie_of(self.get("/visit")))
+        self.assertEqual(self.app.response_cache.stats()["entries"], 0)
+        self.assertEqual(len(self.manager.store), 2)
+        # Ответ 404 - готовая строка, cookie вставляется в нее
+        response = self.app.handle_request("GET /missing HTTP/1.1\r\n\r\n")
+        self.assertIn("404", response)
+        self.assertIsNotNone(self.cookie_of(response))
+
+    def test_enable_again_replaces_manager(self):
+        """Тест: повторный enable_sessions останавливает прежний поток чистки
+        и заменяет слой, а не добавляет второй"""
+        app = SimpleFramework()
+        first = app.enable_sessions("one", sweep_interval=60)
+        sweeper = first.sweeper
+        second = app.enable_sessions("two", sweep_interval=60)
+        self.addCleanup(second.stop_sweeper)
+        self.assertIsNone(first.sweeper)
+        self.assertFalse(sweeper.is_alive())
+        layers = [mw for mw in app.middleware if hasattr(mw, "manager")]
+        self.assertEqual([layer.manager for layer in layers], [second])
+        self.assertIsNotNone(second.sweeper)
+        asyncio.run(app.shutdown())
+        self.assertIsNone(second.sweeper)
+
+    def test_invalidate(self):
+        cookie = self.cookie_of(self.get("/count"))
+        response = self.get("/logout", cookie)
+        self.assertIn("Max-Age=0", response)
+        self.assertEqual(len(self.manager.store), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
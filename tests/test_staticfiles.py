@@ -0,0 +1,134 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from request_ import Request
+from response import FileResponse
+from server import SimpleFramework
+from staticfiles import StaticFiles
+
+
+def make_request(*headers):
+    lines = "".join(f"{header}\r\n" for header in headers)
+    return Request(f"GET /static/file HTTP/1.1\r\n{lines}\r\n")
+
+
+class TestStaticFiles(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.write("small.txt", b"0123456789")
+        self.write("big.bin", bytes(range(256)) * 1024)
+        self.static = StaticFiles(self.folder, cache_max_file_size=1024)
+
+    def write(self, name, data):
+        with open(os.path.join(self.folder, name), "wb") as f:
+            f.write(data)
+
+    def test_small_file_cached(self):
+        """Тест мелкого файла из кэша с ETag и Last-Modified"""
+        response = self.static.serve("small.txt")
+        self.assertEqual(response.status, "200 OK")
+        self.assertEqual(response.body, b"0123456789")
+        self.assertEqual(response.content_type, "text/plain")
+        names = [name for name, _ in response.headers]
+        self.assertIn("ETag", names)
+        self.assertIn("Last-Modified", names)
+        self.assertIn(os.path.join(os.path.realpath(self.folder), "small.txt"),
+                      self.static.cache)
+
+    def test_big_file_uses_sendfile(self):
+        """Тест крупного файла: FileResponse без чтения в память"""
+        response = self.static.serve("big.bin")
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(response.length, 256 * 1024)
+        self.assertEqual(self.static.cache_bytes, 0)
+
+    def test_if_none_match(self):
+        """Тест 304 по If-None-Match"""
+        etag = dict(self.static.serve("small.txt").headers)["ETag"]
+        response = self.static.serve("small.txt",
+                                     make_request(f"If-None-Match: {etag}"))
+        self.assertEqual(response.status, "304 Not Modified")
+        self.assertEqual(response.body, b"")
+
+    def test_if_modified_since(self):
+        """Тест 304 по If-Modified-Since"""
+        last_modified = dict(self.static.serve("small.txt").headers)[
+            "Last-Modified"]
+        response = self.static.serve(
+            "small.txt", make_request(f"If-Modified-Since: {last_modified}"))
+        self.assertEqual(response.status, "304 Not Modified")
+        response = self.static.serve(
+            "small.txt",
+            make_request("If-Modified-Since: Thu, 01 Jan 1970 00:00:00 GMT"))
+        self.assertEqual(response.status, "200 OK")
+
+    def test_range(self):
+        """Тест частичного ответа 206"""
+        response = self.static.serve("small.txt", make_request("Range: bytes=2-4"))
+        self.assertEqual(response.status, "206 Partial Content")
+        self.assertEqual(response.body, b"234")
+        self.assertEqual(dict(response.headers)["Content-Range"],
+                         "bytes 2-4/10")
+
+        response = self.static.serve("big.bin", make_request("Range: bytes=-10"))
+        self.assertEqual((response.offset, response.length),
+                         (256 * 1024 - 10, 10))
+
+    def test_range_not_satisfiable(self):
+        """Тест 416 для диапазона за концом файла"""
+        response = self.static.serve("small.txt",
+                                     make_request("Range: bytes=20-30"))
+        self.assertEqual(response.status, "416 Range Not Satisfiable")
+
+    def test_path_traversal(self):
+        """Тест выхода за пределы папки"""
+        self.assertIsNone(self.static.serve("../../etc/passwd"))
+        self.assertIsNone(self.static.serve("missing.txt"))
+
+    def test_lru_eviction(self):
+        """Тест вытеснения из кэша по числу записей"""
+        static = StaticFiles(self.folder, cache_max_entries=1)
+        self.write("other.txt", b"other")
+        static.serve("small.txt")
+        static.serve("other.txt")
+        self.assertEqual(len(static.cache), 1)
+        self.assertEqual(static.cache_bytes, 5)
+
+    def test_cache_invalidated_on_change(self):
+        """Тест обновления кэша после изменения файла"""
+        self.static.serve("small.txt")
+        path = os.path.join(self.folder, "small.txt")
+        self.write("small.txt", b"changed")
+        os.utime(path, ns=(1, 1))
+        self.assertEqual(self.static.serve("small.txt").body, b"changed")
+
+    def test_sendfile_over_socket(self):
+        """Тест отправки файла через handle_client"""
+        app = SimpleFramework(static_folder=self.folder)
+        server_socket, client_socket = socket.socketpair()
+        client_socket.sendall(b"GET /static/big.bin HTTP/1.1\r\n"
+                              b"Connection: close\r\n\r\n")
+        thread = threading.Thread(target=app.handle_client,
+                                  args=(server_socket,))
+        thread.start()
+        chunks = []
+        while True:
+            chunk = client_socket.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        thread.join()
+        client_socket.close()
+        head, _, body = b"".join(chunks).partition(b"\r\n\r\n")
+        self.assertIn(b"200 OK", head)
+        self.assertIn(b"Content-Length: 262144", head)
+        self.assertEqual(body, bytes(range(256)) * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
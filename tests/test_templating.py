@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from server import SimpleFramework
+from templating import Template, TemplateLoader, create_loader
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        """Тест подстановки переменных"""
+        template = Template("<h1>{{ title }}</h1><p>{{ message }}</p>")
+        self.assertEqual(template.render({"title": "T", "message": 1}),
+                         "<h1>T</h1><p>1</p>")
+
+    def test_missing_variable_kept(self):
+        """Тест переменной, отсутствующей в context"""
+        template = Template("{{ title }} {{ other }}")
+        self.assertEqual(template.render({"title": "T"}), "T {{ other }}")
+
+    def test_repeated_variable(self):
+        """Тест повторной переменной и шаблона без переменных"""
+        self.assertEqual(Template("{{ a }}-{{ a }}").render({"a": "x"}), "x-x")
+        self.assertEqual(Template("plain").render({"a": "x"}), "plain")
+
+
+class TestTemplateLoader(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.write("page.html", "<title>{{ title }}</title>")
+
+    def write(self, name, content, mtime=None):
+        path = os.path.join(self.folder.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+
+    def test_cached_template(self):
+        """Тест повторного рендера без чтения файла"""
+        loader = TemplateLoader(self.folder.name)
+        self.assertEqual(loader.render("page.html", {"title": "A"}),
+                         "<title>A</title>")
+        with patch("builtins.open") as mock_open:
+            self.assertEqual(loader.render("page.html", {"title": "B"}),
+                             "<title>B</title>")
+            mock_open.assert_not_called()
+
+    def test_mtime_invalidation(self):
+        """Тест перекомпиляции после изменения файла"""
+        loader = TemplateLoader(self.folder.name)
+        self.write("page.html", "old {{ title }}", mtime=1_000_000_000)
+        self.assertEqual(loader.render("page.html", {"title": "A"}), "old A")
+        self.write("page.html", "new {{ title }}", mtime=2_000_000_000)
+        self.assertEqual(loader.render("page.html", {"title": "A"}), "new A")
+
+    def test_no_auto_reload(self):
+        """Тест кэша без проверки mtime"""
+        loader = TemplateLoader(self.folder.name, auto_reload=False)
+        loader.get_template("page.html")
+        with patch("os.stat") as mock_stat:
+            loader.get_template("page.html")
+            mock_stat.assert_not_called()
+
+    def test_precompile(self):
+        """Тест предварительной компиляции всей папки"""
+        self.write("other.html", "{{ x }}")
+        self.write(".gitkeep", "")
+        loader = TemplateLoader(self.folder.name)
+        self.assertEqual(loader.precompile(), 2)
+        self.assertIn("other.html", loader.cache)
+
+    def test_template_not_found(self):
+        """Тест отсутствующего шаблона"""
+        loader = TemplateLoader(self.folder.name)
+        with self.assertRaises(FileNotFoundError):
+            loader.render("missing.html", {})
+
+    def test_unknown_engine(self):
+        """Тест неизвестного движка шаблонов"""
+        with self.assertRaises(ValueError):
+            create_loader("unknown", self.folder.name)
+
+    def test_render_template(self):
+        """Тест render_template из SimpleFramework"""
+        app = SimpleFramework(template_folder=self.folder.name,
+                              precompile_templates=True)
+        self.assertEqual(app.render_template("page.html", {"title": "WFW"}),
+                         "<title>WFW</title>")
+        with self.assertRaises(FileNotFoundError):
+            app.render_template("missing.html")
+
+
+if __name__ == "__main__":
+    unittest.main()
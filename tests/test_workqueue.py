@@ -0,0 +1,104 @@
+import socket
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from response import TextResponse
+from server import SimpleFramework
+from workqueue import TaskQueue
+
+
+class TestTaskQueue(unittest.TestCase):
+    def test_wait_time(self):
+        """Тест замера времени ожидания в очереди"""
+        waits = []
+        task_queue = TaskQueue()
+        task_queue.observer = waits.append
+        with patch("workqueue.time.monotonic", return_value=10.0):
+            task_queue.put("a")
+            task_queue.put(None)
+        with patch("workqueue.time.monotonic", return_value=10.5):
+            self.assertEqual(task_queue.get(), "a")
+        with patch("workqueue.time.monotonic", return_value=12.0):
+            self.assertIsNone(task_queue.get())
+        self.assertEqual(waits, [0.5, 2.0])
+        self.assertEqual(task_queue.wait_stats(),
+                         {"count": 2, "avg": 1.25, "max": 2.0})
+
+
+class TestBackpressure(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.app = SimpleFramework(min_threads=1, max_threads=2,
+                                   max_queue_size=1, retry_after=7,
+                                   thread_idle_timeout=0.2)
+
+        @self.app.route("/slow")
+        def slow(app):
+            self.release.wait(5)
+            return TextResponse("done")
+
+    def tearDown(self):
+        self.release.set()
+
+    def connect(self, port):
+        client = socket.create_connection(("127.0.0.1", port), timeout=5)
+        client.sendall(b"GET /slow HTTP/1.1\r\nConnection: close\r\n\r\n")
+        return client
+
+    def read_all(self, client):
+        chunks = []
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        client.close()
+        return b"".join(chunks)
+
+    def wait_until(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("condition not reached")
+            time.sleep(0.01)
+
+    def test_overload_and_elastic_pool(self):
+        """Тест роста пула, 503 при полной очереди и сжатия пула"""
+        server_socket = self.app.create_server_socket("127.0.0.1", 0)
+        self.addCleanup(server_socket.close)
+        port = server_socket.getsockname()[1]
+        threading.Thread(target=self.app.serve_threads,
+                         args=(server_socket,), daemon=True).start()
+
+        self.wait_until(lambda: self.app.idle_threads == 1)
+        busy = [self.connect(port)]
+        self.wait_until(lambda: self.app.idle_threads == 0)
+        busy.append(self.connect(port))  # Второй поток сверх min_threads
+        self.wait_until(lambda: self.app.thread_count == 2
+                        and self.app.idle_threads == 0)
+        busy.append(self.connect(port))  # Ждет в очереди
+        self.wait_until(lambda: self.app.task_queue.qsize() == 1)
+
+        rejected = self.read_all(self.connect(port))
+        self.assertTrue(rejected.startswith(b"HTTP/1.1 503"))
+        self.assertIn(b"Retry-After: 7\r\n", rejected)
+        self.assertEqual(self.app.rejected, 1)
+
+        self.release.set()
+        for client in busy:
+            self.assertIn(b"done", self.read_all(client))
+        self.wait_until(lambda: self.app.thread_count == 1)
+        self.assertGreater(self.app.task_queue.wait_stats()["max"], 0)
+
+    def test_listen_backlog(self):
+        """Тест передачи backlog в listen"""
+        app = SimpleFramework(listen_backlog=42)
+        with patch("server.socket.socket") as socket_class:
+            app.create_server_socket("127.0.0.1", 0)
+        socket_class.return_value.listen.assert_called_once_with(42)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+from wsgiref.util import FileWrapper, setup_testing_defaults
+from wsgiref.validate import validator
+
+from response import HtmlResponse, JsonResponse, StreamingResponse, TextResponse
+from server import SimpleFramework
+
+
+class TestWSGI(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.app = SimpleFramework(static_folder=folder.name)
+        self.app.static_files.cache_max_file_size = 4
+        with open(os.path.join(folder.name, "data.bin"), "wb") as f:
+            f.write(b"0123456789")
+
+        @self.app.route("/user/<name>")
+        def user(app, name):
+            return HtmlResponse(f"<h1>{name}</h1>")
+
+        @self.app.route("/submit", methods=["POST"])
+        def submit(app):
+            return JsonResponse({"status": "ok"})
+
+        @self.app.route("/stream")
+        def stream(app):
+            return StreamingResponse(iter(["a", "b"]), content_length=2)
+
+        @self.app.cache(ttl=60)
+        @self.app.route("/cached")
+        def cached(app):
+            return TextResponse("cached")
+
+    def call(self, path, method="GET", body=b"", **extra):
+        environ = {"PATH_INFO": path, "SCRIPT_NAME": "",
+                   "QUERY_STRING": "", "REQUEST_METHOD": method,
+                   "wsgi.input": io.BytesIO(body),
+                   "wsgi.file_wrapper": FileWrapper}
+        if body:
+            environ["CONTENT_LENGTH"] = str(len(body))
+            environ["CONTENT_TYPE"] = "application/json"
+        environ.update(extra)
+        setup_testing_defaults(environ)
+        started = {}
+
+        def start_response(status, headers):
+            started["status"] = status
+            started["headers"] = dict(headers)
+
+        result = validator(self.app)(environ, start_response)
+        try:
+            body = b"".join(result)
+        finally:
+            result.close()
+        return started["status"], started["headers"], body
+
+    def test_route_params(self):
+        """Тест параметров маршрута и Content-Length"""
+        status, headers, body = self.call("/user/alice")
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(body, b"<h1>alice</h1>")
+        self.assertEqual(headers["Content-Length"], str(len(body)))
+
+    def test_method_routing(self):
+        """Тест выбора маршрута по методу и чтения тела"""
+        status, _, _ = self.call("/submit")
+        self.assertEqual(status, "404 Not Found")
+        status, headers, body = self.call("/submit", method="POST",
+                                          body=b'{"a": 1}')
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(headers["Content-Type"], "application/json")
+        self.assertEqual(body, b'{"status": "ok"}')
+
+    def test_middleware(self):
+        """Тест общей цепочки middleware"""
+        seen = {}
+
+        def capture(environ):
+            seen.update(environ)
+            return environ
+
+        self.app.use(capture)
+        status, _, _ = self.call("/user/bob", method="GET")
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(seen["path"], "/user/bob")
+
+    def test_request_headers(self):
+        """Тест заголовков запроса из environ без учета регистра имени"""
+        @self.app.route("/headers", methods=["POST"])
+        def headers(app, request):
+            return JsonResponse([request.headers.get("content-type"),
+                                 request.get_header("X-Token")])
+
+        _, _, body = self.call("/headers", method="POST", body=b"{}",
+                               HTTP_X_TOKEN="t")
+        self.assertEqual(body, b'["application/json", "t"]')
+
+    def test_not_found(self):
+        """Тест 404 из готового HTTP-ответа"""
+        status, headers, body = self.call("/missing")
+        self.assertEqual(status, "404 Not Found")
+        self.assertEqual(body, b"<h1>404 Not Found</h1>")
+        self.assertEqual(headers["Content-Type"], "text/html")
+
+    def test_invalid_body(self):
+        """Тест 400 на плохой CONTENT_LENGTH и 413 сверх max_body_bytes"""
+        # validator сам отвергает такой environ - вызываем приложение напрямую
+        environ = {"REQUEST_METHOD": "POST", "PATH_INFO": "/submit",
+                   "CONTENT_LENGTH": "abc", "wsgi.input": io.BytesIO(b"{}")}
+        started = []
+        self.app(environ, lambda status, headers: started.append(status))
+        self.assertEqual(started, ["400 Bad Request"])
+        self.app.max_body_bytes = 4
+        status, _, _ = self.call("/submit", method="POST",
+                                 body=b'{"a": 1}')
+        self.assertEqual(status, "413 Payload Too Large")
+
+    def test_hop_by_hop_headers_dropped(self):
+        """Тест: заголовки соединения из Response не уходят WSGI-серверу"""
+        @self.app.route("/close")
+        def close(app):
+            return TextResponse("bye", headers=[("Connection", "close"),
+                                                ("X-Kept", "1")])
+
+        status, headers, _ = self.call("/close")
+        self.assertEqual(status, "200 OK")
+        self.assertNotIn("Connection", headers)
+        self.assertEqual(headers["X-Kept"], "1")
+
+    def test_streaming(self):
+        """Тест потокового ответа"""
+        status, headers, body = self.call("/stream")
+        self.assertEqual(body, b"ab")
+        self.assertEqual(headers["Content-Length"], "2")
+
+    def test_cached_route(self):
+        """Тест ответа из кэша с ETag и 304"""
+        _, headers, body = self.call("/cached")
+        self.assertEqual(body, b"cached")
+        status, _, body = self.call("/cached",
+                                    HTTP_IF_NONE_MATCH=headers["ETag"])
+        self.assertEqual(status, "304 Not Modified")
+        self.assertEqual(body, b"")
+
+    def test_static_file_wrapper(self):
+        """Тест раздачи файла через wsgi.file_wrapper и Range"""
+        status, headers, body = self.call("/static/data.bin")
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(body, b"0123456789")
+        status, _, body = self.call("/static/data.bin",
+                                    HTTP_RANGE="bytes=2-4")
+        self.assertEqual(status, "206 Partial Content")
+        self.assertEqual(body, b"234")
+
+    def test_wsgi_host_mode(self):
+        """Тест режима engine="wsgi" на настоящем сокете"""
+        server_socket = self.app.create_server_socket("127.0.0.1", 0)
+        port = server_socket.getsockname()[1]
+        threading.Thread(target=self.app.serve,
+                         args=(server_socket, "wsgi"), daemon=True).start()
+        with urllib.request.urlopen(
+                f"http://127.0.0.1:{port}/user/carol", timeout=5) as reply:
+            self.assertEqual(reply.read(), b"<h1>carol</h1>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import queue
+import time
+
+
+class TaskQueue(queue.Queue):
+    """ Очередь соединений для рабочих потоков с замером времени ожидания.
+
+    Каждый элемент хранится вместе с моментом постановки; время ожидания
+    считается в _get под мьютексом самой очереди, без отдельной блокировки.
+    """
+
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize)
+        self.observer = None  # Функция(секунды ожидания), например в метрики
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _put(self, item):
+        self.queue.append((item, time.monotonic()))
+
+    def _get(self):
+        item, queued_at = self.queue.popleft()
+        wait = time.monotonic() - queued_at
+        self.wait_count += 1
+        self.wait_total += wait
+        if wait > self.wait_max:
+            self.wait_max = wait
+        if self.observer is not None:
+            self.observer(wait)
+        return item
+
+    def wait_stats(self):
+        with self.mutex:
+            return {
+                "count": self.wait_count,
+                "avg": self.wait_total / self.wait_count
+                if self.wait_count else 0.0,
+                "max": self.wait_max,
+            }
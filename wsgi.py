@@ -0,0 +1,297 @@
+import io
+import os
+import socket
+import threading
+import time
+from socketserver import ThreadingMixIn
+from urllib.parse import quote
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from request_ import Headers, HTTPParseError, Request
+from response import FileResponse, Response, StreamingResponse
+
+# Заголовки уровня соединения - их выставляет WSGI-сервер (PEP 3333)
+HOP_BY_HOP = frozenset((
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade",
+))
+
+FILE_BLOCK_SIZE = 64 * 1024
+
+
+def request_from_environ(environ, max_body_bytes=None):
+    """ Request из WSGI environ; цель запроса как в сыром HTTP (path?query).
+
+    Некорректный или слишком большой CONTENT_LENGTH - HTTPParseError со
+    статусом для клиента, как у разбора из сокета.
+    """
+    request = Request()
+    request.method = environ.get("REQUEST_METHOD", "GET")
+    # PATH_INFO уже декодирован сервером (байты как latin-1) - кодируем обратно
+    path = quote(environ.get("PATH_INFO", "").encode("latin-1"),
+                 safe="/:@!$&'()*+,;=~") or "/"
+    query = environ.get("QUERY_STRING")
+    request.endpoint = f"{path}?{query}" if query else path
+    request.protocol = environ.get("SERVER_PROTOCOL", "HTTP/1.1")
+
+    # Блок заголовков в байтах, как из сокета: Headers ищет в нем без учета
+    # регистра и не строит словарь без надобности
+    lines = [f"{key[5:].replace('_', '-').title()}: {value}"
+             for key, value in environ.items() if key.startswith("HTTP_")]
+    if environ.get("CONTENT_TYPE"):
+        lines.append(f"Content-Type: {environ['CONTENT_TYPE']}")
+    length = environ.get("CONTENT_LENGTH", "").strip()
+    if length:
+        if not (length.isascii() and length.isdigit()):
+            raise HTTPParseError("Invalid Content-Length")
+        size = int(length)
+        if max_body_bytes is not None and size > max_body_bytes:
+            raise HTTPParseError("Request body too large",
+                                 "413 Payload Too Large")
+        lines.append(f"Content-Length: {length}")
+        request.body = environ["wsgi.input"].read(size)
+    request.headers = Headers("\r\n".join(lines).encode("latin-1"))
+    return request
+
+
+def wsgi_response(response, environ):
+    """ (статус, заголовки, итерируемое тело) для ответа dispatch """
+    if isinstance(response, FileResponse):
+        headers = [("Content-Type", response.content_type),
+                   ("Content-Length", str(response.length))]
+        headers.extend(response.headers)
+        return response.status, headers, file_body(response, environ)
+    if isinstance(response, StreamingResponse):
+        headers = [("Content-Type", response.content_type)]
+        if response.content_length is not None:
+            headers.append(("Content-Length", str(response.content_length)))
+        headers.extend(header for header in response.headers
+                       if header[0].lower() not in HOP_BY_HOP)
+        return response.status, headers, response.iter_chunks()
+    if isinstance(response, Response):
+        body = response.body
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        headers = [("Content-Length", str(len(body)))]
+        if response.content_type is not None:
+            headers.insert(0, ("Content-Type", response.content_type))
+        headers.extend(header for header in response.headers
+                       if header[0].lower() not in HOP_BY_HOP)
+        # Тело отдается одним куском без копирования
+        return response.status, headers, [body]
+    return split_http_response(response)
+
+
+def file_body(response, environ):
+    f = open(response.path, "rb")
+    file_wrapper = environ.get("wsgi.file_wrapper")
+    if (file_wrapper is not None and response.offset == 0
+            and response.length == os.fstat(f.fileno()).st_size):
+        # Сервер может отдать файл через sendfile
+        return file_wrapper(f, FILE_BLOCK_SIZE)
+    return read_range(f, response.offset, response.length)
+
+
+def read_range(f, offset, length):
+    """ Тело диапазона байт файла блоками; файл закрывается в конце """
+    with f:
+        f.seek(offset)
+        while length > 0:
+            block = f.read(min(FILE_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def split_http_response(data):
+    """ Разбор готового HTTP-ответа (кэш, ошибки) на статус, заголовки, тело """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    head_end = data.find(b"\r\n\r\n")
+    lines = data[:head_end].decode("latin-1").split("\r\n")
+    status = lines[0].split(" ", 1)[1]
+    headers = []
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.lower() not in HOP_BY_HOP:
+            headers.append((name, value.strip()))
+    return status, headers, [data[head_end + 4:]]
+
+
+class StopServing(Exception):
+    """ Выход из serve_forever по app.request_stop() """
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """ Поток на соединение; лимит соединений с IP и остановка со сроком.
+
+    Потоки учитываются сервером сами (block_on_close выключен): drain()
+    ждет их не дольше shutdown_timeout, а затем обрывает их сокеты.
+    """
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = {}  # сокет -> (поток, DeadlineReader или None)
+        self.connections_lock = threading.Lock()
+
+    def service_actions(self):
+        """ Вызывается serve_forever раз в poll_interval: флаги фреймворка """
+        app = self.get_app()
+        app.check_reload()
+        if app.stopping.is_set():
+            raise StopServing
+
+    def verify_request(self, request, client_address):
+        app = self.get_app()
+        if app.admit(request, client_address):
+            return True
+        app.reject_connection(request, app.too_many_connections_response,
+                              "per_ip")
+        return False
+
+    def process_request_thread(self, request, client_address):
+        with self.connections_lock:
+            self.connections[request] = (threading.current_thread(), None)
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self.connections_lock:
+                self.connections.pop(request, None)
+
+    def track_reader(self, request, reader):
+        with self.connections_lock:
+            if request in self.connections:
+                self.connections[request] = (threading.current_thread(),
+                                             reader)
+
+    def shutdown_request(self, request):
+        self.get_app().release(request)
+        super().shutdown_request(request)
+
+    def drain(self, timeout):
+        """ Запросы в работе дорабатывают до timeout; соединения без единого
+        байта запроса закрываются сразу, остальные - по истечении срока """
+        deadline = time.monotonic() + timeout
+        with self.connections_lock:
+            connections = dict(self.connections)
+        for request, (thread, reader) in connections.items():
+            if reader is None or reader.deadline is None:
+                shutdown_socket(request)
+        for thread, _ in connections.values():
+            thread.join(max(deadline - time.monotonic(), 0))
+        with self.connections_lock:
+            pending = dict(self.connections)
+        if pending:
+            self.get_app().logger.warning(
+                f"Shutdown timeout: {len(pending)} connection(s) still "
+                f"in progress")
+            for request in pending:
+                shutdown_socket(request)
+
+
+def shutdown_socket(sock):
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class DeadlineReader(io.RawIOBase):
+    """ Чтение из сокета со сроками фреймворка: до первого байта - простой
+    keep_alive_timeout, на заголовки - header_timeout от первого байта,
+    на тело - body_timeout после заголовков. Просроченный запрос -
+    HTTPParseError 408, как у остальных движков """
+
+    def __init__(self, sock, app):
+        self.sock = sock
+        self.app = app
+        self.deadline = None  # None - запрос еще не начат
+
+    def readable(self):
+        return True
+
+    def start_body(self):
+        self.deadline = time.monotonic() + self.app.body_timeout
+
+    def readinto(self, buffer):
+        app = self.app
+        if self.deadline is None:
+            timeout = app.keep_alive_timeout
+        else:
+            timeout = app.read_timeout(self.deadline)
+        self.sock.settimeout(timeout)
+        try:
+            size = self.sock.recv_into(buffer)
+        except socket.timeout:
+            if self.deadline is None:
+                raise  # Клиент так ничего и не прислал - просто закрываем
+            if self.deadline <= time.monotonic():
+                raise app.request_timeout() from None
+            raise
+        finally:
+            # Запись ответа - с ограничением простоя, а не остатком срока
+            self.sock.settimeout(app.keep_alive_timeout)
+        if size and self.deadline is None:
+            self.deadline = time.monotonic() + app.header_timeout
+        return size
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def setup(self):
+        super().setup()
+        app = self.server.get_app()
+        self.reader = DeadlineReader(self.connection, app)
+        self.rfile = io.BufferedReader(self.reader)
+        self.server.track_reader(self.connection, self.reader)
+
+    def handle(self):
+        app = self.server.get_app()
+        try:
+            super().handle()
+        except socket.timeout:
+            pass  # Простой без запроса или клиент не читает ответ
+        except HTTPParseError as e:
+            app.logger.error(f"Invalid HTTP request: {e}")
+            try:
+                self.wfile.write(app.parse_error_response(e))
+            except OSError:
+                pass
+
+    def parse_request(self):
+        if not super().parse_request():
+            return False
+        app = self.server.get_app()
+        size = len(self.raw_requestline) + sum(
+            len(name) + len(value) + 4 for name, value in self.headers.items())
+        if app.max_header_bytes is not None and size > app.max_header_bytes:
+            raise HTTPParseError("Request headers too large",
+                                 "431 Request Header Fields Too Large")
+        self.reader.start_body()  # Заголовки прочитаны - срок на тело
+        return True
+
+    def log_message(self, format, *args):
+        pass  # wsgiref пишет каждую строку журнала в stderr синхронно
+
+
+def serve_wsgi(app, server_socket):
+    """ Режим WSGI-хоста: wsgiref на уже открытом сокете фреймворка """
+    host, port = server_socket.getsockname()[:2]
+    server = ThreadingWSGIServer((host, port), QuietRequestHandler,
+                                 bind_and_activate=False)
+    server.socket.close()
+    server.socket = server_socket
+    server.server_name = host
+    server.server_port = port
+    server.setup_environ()
+    server.set_app(app)
+    try:
+        server.serve_forever(poll_interval=app.poll_interval)
+    except StopServing:
+        pass
+    finally:
+        server.socket.close()  # Новых соединений больше нет
+        server.drain(app.shutdown_timeout)
+        server.server_close()